@@ -1,11 +1,18 @@
+import os
 import pickle
+import functools
 from .src import get_data, procesar_data, preparar_data_modelo, entrenamiento, prediccion_tiempo_real
+from comun.perfiles import pedir_perfil
+from comun.almacen_features import AlmacenFeatures
+from comun.arranque import Arranque
+from comun.cache_dataset import registrar_muestras
 
 
 
 def main():
     DATA_DIR = 'data_clasico/'              #Carpeta con imagenes originales
     OUTPUT_DIR = 'data_processed_clasico/'  #Carpeta donde se guardan las imagenes preprocesadas
+    ALMACEN_DIR = 'almacen_features_clasico/'  #Caracteristicas extraidas durante la captura
 
     letras = [
         "A", "B", "C", "CH", "D", "E", "F", "G", "H", "I", "J", "K", "L", "LL",
@@ -22,7 +29,13 @@ def main():
         print("[1] Capturar dataset")
         print("[2] Preprocesar datos")
         print("[3] Entrenar modelo")
-        print("[4] Probar en tiempo real\n")
+        print("[4] Probar en tiempo real")
+        print("[5] Búsqueda de hiperparámetros (validación cruzada)")
+        print("[6] Comparar modelos (accuracy, tiempos y tamaño)")
+        print("[7] Curva de coreset (accuracy frente a tiempo de entrenamiento)")
+        print("[8] Selección de características (modelo reducido)")
+        print("[9] Entrenamiento incremental (letras o muestras nuevas)")
+        print("[10] Destilar el modelo en un modelo NumPy compacto\n")
         
         opcion = input("Selecciona una opción: ")
 
@@ -32,7 +45,17 @@ def main():
 
         elif opcion == '1':
             # Captura de datos
-            get_data.run(DATA_DIR, letras)
+            filtrar = input("¿Descartar muestras casi duplicadas? (s/n): ").strip().lower() == 's'
+            almacen = None
+            if input("¿Extraer características mientras se captura? (s/n): ").strip().lower() == 's':
+                #Preprocesado y features en segundo plano: al terminar no hace falta la opcion 2 ni reconstruir el dataset
+                almacen = AlmacenFeatures(ALMACEN_DIR, "clasico", DATA_DIR, dir_procesado=OUTPUT_DIR, augment_factor=2)
+                almacen.poner_al_dia()
+            try:
+                get_data.run(DATA_DIR, letras, filtrar_duplicados=filtrar, almacen=almacen)
+            finally:
+                if almacen is not None:
+                    almacen.cerrar(preparar_data_modelo.FEATURES_FILE)
 
 
         elif opcion == '2':
@@ -46,8 +69,9 @@ def main():
                 # Construir dataset con augmentacion
                 X, y = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2)
 
-                # Entrenar Random Forest
-                rf_model, le = entrenamiento.run(OUTPUT_DIR)
+                # Entrenar Random Forest (opcionalmente con un coreset del entrenamiento)
+                fraccion = input("Fracción de coreset (Enter para usar todos los datos): ").strip()
+                rf_model, le = entrenamiento.run(OUTPUT_DIR, coreset=float(fraccion) if fraccion else None)
 
                 # Guardar modelo y LabelEncoder
                 with open("modelos_clasico/random_forest_model.pkl", "wb") as f:
@@ -61,20 +85,157 @@ def main():
 
 
         elif opcion == '4':
-            # Cargar modelo si no esta en memoria
-            if rf_model is None or le is None:
-                try:
-                    with open("modelos/random_forest_model.pkl", "rb") as f:
-                        rf_model = pickle.load(f)
-                    with open("modelos/label_encoder.pkl", "rb") as f:
-                        le = pickle.load(f)
-
-                except FileNotFoundError:
-                    print("No se encontró el modelo entrenado. Primero entrena el modelo.")
-                    continue
-
-            # Prediccion en tiempo real
-            prediccion_tiempo_real.run(rf_model, le, buffer_size=5, wait_ms=50)
+            if (rf_model is None or le is None) and not os.path.exists(prediccion_tiempo_real.RUTA_MODELO):
+                print("No se encontró el modelo entrenado. Primero entrena el modelo.")
+                continue
+
+            # Prediccion en tiempo real (con el modelo destilado si se elige). El modelo se carga y se
+            # calienta en segundo plano mientras se responden las preguntas
+            calentar = prediccion_tiempo_real.calentar_clasico
+            ruta_activa = prediccion_tiempo_real.RUTA_MODELO
+            usar_alumno = os.path.exists(prediccion_tiempo_real.RUTA_ALUMNO) and \
+                input("¿Usar el modelo destilado (NumPy)? (s/n): ").strip().lower() == 's'
+            if usar_alumno:
+                from comun.destilacion import cargar_alumno
+                #El alumno usa su propia seleccion de caracteristicas, la que tenia el profesor al destilar
+                ruta_activa = prediccion_tiempo_real.RUTA_ALUMNO
+                calentar = functools.partial(calentar, ruta_modelo=ruta_activa)
+                arranque = Arranque(lambda: cargar_alumno(ruta_activa), calentar=calentar)
+            elif rf_model is None or le is None:
+                arranque = Arranque(prediccion_tiempo_real.cargar_modelo_clasico, calentar=calentar)
+            else:
+                arranque = Arranque(lambda m=rf_model, c=le: (m, c), calentar=calentar)
+            salida_temprana = input("¿Votación con salida temprana? (s/n): ").strip().lower() == 's'
+            en_caliente = False
+            if usar_alumno:
+                #Modelo destilado: solo NumPy. Las correcciones reentrenan el Random Forest, asi que no se recarga
+                print("Con el modelo destilado no se recarga en caliente; las correcciones se desactivan.")
+            else:
+                en_caliente = input("¿Permitir correcciones con 'c' y recargar el modelo en caliente? (s/n): ").strip().lower() == 's'
+            perfil = pedir_perfil()
+            memoizar = input("¿Reutilizar la predicción mientras la mano está quieta? (s/n): ").strip().lower() == 's'
+            grabar = input("Grabar la sesión en (ruta .ses, Enter = no grabar): ").strip() or None
+            try:
+                prediccion_tiempo_real.run(None, None, buffer_size=5, wait_ms=50, salida_temprana=salida_temprana,
+                                           en_caliente=en_caliente, data_dir=OUTPUT_DIR, perfil=perfil, memoizar=memoizar,
+                                           grabar=grabar, arranque=arranque, ruta_modelo=ruta_activa)
+                if not usar_alumno:
+                    rf_model, le = arranque.modelo
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                #Falta label_encoder.pkl o alguno de los ficheros esta vacio o corrupto
+                print("No se encontró el modelo entrenado. Primero entrena el modelo.")
+                rf_model, le = None, None
+            if en_caliente:
+                rf_model, le = None, None #Se recarga la ultima version guardada
+
+
+        elif opcion == '5':
+            try:
+                X, y, origen = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2,
+                                                                      con_origen=True)
+
+                #Busqueda en paralelo, se puede cancelar con Ctrl+C y reanudar. Folds por imagen: cada
+                #imagen y sus copias aumentadas quedan en el mismo fold
+                modelo, codificador = entrenamiento.buscar_random_forest(X, y, origen=origen)
+                if modelo is not None:
+                    rf_model, le = modelo, codificador
+                    registrar_muestras(prediccion_tiempo_real.RUTA_MODELO, OUTPUT_DIR, {"augment_factor": 2})
+                    print("Mejor modelo y codificador guardados en 'modelos_clasico/'")
+
+            except Exception as e:
+                print(f"Error en la búsqueda de hiperparámetros: {e}")
+
+
+        elif opcion == '6':
+            try:
+                from comun import zoo_modelos
+
+                #Usamos las caracteristicas ya calculadas en features.npz si existen. El test se separa por
+                #imagen: las copias aumentadas de una imagen de entrenamiento no acaban en el test
+                X, y, origen = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2,
+                                                                      con_origen=True)
+                exportado = zoo_modelos.run(X, y, "modelos_clasico/random_forest_model.pkl", "modelos_clasico/label_encoder.pkl",
+                                            origen=origen)
+                if exportado is not None:
+                    registrar_muestras(exportado, OUTPUT_DIR, {"augment_factor": 2})
+                rf_model, le = None, None #Se recarga el modelo exportado en la opcion 4
+
+            except Exception as e:
+                print(f"Error al comparar modelos: {e}")
+
+
+        elif opcion == '7':
+            try:
+                from comun.coreset import curva_coreset
+
+                #Test separado por imagen: sin copias aumentadas de las imagenes de entrenamiento
+                X, y, origen = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2,
+                                                                      con_origen=True)
+                curva_coreset(X, y, origen=origen)
+
+            except Exception as e:
+                print(f"Error al calcular la curva de coreset: {e}")
+
+
+        elif opcion == '8':
+            try:
+                from comun import seleccion_features
+                from .src.utils import GRUPOS_FEATURES
+
+                #Se eligen los grupos de caracteristicas imprescindibles y se guarda el modelo reducido.
+                #El test se separa por imagen: sin copias aumentadas de las imagenes de entrenamiento
+                X, y, origen = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2,
+                                                                      con_origen=True)
+                tolerancia = input("Pérdida de accuracy admitida (Enter para 0.01): ").strip()
+                seleccion_features.run(X, y, GRUPOS_FEATURES,
+                                       "modelos_clasico/random_forest_model.pkl", "modelos_clasico/label_encoder.pkl",
+                                       tolerancia=float(tolerancia) if tolerancia else 0.01, origen=origen)
+                rf_model, le = None, None #Se recarga el modelo reducido en la opcion 4
+
+            except Exception as e:
+                print(f"Error en la selección de características: {e}")
+
+
+        elif opcion == '9':
+            try:
+                #Solo se entrena con las imagenes preprocesadas despues del ultimo entrenamiento
+                modelo, codificador = entrenamiento.entrenar_incremental_rf(OUTPUT_DIR)
+                if modelo is not None:
+                    rf_model, le = modelo, codificador
+                    print("Modelo ampliado y codificador guardados en 'modelos_clasico/'")
+
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Primero entrena el modelo.")
+            except Exception as e:
+                print(f"Error en el entrenamiento incremental: {e}")
+
+
+        elif opcion == '10':
+            try:
+                from comun import destilacion
+                from comun.intercambio_modelos import cargar_pickle
+                from comun.seleccion_features import cargar_seleccion
+
+                profesor = cargar_pickle(prediccion_tiempo_real.RUTA_MODELO)
+                codificador = cargar_pickle(prediccion_tiempo_real.RUTA_LE)
+
+                #El alumno aprende con las mismas caracteristicas que usa el modelo. El test se separa por
+                #imagen para que no tenga copias aumentadas de las imagenes con las que aprende el alumno
+                X, y, origen = preparar_data_modelo.construir_dataset(OUTPUT_DIR, augment=True, augment_factor=2,
+                                                                      con_origen=True)
+                seleccion = cargar_seleccion(prediccion_tiempo_real.RUTA_MODELO, profesor)
+                if seleccion is not None:
+                    X = X[:, seleccion["indices"]]
+
+                capas = input("Neuronas de la capa oculta (Enter para 64, 0 para un modelo lineal): ").strip()
+                ocultas = () if capas == '0' else (int(capas) if capas else 64,)
+                destilacion.run(profesor, codificador, X, y, prediccion_tiempo_real.RUTA_ALUMNO,
+                                ruta_profesor=prediccion_tiempo_real.RUTA_MODELO, ocultas=ocultas, origen=origen)
+
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Primero entrena el modelo.")
+            except Exception as e:
+                print(f"Error en la destilación: {e}")
 
         else:
             print("Opción no válida.")
\ No newline at end of file
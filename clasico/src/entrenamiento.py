@@ -2,11 +2,14 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
+import numpy as np
 import pickle
 import os
+from comun.recursos import etapa
 
 
-def entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=111):
+@etapa("entrenar_random_forest")
+def entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=111, coreset=None):
     """Entrena un modelo de Random Forest.
 
     Args:
@@ -16,6 +19,8 @@ def entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=1
         test_size (float): Proporcion de datos reservados para prueba
         n_estimators (int): Numero de arboles en el Random Forest
         random_state (int): Semilla para reproducibilidad
+        coreset (float): Si se indica, fraccion de muestras de entrenamiento por clase que se conserva
+                         con k-center greedy antes de entrenar (el test no se reduce)
 
     Returns:
     --------
@@ -32,6 +37,13 @@ def entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=1
         X, y_encoded, test_size=test_size, random_state=random_state, stratify=y_encoded
     )
 
+    #Reducimos el conjunto de entrenamiento a un subconjunto representativo
+    if coreset is not None:
+        from comun.coreset import seleccionar_coreset
+        idx = seleccionar_coreset(X_train, y_train, fraccion=coreset, random_state=random_state)
+        print(f"Coreset: {len(idx)} de {len(X_train)} muestras de entrenamiento")
+        X_train, y_train = X_train[idx], y_train[idx]
+
     #Definimos el random forest
     rf = RandomForestClassifier(
         n_estimators=n_estimators,
@@ -60,17 +72,189 @@ def entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=1
 
 
 
+def buscar_random_forest(X, y, param_grid=None, n_splits=5, n_jobs=-1,
+                         fichero_resultados="modelos_clasico/busqueda_rf.jsonl", random_state=111, origen=None):
+    """Busqueda de hiperparametros del Random Forest con validacion cruzada k-fold en paralelo.
+    Al terminar se reentrena la mejor configuracion con todos los datos y se guarda
+    en el mismo sitio que entrenar_random_forest().
+
+    Args:
+    -----
+        X (array): Matriz de caracteristicas
+        y (array): Vector de etiquetas de cada muestra
+        param_grid (dict): Rejilla de parametros (por defecto PARAM_GRID_DEFAULT de comun.busqueda)
+        n_splits (int): Numero de folds
+        n_jobs (int): Numero de workers en paralelo
+        fichero_resultados (str): Fichero con los resultados para poder reanudar la busqueda
+        random_state (int): Semilla para reproducibilidad
+        origen (array): Imagen de la que sale cada fila (construir_dataset con con_origen). Las copias
+                        aumentadas de una imagen van al mismo fold que ella, asi el fold de test no
+                        tiene casi copias de imagenes de entrenamiento
+
+    Returns:
+    --------
+        rf (RandomForestClassifier): Mejor modelo reentrenado, o None si la busqueda se cancela
+        le (LabelEncoder): Codificador de etiquetas, o None si la busqueda se cancela
+    """
+    from comun.busqueda import buscar_hiperparametros
+
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    resultados, completada = buscar_hiperparametros(
+        X, y_encoded, param_grid=param_grid, n_splits=n_splits, n_jobs=n_jobs,
+        fichero_resultados=fichero_resultados, random_state=random_state, origen=origen
+    )
+    if not completada or not resultados:
+        return None, None
+
+    #Reentrenamos la mejor configuracion con todos los datos
+    rf = RandomForestClassifier(
+        random_state=random_state,
+        class_weight='balanced',
+        n_jobs=-1,
+        **resultados[0]["params"],
+    )
+    rf.fit(X, y_encoded)
+
+    os.makedirs("modelos_clasico", exist_ok=True)
+    with open("modelos_clasico/random_forest_model.pkl", "wb") as f:
+        pickle.dump(rf, f)
+    with open("modelos_clasico/label_encoder.pkl", "wb") as f:
+        pickle.dump(le, f)
+
+    return rf, le
+
+
+
+
+def dataset_con_correcciones(data_dir, peso_correcciones=5):
+    """Dataset de reentrenamiento: todas las imagenes de data_dir, incluidas las correcciones
+    (corr_*.jpg) que guarda la prediccion en tiempo real. El disco es la unica fuente de las
+    correcciones: cada una entra una sola vez, con peso `peso_correcciones` en sus filas.
+
+    Args:
+    -----
+        data_dir (str): Carpeta con las imagenes preprocesadas
+        peso_correcciones (float): Peso de cada correccion frente a una muestra del dataset
+
+    Returns:
+    --------
+        X (array): Matriz de caracteristicas
+        y (array): Etiquetas
+        pesos (array): Peso de cada fila
+    """
+    from comun.intercambio_modelos import pesos_correcciones
+    from .preparar_data_modelo import construir_dataset
+
+    X, y, origen = construir_dataset(data_dir, augment=True, augment_factor=2, con_origen=True)
+    return X, y.astype(str), pesos_correcciones(origen, peso_correcciones)
+
+
+
+
+def reentrenar_con_correcciones(data_dir, n_estimators=200, random_state=111, peso_correcciones=5):
+    """Reentrena el Random Forest con el dataset de data_dir, que ya incluye las correcciones
+    guardadas por el usuario (ver dataset_con_correcciones).
+    No guarda nada en disco: lo usa el entrenador en segundo plano de la prediccion en tiempo real,
+    que escribe el modelo de forma atomica para que el bucle lo cambie sin pararse.
+
+    Args:
+    -----
+        data_dir (str): Carpeta con las imagenes preprocesadas y las correcciones
+        n_estimators (int): Numero de arboles en el Random Forest
+        random_state (int): Semilla para reproducibilidad
+        peso_correcciones (float): Peso de cada correccion frente a una muestra del dataset
+
+    Returns:
+    --------
+        rf (RandomForestClassifier): Modelo reentrenado
+        le (LabelEncoder): Codificador de etiquetas (puede incluir letras nuevas)
+    """
+    X, y, pesos = dataset_con_correcciones(data_dir, peso_correcciones)
+
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    #Dejamos un nucleo libre para que el bucle en tiempo real no pierda frames
+    rf = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=None,
+        random_state=random_state,
+        class_weight='balanced',
+        n_jobs=-2,
+    )
+    rf.fit(X, y_encoded, sample_weight=pesos)
+
+    return rf, le
+
+
+
+
+def entrenar_incremental_rf(data_dir, n_estimators=50, fraccion_repaso=0.2, random_state=111):
+    """Entrenamiento incremental: anyade al modelo guardado un bosque entrenado solo con las imagenes
+    que no estaban en su ultimo entrenamiento (letras nuevas o mas muestras) y un repaso de las
+    antiguas. Los arboles existentes no se tocan y el codificador se amplia sin renumerar.
+    Las imagenes nuevas se buscan comparando el contenido con el registro guardado junto al modelo
+    (comun.cache_dataset.registrar_muestras), no por fecha: volver a preprocesar no las hace nuevas.
+
+    Args:
+    -----
+        data_dir (str): Carpeta con las imagenes preprocesadas
+        n_estimators (int): Numero de arboles del nuevo miembro
+        fraccion_repaso (float): Fraccion de cada clase antigua que se repasa
+        random_state (int): Semilla para reproducibilidad
+
+    Returns:
+    --------
+        modelo (BosqueIncremental): Modelo ampliado, o None si no hay imagenes nuevas
+        le (LabelEncoderExtensible): Codificador ampliado, o None si no hay imagenes nuevas
+    """
+    from comun.incremental import entrenar_incremental
+    from comun.intercambio_modelos import guardar_modelo_atomico
+    from comun.seleccion_features import cargar_seleccion
+    from comun.cache_dataset import muestras_nuevas, registrar_muestras
+    from .preparar_data_modelo import construir_dataset
+
+    ruta_modelo, ruta_le = "modelos_clasico/random_forest_model.pkl", "modelos_clasico/label_encoder.pkl"
+    with open(ruta_modelo, "rb") as f:
+        modelo = pickle.load(f)
+    with open(ruta_le, "rb") as f:
+        le = pickle.load(f)
+    if cargar_seleccion(ruta_modelo, modelo) is not None:
+        raise ValueError("El modelo guardado usa una selección de características; entrena primero el modelo completo.")
+
+    nuevas, ajustes = muestras_nuevas(ruta_modelo, data_dir)
+    if not nuevas:
+        print("No hay imágenes nuevas desde el último entrenamiento.")
+        return None, None
+
+    #Nuevas y repaso salen del mismo dataset (misma augmentation que el modelo); la cache no se duplica
+    factor = ajustes["augment_factor"]
+    X, y, origen = construir_dataset(data_dir, augment=factor > 0, augment_factor=factor, con_origen=True)
+    es_nueva = np.isin(origen, nuevas)
+    modelo, le = entrenar_incremental(modelo, le, X[es_nueva], y[es_nueva], X[~es_nueva], y[~es_nueva],
+                                      n_estimators=n_estimators, fraccion_repaso=fraccion_repaso,
+                                      random_state=random_state)
+    guardar_modelo_atomico(modelo, le, ruta_modelo, ruta_le, formato="pickle")
+    registrar_muestras(ruta_modelo, data_dir, ajustes)
+    return modelo, le
+
+
+
 
-def run(output_dir):
+def run(output_dir, coreset=None):
+    from comun.cache_dataset import registrar_muestras
     from .preparar_data_modelo import construir_dataset
 
     X, y = construir_dataset(output_dir, augment=True, augment_factor=2)
-    rf_model, le = entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=111)
+    rf_model, le = entrenar_random_forest(X, y, test_size=0.2, n_estimators=200, random_state=111, coreset=coreset)
 
     #Guardar modelo y label encoder
     with open("modelos_clasico/random_forest_model.pkl", "wb") as f:
         pickle.dump(rf_model, f)
     with open("modelos_clasico/label_encoder.pkl", "wb") as f:
         pickle.dump(le, f)
+    registrar_muestras("modelos_clasico/random_forest_model.pkl", output_dir, {"augment_factor": 2})
         
     return rf_model, le
\ No newline at end of file
@@ -2,7 +2,8 @@ import os
 import cv2
 import numpy as np
 import sys
-from .utils import obtener_roi
+from comun.contexto_frame import ContextoFrame
+from comun.duplicados import IndiceHashes, hash_perceptual
 
 #Rango de color de piel por defecto (HSV)
 LOWER_SKIN_DEFAULT = np.array([0, 30, 60], dtype=np.uint8)
@@ -10,7 +11,8 @@ UPPER_SKIN_DEFAULT = np.array([20, 255, 255], dtype=np.uint8)
 
 
 
-def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin = UPPER_SKIN_DEFAULT, tamanyo_dataset=200, delay_ms=100):
+def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin = UPPER_SKIN_DEFAULT, tamanyo_dataset=200, delay_ms=100,
+                  filtrar_duplicados=False, tolerancia_hash=6, almacen=None):
     """
     Captura imagenes de un gesto de la mano para entrenamiento de un modelo.
 
@@ -26,6 +28,11 @@ def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin =
         - upper_skin(array, opcional): Determina el limite superior del rango HSV para detectar la piel.
         - tamanyo_dataset (int, opcional):Cantidad de frames a tomar por letra.
         - delay_ms (int, opcional): Tiempo de espera entre frames en milisegundos para que no sean imagenes tan similares.
+        - filtrar_duplicados (bool, opcional): Si es True, descarta los ROI cuyo hash perceptual esta a
+          `tolerancia_hash` bits o menos de alguna muestra guardada recientemente.
+        - tolerancia_hash (int, opcional): Bits distintos maximos para considerar dos ROI casi iguales.
+        - almacen (AlmacenFeatures, opcional): Si se indica, cada ROI guardado se preprocesa y se extraen
+          sus caracteristicas en segundo plano mientras sigue la captura.
 
         
     Controles del teclado durante la captura:
@@ -42,6 +49,8 @@ def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin =
     5. Se busca el contorno mas grande (la mano) y se define un ROI con margen.
     6. Se dibuja un rectangulo verde sobre la mano y se muestra el contador de frames.
     7. Se guarda el ROI en el directorio correspondiente hasta alcanzar tamanyo_dataset.
+       Si filtrar_duplicados=True, los ROI casi iguales a los ultimos guardados se descartan.
+       Con `almacen`, cada ROI guardado se envia a su pool de procesos para extraer sus caracteristicas.
     8. Se permite interrumpir la captura en cualquier momento con 'q' o 'w'.
     
     Retorna:
@@ -79,34 +88,53 @@ def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin =
             cv2.destroyAllWindows()
             return "w"
 
+    #Indice de hashes de los ultimos ROI guardados para descartar casi duplicados
+    indice = IndiceHashes(tolerancia_hash) if filtrar_duplicados else None
+    rechazadas = 0
+
     #Captura de frames hasta llegar a lo determinado
     f = 0
+    lienzo = None
     while f < tamanyo_dataset:
         ret, frame = capture.read()
         if not ret:
             break
 
         #Usamos la funcion para obtener ROI (usada durante todo el proyecto para mantener la consistencia)
-        roi, coords = obtener_roi(frame, lower_skin, upper_skin, tamanyo_resize=(128, 128))
+        #El ROI se guarda del frame limpio; el rectangulo y los contadores van en un lienzo aparte
+        ctx = ContextoFrame(frame, lower_skin, upper_skin)
+        roi, coords = ctx.roi((128, 128))
+        lienzo = ctx.lienzo(lienzo)
 
         if roi is not None:
             #Dibujar rectangulo sobre la mano
             if coords:
                 x1, y1, x2, y2 = coords
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-            #Guardar ROI
-            img_path = os.path.join(directorio, f"{f}.jpg")
-            cv2.imwrite(img_path, roi)
-            f += 1
+                cv2.rectangle(lienzo, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+            h = hash_perceptual(roi) if indice is not None else None
+            if indice is not None and indice.es_duplicado(h):
+                rechazadas += 1
+            else:
+                #Guardar ROI
+                img_path = os.path.join(directorio, f"{f}.jpg")
+                cv2.imwrite(img_path, roi)
+                if almacen is not None:
+                    almacen.enviar(img_path, letra)
+                f += 1
+                if indice is not None:
+                    indice.anyadir(h)
 
             #Mostrar contador de frames capturados
-            cv2.putText(frame, f"{f}/{tamanyo_dataset}", (10,30),
+            cv2.putText(lienzo, f"{f}/{tamanyo_dataset}", (10,30),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+            if indice is not None:
+                cv2.putText(lienzo, f"Guardadas: {f}  Rechazadas: {rechazadas}", (10,60),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
 
 
         #Mostrar camara y esperar. Posibilidad de interrumpir cuando sea tambien
-        cv2.imshow("Captura", frame)
+        cv2.imshow("Captura", lienzo)
         key = cv2.waitKey(delay_ms) & 0xFF
         if key == ord('q'):
             break
@@ -118,13 +146,15 @@ def capturar_data(data_dir, letra, lower_skin = LOWER_SKIN_DEFAULT, upper_skin =
     capture.release()
     cv2.destroyAllWindows()
     print(f"Captura de la letra '{letra}' completada.")
+    if indice is not None:
+        print(f"Muestras guardadas: {f}, descartadas por casi duplicadas: {rechazadas}")
 
 
 
 
-def capturar_por_letra(data_dir, letras):
+def capturar_por_letra(data_dir, letras, filtrar_duplicados=False, almacen=None):
     for letra in letras:
-        result = capturar_data(data_dir, letra)
+        result = capturar_data(data_dir, letra, filtrar_duplicados=filtrar_duplicados, almacen=almacen)
 
         if result == "w":  # Usuario quiere volver al menu
             print("Volviendo al menú principal...")
@@ -132,5 +162,5 @@ def capturar_por_letra(data_dir, letras):
 
 
 
-def run(data_dir, letras):
-    capturar_por_letra(data_dir, letras)
\ No newline at end of file
+def run(data_dir, letras, filtrar_duplicados=False, almacen=None):
+    capturar_por_letra(data_dir, letras, filtrar_duplicados, almacen)
\ No newline at end of file
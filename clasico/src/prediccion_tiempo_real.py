@@ -1,15 +1,82 @@
+import os
+import time
 import cv2
 import numpy as np
 from .utils import *
-from .procesar_data import preprocesar_imagen
+from .preparar_data_modelo import FEATURES_FILE
+from comun.salida_temprana import BosqueSalidaTemprana, envolver_si_es_bosque
+from comun.intercambio_modelos import (ModeloIntercambiable, EntrenadorFondo, EditorCorrecciones,
+                                       cargar_pickle, guardar_modelo_atomico)
+from comun.perfiles import obtener_perfil, abrir_camara
+from comun.seleccion_features import cargar_seleccion
+from comun.memoizacion import PrediccionMemoizada, escala_desde_cache
+from comun.contexto_frame import ContextoFrame
+from comun.sesiones import crear_grabador
+from comun.arranque import cargar_en_cache
+from comun.cache_dataset import registrar_muestras
 
 
 #Rango de color de piel por defecto (HSV)
 LOWER_SKIN_DEFAULT = np.array([0, 30, 60], dtype=np.uint8)
 UPPER_SKIN_DEFAULT = np.array([20, 255, 255], dtype=np.uint8)
 
+RUTA_MODELO = "modelos_clasico/random_forest_model.pkl"
+RUTA_LE = "modelos_clasico/label_encoder.pkl"
+RUTA_ALUMNO = "modelos_clasico/alumno.npz"  #Modelo destilado (comun.destilacion)
 
-def predecir(rf_model, le, buffer_size=5, wait_ms=50):
+
+def guardar_correccion(data_dir, etiqueta, rois):
+    #Las correcciones se guardan junto al resto de imagenes preprocesadas para futuros entrenamientos
+    directorio = os.path.join(data_dir, etiqueta)
+    os.makedirs(directorio, exist_ok=True)
+    marca = time.strftime("%Y%m%d_%H%M%S") + f"_{time.time_ns() % 10**9:09d}"  #Dos correcciones en el mismo segundo no se pisan
+    for i, roi in enumerate(rois):
+        cv2.imwrite(os.path.join(directorio, f"corr_{marca}_{i}.jpg"), roi)
+
+
+
+def guardar_reentrenado(modelo, le, data_dir):
+    #El reentrenamiento usa todo data_dir: se registran sus imagenes para el entrenamiento incremental
+    guardar_modelo_atomico(modelo, le, RUTA_MODELO, RUTA_LE, formato="pickle")
+    registrar_muestras(RUTA_MODELO, data_dir, {"augment_factor": 2})
+
+
+
+def grupos_del_modelo(modelo, ruta_modelo=RUTA_MODELO):
+    #Grupos de caracteristicas que usa el modelo (None si usa todas). La seleccion se guarda junto a cada
+    #modelo: el destilado tiene la suya (alumno_features.json), que puede no ser la del Random Forest actual
+    seleccion = cargar_seleccion(ruta_modelo, modelo)
+    return seleccion["grupos"] if seleccion is not None else None
+
+
+
+def escala_del_modelo(modelo, ruta_modelo=RUTA_MODELO):
+    #Escala de cada caracteristica que usa el modelo, para la memoizacion
+    seleccion = cargar_seleccion(ruta_modelo, modelo)
+    base = getattr(modelo, "rf", modelo)
+    return escala_desde_cache(FEATURES_FILE, getattr(base, "n_features_in_", None),
+                              seleccion["indices"] if seleccion is not None else None)
+
+
+
+def cargar_modelo_clasico():
+    #Random Forest y LabelEncoder guardados; en memoria mientras no cambien en disco
+    return cargar_en_cache(RUTA_MODELO, lambda: (cargar_pickle(RUTA_MODELO), cargar_pickle(RUTA_LE)))
+
+
+
+def calentar_clasico(modelo, le, repeticiones=2, ruta_modelo=RUTA_MODELO):
+    #Inferencias de prueba con un ROI vacio: la primera extraccion y el primer predict son mas lentos
+    features = extraer_features(np.zeros((64, 64), dtype=np.uint8), grupos_del_modelo(modelo, ruta_modelo)).reshape(1, -1)
+    for _ in range(repeticiones):
+        pred = modelo.predict(features)
+    le.inverse_transform(pred)
+
+
+
+def predecir(rf_model, le, buffer_size=5, wait_ms=50, fuente=0, mostrar=True, salida_temprana=False, delta=None,
+             en_caliente=False, data_dir="data_processed_clasico/", perfil=None, memoizar=False, tolerancia_memo=0.05,
+             grabar=None, arranque=None, ruta_modelo=RUTA_MODELO):
     """
     Realiza la prediccion de gestos en tiempo real utilizando un modelo Random Forest previamente entrenado.
     El proceso captura frames desde la camara, extrae el ROI de la mano mediante preprocesamiento, 
@@ -26,15 +93,47 @@ def predecir(rf_model, le, buffer_size=5, wait_ms=50):
                                        Por defecto es 5.
         - wait_ms (int, opcional): Tiempo de espera en milisegundos entre frames. 
                                    Controla la velocidad de visualizacion. Por defecto es 50 ms.
+        - fuente (int | str, opcional): Indice de camara, ruta de un video o de una sesion .ses grabada. Por defecto, 0.
+        - mostrar (bool, opcional): Si es False no se abre ninguna ventana ni se espera entre frames
+                                    (reproduccion de sesiones grabadas). Por defecto es True.
+        - salida_temprana (bool, opcional): Si es True, los arboles se evaluan en orden y se para en
+                                            cuanto el voto ganador ya no puede cambiar. Por defecto es False.
+        - delta (float, opcional): Con salida temprana, permite parar antes con una cota de confianza
+                                   (probabilidad de error admitida). Por defecto es None.
+        - en_caliente (bool, opcional): Si es True, el modelo se recarga solo cuando cambia en
+                                        `modelos_clasico/` y se pueden corregir letras con la tecla 'c'
+                                        (se reentrena en segundo plano sin parar). Por defecto es False.
+        - data_dir (str, opcional): Carpeta de imagenes preprocesadas donde se guardan las correcciones.
+        - perfil (str, opcional): Perfil de rendimiento de `comun.perfiles` ("baja_latencia", "equilibrado",
+                                  "preciso"). Fija la captura de la camara, `buffer_size` y `wait_ms`.
+                                  Por defecto es None (se usan los argumentos tal cual).
+        - memoizar (bool, opcional): Si es True, se reutiliza la ultima prediccion mientras las
+                                     caracteristicas no cambien mas de `tolerancia_memo` (mano quieta)
+                                     y las posturas ya vistas se sirven de una cache LRU. Por defecto es False.
+        - tolerancia_memo (float, opcional): Cambio maximo por caracteristica, en desviaciones tipicas del
+                                             dataset, para reutilizar la prediccion. Por defecto es 0.05.
+        - grabar (str | GrabadorSesion, opcional): Fichero .ses (o grabador ya configurado) donde se graba
+                                                   la sesion en segundo plano: frames, caracteristicas,
+                                                   predicciones y tiempos de cada etapa. La sesion se
+                                                   puede volver a pasar como `fuente`. Por defecto es None.
+        - arranque (Arranque, opcional): Arranque de `comun.arranque` que ya esta cargando el modelo (por
+                                         ejemplo con `cargar_modelo_clasico` y `calentar_clasico`). La
+                                         camara se abre mientras termina la carga, `rf_model` y `le` se
+                                         toman de el y se muestra el tiempo hasta la primera prediccion.
+                                         Por defecto es None.
+        - ruta_modelo (str, opcional): Fichero del modelo que se usa (RUTA_ALUMNO con el modelo destilado).
+                                       De ahi se lee su seleccion de caracteristicas. Por defecto es RUTA_MODELO.
 
     Proceso:
     --------
-    1. Inicializa la camara y verifica su disponibilidad.
+    1. Inicializa la camara y verifica su disponibilidad (en paralelo con la carga del modelo si hay `arranque`).
     2. Captura frames en tiempo real desde la camara.
     3. Para cada frame:
-        a. Preprocesa la imagen con `preprocesar_imagen()` para extraer el ROI (mano).
-        b. Si se detecta la mano, obtiene sus coordenadas mediante `obtener_roi()` y dibuja el rectangulo.
-        c. Extrae las caracteristicas del ROI con `extraer_features()`.
+        a. Preprocesa la imagen con `ContextoFrame` para extraer el ROI (mano); la mascara de piel
+           se calcula una sola vez y sirve tanto para el ROI como para sus coordenadas.
+        b. Si se detecta la mano, dibuja el rectangulo con esas coordenadas sobre una copia del frame.
+        c. Extrae las caracteristicas del ROI con `extraer_features()` (solo los grupos que usa el
+           modelo si se ha guardado una seleccion de caracteristicas).
         d. Realiza la prediccion del gesto con el modelo `rf_model`.
         e. Traduce la prediccion numerica al nombre de la clase con `LabelEncoder`.
         f. Aplica suavizado temporal utilizando un buffer circular de tamaño `buffer_size` 
@@ -42,44 +141,110 @@ def predecir(rf_model, le, buffer_size=5, wait_ms=50):
         g. Muestra la prediccion mas frecuente (mayoria en buffer) sobre el frame.
         h. Si no se detecta una mano, muestra el mensaje "Gesto no detectado".
     4. Visualiza la ventana de prediccion en tiempo real hasta que el usuario presione 'q'.
+    5. Con `en_caliente`, antes de cada frame se toma la ultima version del modelo y, al pulsar 'c',
+       escribir la letra correcta y Enter, se graban muestras que reentrenan el modelo en segundo plano.
 
     Retorna:
     --------
-        - None: La funcion no retorna valores; muestra la prediccion visualmente en una ventana 
-          y termina al cerrar la camara o presionar la tecla 'q'.
+        - historial (list[dict]): Por cada frame, la latencia en segundos (lectura + procesado, sin
+          visualizacion) y la etiqueta suavizada mostrada (None si no se detecta la mano).
+          Termina al acabarse la fuente o presionar la tecla 'q'.
     """
 
+    #Con arranque, la camara se abre mientras termina de cargarse (y calentarse) el modelo
+    ajustes = obtener_perfil(perfil)
+    cap = None
+    if arranque is not None:
+        cap = arranque.abrir(fuente, ajustes)
+        rf_model, le = arranque.modelo
+    if ruta_modelo.endswith(".npz") and en_caliente:
+        #Modelo destilado: solo NumPy. Las correcciones reentrenan el Random Forest, asi que no se recarga
+        print("Con el modelo destilado no se recarga en caliente; las correcciones se desactivan.")
+        en_caliente = False
+
+    if salida_temprana:
+        rf_model = envolver_si_es_bosque(rf_model, delta)
+
+    modelos, entrenador, editor = None, None, None
+    if en_caliente:
+        from .entrenamiento import reentrenar_con_correcciones
+
+        envolver = (lambda m: envolver_si_es_bosque(m, delta)) if salida_temprana else None
+        modelos = ModeloIntercambiable(RUTA_MODELO, RUTA_LE, cargar=cargar_pickle,
+                                       inicial=(rf_model, le), envolver=envolver)
+        entrenador = EntrenadorFondo(
+            lambda: reentrenar_con_correcciones(data_dir),
+            lambda m, codificador: guardar_reentrenado(m, codificador, data_dir),
+        )
+        editor = EditorCorrecciones()
+
+    #Ajustes del perfil de rendimiento
+    if ajustes is not None:
+        buffer_size, wait_ms = ajustes["buffer_size"], ajustes["wait_ms"]
+
     #Abrimos la camara
-    cap = cv2.VideoCapture(0)
+    if cap is None:
+        cap = abrir_camara(fuente, ajustes)
     if not cap.isOpened():
         print("No se puede abrir la cámara.")
-        return
+        if arranque is not None:
+            arranque.cerrar()
+        return []
 
     #Buffer para guardar los frmaes para suavizar predicciones
     buffer_dynamic = []
+    historial = []
+    lienzo = None
+    grupos = grupos_del_modelo(rf_model, ruta_modelo)
+    grabador = crear_grabador(grabar, {"pipeline": "clasico", "fuente": str(fuente), "perfil": perfil, "grupos": grupos})
+    memo = PrediccionMemoizada(rf_model, le, tolerancia_memo, escala=escala_del_modelo(rf_model, ruta_modelo)) if memoizar else None
 
 
     while True:
+        inicio = time.perf_counter()
         ret, frame = cap.read()
         if not ret:
             break
+        tiempos = {"lectura": time.perf_counter() - inicio}
+        pred_label_display = None
+        features, pred_num = None, None
+        if arranque is not None:
+            arranque.marcar("primer_frame")
+
+        #Ultima version del modelo (cambia sin parar el bucle si se reentrena)
+        if modelos is not None:
+            nuevo, le = modelos.actual()
+            if nuevo is not rf_model:
+                rf_model = nuevo
+                grupos = grupos_del_modelo(rf_model)
+                if memo is not None:
+                    memo.cambiar_modelo(rf_model, le, escala_del_modelo(rf_model))
 
-        #Usamos la funcion unificada para obtener ROI
-        roi = preprocesar_imagen(frame)
+        #Usamos el contexto del frame para obtener el ROI (mismo proceso que preprocesar_imagen)
+        ctx = ContextoFrame(frame, LOWER_SKIN_DEFAULT, UPPER_SKIN_DEFAULT)
+        roi = ctx.roi_preprocesado()
            
         if roi is not None:
-            # Dibujar rectángulo sobre la mano:
-            # cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-            _, coords_roi = obtener_roi(frame, LOWER_SKIN_DEFAULT, UPPER_SKIN_DEFAULT, tamanyo_resize=(64,64))
-
-            if coords_roi:
-                x1, y1, x2, y2 = coords_roi
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-
             #Extraer features y predecir letra
-            features = extraer_features(roi).reshape(1, -1)
-            pred_num = rf_model.predict(features)[0]
-            pred_label = le.inverse_transform([pred_num])[0]
+            features = extraer_features(roi, grupos).reshape(1, -1)
+            tiempos["extraccion"] = time.perf_counter() - inicio - tiempos["lectura"]
+            if memo is not None:
+                pred_num, pred_label = memo.predecir(features[0])
+            else:
+                pred_num = rf_model.predict(features)[0]
+                pred_label = le.inverse_transform([pred_num])[0]
+            tiempos["prediccion"] = time.perf_counter() - inicio - tiempos["lectura"] - tiempos["extraccion"]
+            if arranque is not None:
+                arranque.marcar("primera_prediccion")
+
+            #Muestras de la correccion en curso
+            if editor is not None:
+                #Las correcciones se guardan completas: el reentrenamiento usa todas las caracteristicas
+                completa = editor.anyadir_muestra(features[0] if grupos is None else extraer_features(roi), roi)
+                if completa is not None:
+                    etiqueta, muestras, rois = completa
+                    guardar_correccion(data_dir, etiqueta, rois)
+                    entrenador.anyadir(len(muestras))
 
             #Buffer para suavizar
             buffer_dynamic.append(pred_label)
@@ -88,22 +253,57 @@ def predecir(rf_model, le, buffer_size=5, wait_ms=50):
 
             pred_label_display = max(set(buffer_dynamic), key=buffer_dynamic.count)
 
-            cv2.putText(frame, f"Gesto: {pred_label_display}", (10,30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-            
-        else:
-            cv2.putText(frame, "Gesto no detectado", (10,30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+        historial.append({"latencia": time.perf_counter() - inicio, "etiqueta": pred_label_display})
+        if grabador is not None:
+            grabador.grabar(frame, None if features is None else features[0], pred_num, pred_label_display, tiempos)
 
+        if mostrar:
+            #Se dibuja en un lienzo aparte: el frame del contexto es de solo lectura
+            lienzo = ctx.lienzo(lienzo)
+            if roi is not None:
+                #Dibujar rectángulo sobre la mano (coordenadas del mismo ROI, sin repetir obtener_roi)
+                coords_roi = ctx.roi((64, 64))[1]
+                if coords_roi:
+                    x1, y1, x2, y2 = coords_roi
+                    cv2.rectangle(lienzo, (x1, y1), (x2, y2), (0,255,0), 2)
 
-        cv2.imshow("Predicción en tiempo real", frame)
-        if cv2.waitKey(wait_ms) & 0xFF == ord('q'):
-            break
+                cv2.putText(lienzo, f"Gesto: {pred_label_display}", (10,30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+            else:
+                cv2.putText(lienzo, "Gesto no detectado", (10,30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+
+            if editor is not None:
+                editor.dibujar(lienzo)
+            cv2.imshow("Predicción en tiempo real", lienzo)
+            key = cv2.waitKey(wait_ms) & 0xFF
+            if editor is not None and editor.procesar_tecla(key):
+                continue
+            if key == ord('q'):
+                break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if arranque is not None:
+        arranque.cerrar()
+    if mostrar:
+        cv2.destroyAllWindows()
+    if grabador is not None:
+        grabador.cerrar()
+    if modelos is not None:
+        modelos.parar()
+        if entrenador.entrenando:
+            print("Esperando a que termine el reentrenamiento en curso...")
+        entrenador.parar()
+    if isinstance(rf_model, BosqueSalidaTemprana):
+        rf_model.resumen()
+    if memo is not None:
+        memo.resumen()
+    return historial
 
 
 
-def run(rf_model, le, buffer_size=5, wait_ms=50):
-    predecir(rf_model, le, buffer_size, wait_ms)
\ No newline at end of file
+def run(rf_model, le, buffer_size=5, wait_ms=50, salida_temprana=False, en_caliente=False, data_dir="data_processed_clasico/",
+        perfil=None, memoizar=False, grabar=None, arranque=None, ruta_modelo=RUTA_MODELO):
+    predecir(rf_model, le, buffer_size, wait_ms, salida_temprana=salida_temprana,
+             en_caliente=en_caliente, data_dir=data_dir, perfil=perfil, memoizar=memoizar, grabar=grabar,
+             arranque=arranque, ruta_modelo=ruta_modelo)
\ No newline at end of file
@@ -3,6 +3,8 @@ import numpy as np
 import os
 import random
 from .utils import extraer_features
+from comun.recursos import etapa
+from comun.cache_dataset import actualizar_cache
 
 FEATURES_FILE = 'features.npz'
 
@@ -63,7 +65,38 @@ def augmentation(img):
 
 
 
-def construir_dataset(data_dir, augment=True, augment_factor=5):
+def _extraer_ficheros(data_dir, rutas, augment_factor):
+    #Extrae las caracteristicas de las imagenes indicadas (rutas relativas "letra/fichero")
+    X, y, origen = [], [], []
+
+    for ruta in rutas:
+        label = ruta.split("/")[0]
+        img = cv2.imread(os.path.join(data_dir, ruta), cv2.IMREAD_GRAYSCALE)  #Ya estan preprocesadas
+        #Si no hay imagen no hacemos nada
+        if img is None:
+            continue
+
+        feats = extraer_features(img)
+        X.append(feats)
+        y.append(label)
+        origen.append(ruta)
+
+
+        #Si se quiere aplicar augmentacion
+        for _ in range(augment_factor):
+            aug_img = augmentation(img) #Primero aplicamos augmentacion
+            aug_feats = extraer_features(aug_img) #Extraemos las caracteristicas de las imagenes augmentadas
+            X.append(aug_feats)
+            y.append(label)
+            origen.append(ruta)
+
+    #Construimos X e y para el modelo
+    return np.array(X), np.array(y), np.array(origen)
+
+
+
+@etapa("construir_dataset")
+def construir_dataset(data_dir, augment=True, augment_factor=5, con_origen=False):
     """Construye dataset con posibilidad de aplicar tecnicas de data augmentation.
     Esto sirve para preparar un dataset para entrenar un modelo.
     
@@ -72,6 +105,7 @@ def construir_dataset(data_dir, augment=True, augment_factor=5):
         - data_dir (str): Directorio principal que contiene las carpetas por clase
         - augment (bool, opcional): Si es True, aplica data augmentation a cada imagen
         - augment_factor (int, opcional): Número de imágenes sintéticas generadas por cada imagen original
+        - con_origen (bool, opcional): Devolver tambien la imagen de la que sale cada fila
 
     
     Proceso:
@@ -80,46 +114,23 @@ def construir_dataset(data_dir, augment=True, augment_factor=5):
         2. Carga cada imagen
         3. Extrae un vector de caracteristicas con extraer_features() de src
         4. Si augment=True, genera imagenes adicionales con augmentation()
-        5. Guarda el dataset completo en un archivo features.npz
+        5. Guarda el dataset completo en un archivo features.npz, con la carpeta, la augmentation y el
+           estado de cada imagen. La siguiente vez solo se procesan las imagenes nuevas o modificadas
+           (y se quitan las borradas); si cambia la carpeta o la augmentation se reconstruye entero.
 
     Returns:
     --------
         X (array): Matriz de caracteristicas 
         y (darray): Vector de etiquetas correspondientes a cada muestra
+        origen (array): Solo con con_origen, ruta relativa de la imagen de cada fila
     
 
     """
-    X, y = [], []
-    labels = os.listdir(data_dir)
-
-    for label in labels:
-        path_label = os.path.join(data_dir, label)
-        for file in os.listdir(path_label):
-            img_path = os.path.join(path_label, file)
-            img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)  #Ya estan preprocesadas
-            #Si no hay imagen no hacemos nada
-            if img is None:
-                continue
-            
-            feats = extraer_features(img)
-            X.append(feats)
-            y.append(label)
-
-
-            #Si se quiere aplicar augmentacion
-            if augment:
-                for _ in range(augment_factor):
-                    aug_img = augmentation(img) #Primero aplicamos augmentacion
-                    aug_feats = extraer_features(aug_img) #Extraemos las caracteristicas de las imagenes augmentadas
-                    X.append(aug_feats)
-                    y.append(label)
-
-    #Construimos X e y para el modelo
-    X = np.array(X)
-    y = np.array(y)
-    np.savez(FEATURES_FILE, X=X, y=y)
+    factor = augment_factor if augment else 0
+    X, y, origen = actualizar_cache(FEATURES_FILE, data_dir, {"augment_factor": factor},
+                                    lambda rutas: _extraer_ficheros(data_dir, rutas, factor))
     print(f"Dataset listo con {len(X)} muestras y guardado en {FEATURES_FILE}")
-    return X, y
+    return (X, y, origen) if con_origen else (X, y)
 
 
 def run(data_dir, augment=True, augment_factor=5):
@@ -3,6 +3,7 @@ import cv2
 import numpy as np
 
 from .utils import obtener_roi
+from comun.recursos import etapa
 
 #Rango de color de piel por defecto (HSV)
 LOWER_SKIN_DEFAULT = np.array([0, 30, 60], dtype=np.uint8)
@@ -42,7 +43,12 @@ def preprocesar_imagen(frame, lower_skin = LOWER_SKIN_DEFAULT, upper_skin = UPPE
 
     #Obtnemos el ROI
     roi, _ = obtener_roi(frame, lower_skin, upper_skin, (64, 64))
-    
+    return preprocesar_roi(roi)
+
+
+
+def preprocesar_roi(roi):
+    #Pasos 7 y 8 de preprocesar_imagen() sobre un ROI ya recortado (BGR de 64x64)
     if roi is None or roi.size == 0:
         return None
     
@@ -55,6 +61,7 @@ def preprocesar_imagen(frame, lower_skin = LOWER_SKIN_DEFAULT, upper_skin = UPPE
 
 
 
+@etapa("preprocesar_dataset")
 def preprocesar_dataset(data_dir, output_dir):
     """
     Preprocesa todas las imagenes de un dataset de gestos para extraer la mano,
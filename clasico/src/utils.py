@@ -1,11 +1,20 @@
 import cv2
 import numpy as np
 
-def obtener_roi(frame, lower_skin, upper_skin, tamanyo_resize):
+#Columnas de cada grupo de caracteristicas en el vector de extraer_features()
+GRUPOS_FEATURES = {
+    "histograma": list(range(0, 64)),
+    "geometria": list(range(64, 67)),
+    "hu": list(range(67, 74)),
+}
+
+def mascara_piel(frame, lower_skin, upper_skin, hsv=None):
     #Uso de HSV (Tono, Saturacion, Brillo) por mayor robusted a detectar colores
     #independientemente del brillo o saturacion. Utilizamos mismo proceso que en
     #get_data.py para una mayor consistencia en el entrenamiento.
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    #Si ya se tiene el frame en HSV (ContextoFrame) se reutiliza
+    if hsv is None:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
 
     #----Mascaras----#
@@ -16,7 +25,11 @@ def obtener_roi(frame, lower_skin, upper_skin, tamanyo_resize):
     mask = cv2.erode(mask, None, iterations=2) #Erosion: Eliminamos ruido eliminando pixeles blancos pequeños
     mask = cv2.dilate(mask, None, iterations=2) #Dilatacion: Agrandamos pixeles blancos restantes
     mask = cv2.GaussianBlur(mask, (7,7), 0) #Suavizamos bordes, hacemos más uniforme la máscara. Ayuda a detectar contornos
+    return mask
+
+
 
+def roi_desde_mascara(frame, mask, tamanyo_resize):
     #----Contornos----#
     contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
     
@@ -41,8 +54,14 @@ def obtener_roi(frame, lower_skin, upper_skin, tamanyo_resize):
 
 
 
+def obtener_roi(frame, lower_skin, upper_skin, tamanyo_resize):
+    mask = mascara_piel(frame, lower_skin, upper_skin)
+    return roi_desde_mascara(frame, mask, tamanyo_resize)
+
+
 
-def extraer_features(roi):
+
+def extraer_features(roi, grupos=None):
     """
     Extrae caracteristicas de una imagen de mano para usarlo en el entrenamiento de modelos de 
     reconocimiento de letras. Buscamos intensidad, forma y momentos para generar un vector de
@@ -66,6 +85,9 @@ def extraer_features(roi):
     Args:
     -----
         img (array): Imagen RGB de con la mano
+        grupos (list): Grupos de GRUPOS_FEATURES a calcular ("histograma", "geometria", "hu").
+                       Solo se calculan esos (sin geometria no se buscan contornos). Por defecto
+                       se calculan todos.
 
     Returns:
     --------
@@ -82,32 +104,42 @@ def extraer_features(roi):
     else:
             # Ya esta en gris
             gray = roi.copy()
+    if grupos is None:
+        grupos = GRUPOS_FEATURES
+    partes = []
+
     #Calculamos histograma, normalizamos y aplanamos
-    hist = cv2.calcHist([gray], [0], None, [64], [0, 256])
-    hist = cv2.normalize(hist, hist).flatten()
+    if "histograma" in grupos:
+        hist = cv2.calcHist([gray], [0], None, [64], [0, 256])
+        partes.append(cv2.normalize(hist, hist).flatten())
 
     # Máscara binaria para contornos
-    _, mask = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    #Seleccionamos el contorno mas grande y calculamos su area, perimetro y
-    #ratio del rectangulo que rodea la mano
-    if contours:
-        c = max(contours, key=cv2.contourArea)
-        area = cv2.contourArea(c)
-        perimeter = cv2.arcLength(c, True)
-        x, y, w, h = cv2.boundingRect(c)
-        aspect_ratio = float(w) / h
-    else:
-        area = perimeter = aspect_ratio = 0
+    if "geometria" in grupos or "hu" in grupos:
+        _, mask = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
+
+    if "geometria" in grupos:
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        #Seleccionamos el contorno mas grande y calculamos su area, perimetro y
+        #ratio del rectangulo que rodea la mano
+        if contours:
+            c = max(contours, key=cv2.contourArea)
+            area = cv2.contourArea(c)
+            perimeter = cv2.arcLength(c, True)
+            x, y, w, h = cv2.boundingRect(c)
+            aspect_ratio = float(w) / h
+        else:
+            area = perimeter = aspect_ratio = 0
+        partes.append([area, perimeter, aspect_ratio])
 
     #Calculamos los momentos de Hu, invariables a traslacion, escala y rotacion para que no dependa
     #de la posicion de la mano o tamaño, es decir, mayor robustez
-    moments = cv2.moments(mask)
-    hu_moments = cv2.HuMoments(moments).flatten()
+    if "hu" in grupos:
+        moments = cv2.moments(mask)
+        partes.append(cv2.HuMoments(moments).flatten())
 
     #Devolvemos todas las caracteristicas calculadas para el modelo
-    features = np.hstack([hist, [area, perimeter, aspect_ratio], hu_moments])
+    features = np.hstack(partes)
     return features
 
 
@@ -0,0 +1,368 @@
+import os
+import json
+import zlib
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .cache_dataset import estado_ficheros, guardar_cache
+
+MANIFIESTO = "manifiesto.json"
+
+
+
+#----Tareas de los procesos (a nivel de modulo para poder enviarlas al pool)----#
+
+def _features_clasico(roi, augment_factor):
+    from clasico.src.utils import extraer_features
+    from clasico.src.preparar_data_modelo import augmentation
+
+    filas = [extraer_features(roi)]
+    filas += [extraer_features(augmentation(roi)) for _ in range(augment_factor)]
+    return np.array(filas)
+
+
+
+def _tarea_clasico_raw(ruta_raw, ruta_procesada, augment_factor):
+    #Mismo proceso que procesar_data + construir_dataset para un ROI recien capturado
+    import cv2
+    from clasico.src.procesar_data import preprocesar_imagen
+
+    frame = cv2.imread(ruta_raw)
+    roi = preprocesar_imagen(frame) if frame is not None else None
+    if roi is None:
+        return None
+    os.makedirs(os.path.dirname(ruta_procesada), exist_ok=True)
+    cv2.imwrite(ruta_procesada, roi)
+    #Las features salen de la imagen guardada (con la perdida del JPEG), igual que en construir_dataset
+    return _tarea_clasico_procesada(ruta_procesada, augment_factor)
+
+
+
+def _tarea_clasico_procesada(ruta, augment_factor):
+    #Imagen ya preprocesada (de un preprocesado anterior o de una correccion)
+    import cv2
+
+    marca = os.path.getmtime(ruta)
+    img = cv2.imread(ruta, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    return ruta, marca, _features_clasico(img, augment_factor)
+
+
+
+def _calentar(pipeline):
+    #Importa en el proceso las dependencias de las tareas para que la primera muestra no espere
+    if pipeline == "clasico":
+        modulos = ("clasico.src.procesar_data", "clasico.src.preparar_data_modelo")
+    else:
+        modulos = ("pipeline_mediapipe.src.aumentacion_mp",)
+    for modulo in modulos:
+        importlib.import_module(modulo)
+
+
+
+def _tarea_mediapipe(ruta, augment_factor):
+    from pipeline_mediapipe.src.aumentacion_mp import aumentar_landmarks
+
+    marca = os.path.getmtime(ruta)
+    X = np.load(ruta)[None]
+    if augment_factor:
+        #Semilla distinta por fichero: con la misma semilla todas las muestras tendrian las mismas transformaciones
+        X, _ = aumentar_landmarks(X, np.zeros(1), factor=augment_factor, random_state=zlib.crc32(ruta.encode()))
+    return ruta, marca, X
+
+
+
+class AlmacenFeatures:
+    """
+    Almacen de caracteristicas que se llena mientras se captura: cada muestra guardada se envia a
+    un pool de procesos que la preprocesa, extrae sus caracteristicas (con augmentation) y las anyade
+    al almacen, de forma que al terminar la ultima letra la matriz de entrenamiento ya esta construida.
+
+    En disco es un directorio con trozos .npz inmutables (X, y, origen de cada fila y su marca de
+    tiempo) y un manifiesto con la lista de trozos, que se reemplaza de forma atomica despues de
+    escribir cada trozo. Leer el manifiesto y los trozos que lista da siempre una instantanea
+    consistente, tambien desde otro proceso mientras se sigue capturando.
+
+    Si una muestra se vuelve a capturar (mismo fichero), solo cuentan las filas de su version mas
+    reciente.
+
+    Args:
+    --------
+        - directorio (str): Directorio del almacen.
+        - pipeline (str): "clasico" o "mediapipe".
+        - data_dir (str): Carpeta de la captura (ROI originales o .npy de landmarks).
+        - dir_procesado (str, opcional): Solo clasico, carpeta de imagenes preprocesadas (se escriben
+          igual que con `procesar_data.run` y es la que lee `construir_dataset`).
+        - augment_factor (int, opcional): Muestras sinteticas por muestra, como en `construir_dataset`. Por defecto, 0.
+        - n_workers (int, opcional): Procesos del pool. Por defecto, uno por nucleo menos uno (la captura).
+        - tam_trozo (int, opcional): Muestras por trozo. Por defecto, 256.
+    """
+
+    def __init__(self, directorio, pipeline, data_dir, dir_procesado=None, augment_factor=0, n_workers=None,
+                 tam_trozo=256):
+        if pipeline == "clasico" and dir_procesado is None:
+            raise ValueError("El pipeline clásico necesita la carpeta de imágenes preprocesadas.")
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.pipeline = pipeline
+        self.data_dir = data_dir
+        self.dir_procesado = dir_procesado
+        self.augment_factor = augment_factor
+        self.tam_trozo = tam_trozo
+
+        self.trozos = self._leer_manifiesto()
+        self.ingeridos = self._leer_ingeridos()
+        self.errores = 0
+
+        self._cerrojo = threading.Lock()
+        self._terminado = threading.Condition(self._cerrojo)
+        self._pendientes = 0
+        self._buffer = []   #[(origen, marca, filas, etiqueta)]
+
+        #"spawn": la captura tiene hebras (camara, MediaPipe) y no se deben duplicar con fork
+        n_workers = n_workers or max(1, (os.cpu_count() or 2) - 1)
+        self._pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"))
+        for _ in range(n_workers):
+            self._pool.submit(_calentar, pipeline)
+
+
+    #----Manifiesto y trozos----#
+
+    def _leer_manifiesto(self):
+        ruta = os.path.join(self.directorio, MANIFIESTO)
+        if not os.path.exists(ruta):
+            return []
+        with open(ruta, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        if manifiesto.get("augment_factor") != self.augment_factor:
+            return []   #Filas hechas con otra augmentation: se empieza de cero (los trozos se sobrescriben)
+        return manifiesto["trozos"]
+
+
+    def _leer_ingeridos(self):
+        #Version mas reciente de cada fichero ya incluido en el almacen
+        ingeridos = {}
+        for trozo in self.trozos:
+            with np.load(os.path.join(self.directorio, trozo["fichero"])) as datos:
+                for origen, marca in zip(datos["origen"], datos["marca"]):
+                    ingeridos[str(origen)] = max(float(marca), ingeridos.get(str(origen), -1.0))
+        return ingeridos
+
+
+    def _escribir_trozo(self, elementos):
+        #Se escribe el trozo y despues el manifiesto (los dos con renombrado atomico)
+        X = np.vstack([filas for _, _, filas, _ in elementos])
+        y = np.concatenate([[etiqueta] * len(filas) for _, _, filas, etiqueta in elementos])
+        origen = np.concatenate([[o] * len(filas) for o, _, filas, _ in elementos])
+        marca = np.concatenate([[m] * len(filas) for _, m, filas, _ in elementos])
+
+        nombre = f"trozo_{len(self.trozos) + 1:06d}.npz"
+        ruta = os.path.join(self.directorio, nombre)
+        with open(ruta + ".tmp", "wb") as f:
+            np.savez(f, X=X, y=y, origen=origen, marca=marca)
+        os.replace(ruta + ".tmp", ruta)
+
+        self.trozos.append({"fichero": nombre, "filas": len(X), "muestras": len(elementos)})
+        ruta_manifiesto = os.path.join(self.directorio, MANIFIESTO)
+        with open(ruta_manifiesto + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"pipeline": self.pipeline, "augment_factor": self.augment_factor, "trozos": self.trozos},
+                      f, indent=1)
+        os.replace(ruta_manifiesto + ".tmp", ruta_manifiesto)
+
+
+    #----Envio de muestras----#
+
+    def _enviar_tarea(self, etiqueta, funcion, *args):
+        with self._cerrojo:
+            self._pendientes += 1
+        futuro = self._pool.submit(funcion, *args)
+        futuro.add_done_callback(lambda f: self._recibir(f, etiqueta))
+
+
+    def enviar(self, ruta, etiqueta):
+        """
+        Envia una muestra recien guardada por la captura. No bloquea: la extraccion se hace en el pool.
+
+        Args:
+        --------
+            - ruta (str): ROI original (clasico) o .npy de landmarks (MediaPipe) en `data_dir`.
+            - etiqueta (str): Letra de la muestra.
+        """
+        if self.pipeline == "clasico":
+            ruta_procesada = os.path.join(self.dir_procesado, etiqueta, os.path.basename(ruta))
+            self._enviar_tarea(etiqueta, _tarea_clasico_raw, ruta, ruta_procesada, self.augment_factor)
+        else:
+            self._enviar_tarea(etiqueta, _tarea_mediapipe, ruta, self.augment_factor)
+
+
+    def _recibir(self, futuro, etiqueta):
+        #Se ejecuta en una hebra del pool al terminar cada tarea
+        try:
+            resultado = futuro.result()
+        except Exception:
+            resultado = None
+            self.errores += 1
+
+        with self._cerrojo:
+            if resultado is not None:
+                origen, marca, filas = resultado
+                self._buffer.append((os.path.normpath(origen), marca, filas, etiqueta))
+                self.ingeridos[os.path.normpath(origen)] = marca
+                if len(self._buffer) >= self.tam_trozo:
+                    self._escribir_trozo(self._buffer)
+                    self._buffer = []
+            self._pendientes -= 1
+            self._terminado.notify_all()
+
+
+    def poner_al_dia(self):
+        """
+        Envia al pool las muestras que ya habia en disco y no estan en el almacen (o han cambiado),
+        para que el almacen cubra todo el dataset y no solo lo capturado en esta sesion.
+
+        Retorna:
+        --------
+            - int: Muestras enviadas.
+        """
+        enviadas = 0
+        if self.pipeline == "clasico":
+            #Imagenes ya preprocesadas (incluidas las correcciones) y ROI sin preprocesar todavia
+            for etiqueta, ruta in _ficheros(self.dir_procesado):
+                if self._pendiente_de_ingerir(ruta):
+                    self._enviar_tarea(etiqueta, _tarea_clasico_procesada, ruta, self.augment_factor)
+                    enviadas += 1
+            for etiqueta, ruta in _ficheros(self.data_dir):
+                ruta_procesada = os.path.join(self.dir_procesado, etiqueta, os.path.basename(ruta))
+                if not os.path.exists(ruta_procesada):
+                    self._enviar_tarea(etiqueta, _tarea_clasico_raw, ruta, ruta_procesada, self.augment_factor)
+                    enviadas += 1
+        else:
+            for etiqueta, ruta in _ficheros(self.data_dir, ".npy"):
+                if self._pendiente_de_ingerir(ruta):
+                    self._enviar_tarea(etiqueta, _tarea_mediapipe, ruta, self.augment_factor)
+                    enviadas += 1
+        if enviadas:
+            print(f"Almacén de características: {enviadas} muestras anteriores enviadas en segundo plano.")
+        return enviadas
+
+
+    def _pendiente_de_ingerir(self, ruta):
+        marca = self.ingeridos.get(os.path.normpath(ruta))
+        return marca is None or os.path.getmtime(ruta) > marca
+
+
+    #----Lectura----#
+
+    def instantanea(self):
+        #X e y de todo lo escrito hasta ahora (ver `leer_almacen`)
+        return leer_almacen(self.directorio)
+
+
+    def esperar(self):
+        #Espera a que terminen las tareas enviadas y escribe el ultimo trozo incompleto
+        with self._cerrojo:
+            while self._pendientes:
+                self._terminado.wait()
+            if self._buffer:
+                self._escribir_trozo(self._buffer)
+                self._buffer = []
+
+
+    def cerrar(self, ruta_features=None):
+        """
+        Termina las tareas pendientes, cierra el pool y, si se indica, guarda la matriz completa en
+        el fichero de caracteristicas del pipeline (features.npz o features_mp.npz) para que el
+        entrenamiento la use directamente. Se guarda con el formato de `comun.cache_dataset` (origen
+        de cada fila, estado de los ficheros y augmentation), asi la carga del dataset la reconoce y
+        solo extrae lo que cambie despues.
+
+        Retorna:
+        --------
+            - X, y (np.array): Dataset completo del almacen.
+        """
+        self.esperar()
+        self._pool.shutdown()
+        X, y, origen = leer_almacen(self.directorio, con_origen=True)
+        if ruta_features is not None and len(X):
+            base = self.dir_procesado if self.pipeline == "clasico" else self.data_dir
+            ficheros = estado_ficheros(base, ".npy" if self.pipeline == "mediapipe" else None)
+            origen = np.array([os.path.relpath(o, base).replace(os.sep, "/") for o in origen])
+            #Filas de muestras borradas despues de capturarlas no entran en el dataset
+            vigentes = np.array([o in ficheros for o in origen], dtype=bool)
+            X, y, origen = X[vigentes], y[vigentes], origen[vigentes]
+            guardar_cache(ruta_features, X, y, origen, base, {"augment_factor": self.augment_factor}, ficheros)
+            print(f"Dataset listo con {len(X)} muestras y guardado en {ruta_features}")
+        if self.errores:
+            print(f"{self.errores} muestras no se pudieron procesar.")
+        return X, y
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.esperar()
+        self._pool.shutdown()
+
+
+
+def _ficheros(data_dir, extension=None):
+    #(etiqueta, ruta) de cada fichero en las carpetas de clase
+    if not os.path.isdir(data_dir):
+        return
+    for etiqueta in sorted(os.listdir(data_dir)):
+        carpeta = os.path.join(data_dir, etiqueta)
+        if not os.path.isdir(carpeta):
+            continue
+        for fichero in sorted(os.listdir(carpeta)):
+            if extension is None or fichero.endswith(extension):
+                yield etiqueta, os.path.join(carpeta, fichero)
+
+
+
+def leer_almacen(directorio, con_origen=False):
+    """
+    Lee una instantanea consistente de un almacen: solo los trozos que lista el manifiesto (que se
+    reemplaza de forma atomica) y, de cada fichero capturado, solo las filas de su version mas reciente.
+    Se puede llamar desde otro proceso mientras la captura sigue escribiendo.
+
+    Retorna:
+    --------
+        - X (np.array): Matriz de caracteristicas.
+        - y (np.array): Etiquetas.
+        - origen (np.array): Solo con `con_origen`, fichero del que sale cada fila.
+    """
+    vacio = (np.empty((0, 0)), np.empty(0, dtype=str)) + ((np.empty(0, dtype=str),) if con_origen else ())
+    ruta = os.path.join(directorio, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return vacio
+    with open(ruta, "r", encoding="utf-8") as f:
+        trozos = json.load(f)["trozos"]
+
+    Xs, ys, origenes, marcas = [], [], [], []
+    for trozo in trozos:
+        with np.load(os.path.join(directorio, trozo["fichero"])) as datos:
+            Xs.append(datos["X"])
+            ys.append(datos["y"])
+            origenes.append(datos["origen"])
+            marcas.append(datos["marca"])
+    if not Xs:
+        return vacio
+
+    X, y = np.vstack(Xs), np.concatenate(ys)
+    origen, marca = np.concatenate(origenes), np.concatenate(marcas)
+
+    #Version mas reciente de cada fichero
+    ultima = {}
+    for o, m in zip(origen, marca):
+        if m > ultima.get(o, -1.0):
+            ultima[o] = m
+    vigentes = np.array([m == ultima[o] for o, m in zip(origen, marca)], dtype=bool)
+    if con_origen:
+        return X[vigentes], y[vigentes], origen[vigentes]
+    return X[vigentes], y[vigentes]
@@ -0,0 +1,189 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from .perfiles import abrir_camara, crear_hands, obtener_perfil
+
+_cache_modelos = {}     #ruta -> (marca de tiempo, modelo): el segundo arranque no vuelve a leer el disco
+_cerrojo_cache = threading.Lock()
+
+
+
+def cargar_en_cache(ruta, cargar):
+    """
+    Carga un modelo una sola vez por proceso mientras el fichero no cambie en disco.
+
+    Args:
+    --------
+        - ruta (str): Fichero del modelo (su fecha de modificacion invalida la cache).
+        - cargar (callable): Funcion sin argumentos que carga el modelo si no esta en cache.
+    """
+    marca = os.path.getmtime(ruta)
+    with _cerrojo_cache:
+        guardado = _cache_modelos.get(ruta)
+    if guardado is not None and guardado[0] == marca:
+        return guardado[1]
+    modelo = cargar()
+    with _cerrojo_cache:
+        _cache_modelos[ruta] = (marca, modelo)
+    return modelo
+
+
+
+def calentar_modelo(modelo, le, n_features=None, repeticiones=2):
+    #Inferencias de prueba con una entrada vacia: la primera llamada a predict es mucho mas lenta que las demas
+    n_features = n_features or getattr(getattr(modelo, "rf", modelo), "n_features_in_", None)
+    if n_features is None:
+        return
+    entrada = np.zeros((1, n_features))
+    for _ in range(repeticiones):
+        pred = modelo.predict(entrada)
+    le.inverse_transform(pred)
+
+
+
+class Arranque:
+    """
+    Arranque en paralelo de la prediccion en tiempo real. La carga del modelo empieza al crear el
+    objeto (en el menu se crea antes de las preguntas, asi se carga mientras se responden) y `abrir()`
+    abre la camara y crea el detector de MediaPipe mientras tanto. Antes del primer frame real se
+    hacen inferencias de prueba con el modelo y con MediaPipe para no pagar el pico de la primera
+    prediccion dentro del bucle.
+
+    Al llegar la primera prediccion se muestra cuanto ha tardado cada parte y el tiempo hasta
+    la primera prediccion, contado desde `abrir()`.
+
+    Args:
+    --------
+        - cargar_modelo (callable): Funcion sin argumentos que devuelve (modelo, label_encoder).
+        - calentar (callable, opcional): Funcion (modelo, le) con las inferencias de prueba. Por defecto,
+          `calentar_modelo` (predict sobre un vector de ceros).
+        - informe (bool, opcional): Mostrar los tiempos de arranque. Por defecto, True.
+    """
+
+    def __init__(self, cargar_modelo, calentar=calentar_modelo, informe=True):
+        self.informe = informe
+        self.tiempos = {}
+        self.cap = None
+        self.hands = None
+        self._inicio = None
+        self._marcas = {}
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="arranque")
+        self._modelo = self._pool.submit(self._cargar, cargar_modelo, calentar)
+        self._hands = None
+
+
+    def _cargar(self, cargar_modelo, calentar):
+        inicio = time.perf_counter()
+        modelo, le = cargar_modelo()
+        self.tiempos["modelo"] = time.perf_counter() - inicio
+        if calentar is not None:
+            inicio = time.perf_counter()
+            calentar(modelo, le)
+            self.tiempos["calentamiento"] = time.perf_counter() - inicio
+        return modelo, le
+
+
+    def _crear_hands(self, perfil):
+        inicio = time.perf_counter()
+        hands = crear_hands(perfil)
+        self.tiempos["mediapipe"] = time.perf_counter() - inicio
+
+        #La primera llamada a process() inicializa el grafo; con una imagen vacia no queda ninguna mano en seguimiento
+        inicio = time.perf_counter()
+        alto, ancho = (perfil["alto"], perfil["ancho"]) if perfil is not None else (480, 640)
+        escala = perfil["escala"] if perfil is not None else 1.0
+        hands.process(np.zeros((int(alto * escala), int(ancho * escala), 3), dtype=np.uint8))
+        self.tiempos["calentamiento_mediapipe"] = time.perf_counter() - inicio
+        return hands
+
+
+    def abrir(self, fuente=0, perfil=None, con_hands=False):
+        """
+        Abre la camara y, si se pide, crea el detector de MediaPipe en paralelo con la carga del
+        modelo, y espera a que todo este listo. Solo abre la primera vez que se llama.
+
+        La camara se abre en la hebra que llama (algunos backends, como AVFoundation en macOS, no
+        admiten abrirla en otra hebra) y el detector en el pool.
+
+        Args:
+        --------
+            - fuente (int | str, opcional): Indice de camara, ruta de video o sesion .ses. Por defecto, 0.
+            - perfil (str | dict, opcional): Perfil de rendimiento de `comun.perfiles`. Por defecto, None.
+            - con_hands (bool, opcional): Crear y calentar el detector de MediaPipe. Por defecto, False.
+
+        Retorna:
+        --------
+            - cap: Captura abierta (el detector queda en `hands`).
+        """
+        if self.cap is not None:
+            return self.cap
+        perfil = obtener_perfil(perfil)
+        self._inicio = time.perf_counter()
+        if con_hands:
+            self._hands = self._pool.submit(self._crear_hands, perfil)
+
+        inicio = time.perf_counter()
+        cap = abrir_camara(fuente, perfil)
+        if isinstance(fuente, int) and cap.isOpened():
+            #El primer frame de una webcam tarda mucho mas que el resto (el driver empieza a enviar)
+            cap.read()
+        self.tiempos["camara"] = time.perf_counter() - inicio
+
+        self.cap = cap
+        try:
+            if self._hands is not None:
+                self.hands = self._hands.result()
+            self._modelo.result()
+        except Exception:
+            #Si falla la carga no se deja la camara ni el detector abiertos
+            cap.release()
+            if self.hands is not None:
+                self.hands.close()
+            self._pool.shutdown(wait=False)
+            raise
+        self.tiempos["listo"] = time.perf_counter() - self._inicio
+        self._pool.shutdown(wait=False)
+        return cap
+
+
+    @property
+    def modelo(self):
+        #(modelo, label_encoder); espera a que termine la carga. Relanza el error si la carga fallo
+        return self._modelo.result()
+
+
+    def marcar(self, evento):
+        #Registra la primera vez que pasa un evento del bucle ("primer_frame", "primera_prediccion")
+        if self._inicio is None or evento in self._marcas:
+            return
+        self._marcas[evento] = time.perf_counter() - self._inicio
+        if evento == "primera_prediccion" and self.informe:
+            self.resumen()
+
+
+    def resumen(self):
+        partes = []
+        for nombre, clave, calentamiento in (("cámara", "camara", None),
+                                             ("MediaPipe", "mediapipe", "calentamiento_mediapipe"),
+                                             ("modelo", "modelo", "calentamiento")):
+            if clave in self.tiempos:
+                parte = f"{nombre} {self.tiempos[clave]:.2f}s"
+                if calentamiento in self.tiempos:
+                    parte += f" (+{self.tiempos[calentamiento]:.2f}s calentando)"
+                partes.append(parte)
+        linea = "Arranque: " + " | ".join(partes) + f" -> listo en {self.tiempos.get('listo', 0):.2f}s"
+        if "primer_frame" in self._marcas:
+            linea += f", primer frame a {self._marcas['primer_frame']:.2f}s"
+        if "primera_prediccion" in self._marcas:
+            linea += f", primera predicción a {self._marcas['primera_prediccion']:.2f}s"
+        print(linea)
+
+
+    def cerrar(self):
+        #Sin `abrir()` (se sale antes del bucle) no queda nada abierto salvo la carga en curso
+        self._pool.shutdown(wait=False)
+        if self.informe and self._inicio is not None and "primera_prediccion" not in self._marcas:
+            self.resumen()
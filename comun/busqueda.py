@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+import functools
+import shutil
+import tempfile
+import numpy as np
+import joblib
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, StratifiedGroupKFold
+from sklearn.metrics import accuracy_score
+
+#Rejilla por defecto para la busqueda de hiperparametros del Random Forest
+PARAM_GRID_DEFAULT = {
+    "n_estimators": [100, 200, 400],
+    "max_depth": [None, 20, 40],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", 0.5],
+}
+
+
+def _huella_dataset(X, y, origen=None):
+    #Forma y hash del contenido: un resultado solo se reutiliza si se obtuvo con los mismos datos (y los mismos folds)
+    y = np.asarray(y)
+    md5 = hashlib.md5(np.ascontiguousarray(X))
+    md5.update(np.ascontiguousarray(y.astype(str) if y.dtype == object else y))
+    if origen is not None:
+        md5.update("\n".join(map(str, origen)).encode("utf-8"))
+    return f"{X.shape[0]}x{X.shape[1]}:{md5.hexdigest()}"
+
+
+
+def _ajustes_aumentar(aumentar):
+    #Funcion y argumentos efectivos (incluidos los valores por defecto) de la augmentation de los folds.
+    #Cambiar el factor, otro ajuste o la funcion hace que las configuraciones se vuelvan a evaluar
+    if aumentar is None:
+        return None
+    funcion, args, kwargs = aumentar, (), {}
+    while isinstance(funcion, functools.partial):
+        funcion, args, kwargs = funcion.func, funcion.args + args, {**funcion.keywords, **kwargs}
+    ajustes = {}
+    try:
+        parametros = inspect.signature(funcion).parameters.values()
+        ajustes = {p.name: p.default for p in parametros if p.default is not inspect.Parameter.empty}
+    except (TypeError, ValueError):
+        pass
+    ajustes.update(kwargs)
+    nombre = f"{getattr(funcion, '__module__', '')}.{getattr(funcion, '__qualname__', repr(funcion))}"
+    return json.loads(json.dumps({"funcion": nombre, "args": list(args), "ajustes": ajustes}, default=repr))
+
+
+
+def _clave_config(params, huella=None, aumentar=None):
+    #Clave estable para identificar una configuracion (el dataset y la augmentation con los que se evaluo) en el fichero de resultados
+    return json.dumps({"params": params, "dataset": huella, "aumentar": aumentar}, sort_keys=True)
+
+
+
+def _cargar_resultados(fichero_resultados):
+    #Leemos las configuraciones ya evaluadas (una linea JSON por configuracion)
+    resultados = {}
+    if fichero_resultados is None or not os.path.exists(fichero_resultados):
+        return resultados
+
+    with open(fichero_resultados, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                continue #Linea a medio escribir si se interrumpio el proceso
+            #Las lineas sin huella (versiones anteriores) no se reutilizan
+            resultados[_clave_config(registro["params"], registro.get("dataset"), registro.get("aumentar"))] = registro
+    return resultados
+
+
+
+def _evaluar_config(X, y, params, n_splits, random_state, aumentar=None, origen=None):
+    #Cada worker recibe X como memmap: solo viaja la ruta del fichero, no los datos.
+    #La augmentation se aplica dentro de cada fold, solo al entrenamiento: el fold de test son muestras reales.
+    #Con `origen`, las filas que salen de la misma muestra (original y copias aumentadas) caen en el mismo fold
+    if origen is None:
+        folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X, y)
+    else:
+        folds = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X, y, origen)
+    inicio = time.perf_counter()
+    scores = []
+
+    for train_idx, test_idx in folds:
+        rf = RandomForestClassifier(
+            random_state=random_state,
+            class_weight="balanced",
+            n_jobs=1, #El paralelismo lo ponen los workers de la busqueda
+            **params,
+        )
+        X_train, y_train = X[train_idx], y[train_idx]
+        if aumentar is not None:
+            X_train, y_train = aumentar(X_train, y_train)
+        rf.fit(X_train, y_train)
+        scores.append(accuracy_score(y[test_idx], rf.predict(X[test_idx])))
+
+    return {
+        "params": params,
+        "accuracy_media": float(np.mean(scores)),
+        "accuracy_std": float(np.std(scores)),
+        "scores": [float(s) for s in scores],
+        "tiempo_s": time.perf_counter() - inicio,
+    }
+
+
+
+def buscar_hiperparametros(X, y, param_grid=None, n_splits=5, n_jobs=-1,
+                           fichero_resultados=None, random_state=111, aumentar=None, origen=None):
+    """
+    Busqueda de hiperparametros de un Random Forest con validacion cruzada k-fold,
+    repartiendo las configuraciones entre workers de joblib.
+
+    La matriz de caracteristicas se vuelca una sola vez a disco y se abre como memmap,
+    de forma que todos los workers comparten la misma copia de X en lugar de recibirla
+    serializada. Cada configuracion terminada se anyade al fichero de resultados, por lo
+    que la busqueda se puede cancelar con Ctrl+C y reanudar despues con el mismo fichero.
+    Cada resultado guarda la huella del dataset (forma y hash de X e y) y los ajustes de la
+    augmentation: si han cambiado, las configuraciones se vuelven a evaluar en lugar de
+    reutilizar las anteriores.
+
+    Args:
+    --------
+        - X (np.array): Matriz de caracteristicas.
+        - y (np.array): Etiquetas ya codificadas como enteros.
+        - param_grid (dict, opcional): Rejilla de parametros. Por defecto, PARAM_GRID_DEFAULT.
+        - n_splits (int, opcional): Numero de folds de la validacion cruzada. Por defecto, 5.
+        - n_jobs (int, opcional): Numero de workers de joblib. Por defecto, -1 (todos los nucleos).
+        - fichero_resultados (str, opcional): Fichero JSONL donde se guardan y se leen los
+          resultados para poder reanudar. Si es None no se guarda nada.
+        - random_state (int, opcional): Semilla para los folds y los modelos.
+        - aumentar (callable, opcional): Funcion (X, y) -> (X, y) con data augmentation, aplicada solo a
+          los folds de entrenamiento (tiene que poder enviarse a los workers, p. ej. un functools.partial).
+        - origen (np.array, opcional): Muestra de la que sale cada fila (`con_origen` de la cache). Si el
+          dataset ya trae copias aumentadas, los folds se hacen por muestra para que ninguna copia de una
+          muestra de entrenamiento acabe en el fold de test. Por defecto, folds por filas.
+
+    Proceso:
+    --------
+    1. Lee las configuraciones ya evaluadas con este mismo dataset del fichero de resultados.
+    2. Guarda X en un memmap temporal compartido por todos los workers.
+    3. Evalua en paralelo las configuraciones pendientes, mostrando el tiempo de cada una
+       y guardandolas en el fichero a medida que terminan.
+    4. Si el usuario pulsa Ctrl+C se detiene la busqueda conservando lo ya evaluado.
+
+    Retorna:
+    --------
+        - resultados (list[dict]): Configuraciones evaluadas ordenadas de mejor a peor accuracy.
+        - completada (bool): False si la busqueda se ha cancelado antes de terminar.
+    """
+    if param_grid is None:
+        param_grid = PARAM_GRID_DEFAULT
+
+    configs = list(ParameterGrid(param_grid))
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    huella = _huella_dataset(X, y, origen)
+    ajustes_aumentar = _ajustes_aumentar(aumentar)
+    resultados = _cargar_resultados(fichero_resultados)
+    pendientes = [p for p in configs if _clave_config(p, huella, ajustes_aumentar) not in resultados]
+
+    if len(pendientes) < len(configs):
+        print(f"Reanudando búsqueda: {len(configs) - len(pendientes)}/{len(configs)} configuraciones ya evaluadas.")
+
+    completada = True
+    if pendientes:
+        if fichero_resultados is not None:
+            carpeta_resultados = os.path.dirname(fichero_resultados)
+            if carpeta_resultados:
+                os.makedirs(carpeta_resultados, exist_ok=True)
+
+        #Copia unica de X en disco, abierta en modo lectura por todos los workers
+        carpeta_tmp = tempfile.mkdtemp(prefix="busqueda_rf_")
+        ruta_memmap = os.path.join(carpeta_tmp, "X.mmap")
+        joblib.dump(X, ruta_memmap)
+        X_mm = joblib.load(ruta_memmap, mmap_mode="r")
+
+        hechas = len(configs) - len(pendientes)
+        try:
+            tareas = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+                delayed(_evaluar_config)(X_mm, y, params, n_splits, random_state, aumentar, origen)
+                for params in pendientes
+            )
+            for registro in tareas:
+                hechas += 1
+                registro["dataset"] = huella
+                registro["aumentar"] = ajustes_aumentar
+                resultados[_clave_config(registro["params"], huella, ajustes_aumentar)] = registro
+                print(f"[{hechas}/{len(configs)}] {registro['params']} -> "
+                      f"{registro['accuracy_media']*100:.2f}% (+-{registro['accuracy_std']*100:.2f}) "
+                      f"en {registro['tiempo_s']:.1f}s")
+
+                if fichero_resultados is not None:
+                    with open(fichero_resultados, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(registro) + "\n")
+
+        except KeyboardInterrupt:
+            completada = False
+            print("\nBúsqueda cancelada. Se puede reanudar con el mismo fichero de resultados.")
+
+        finally:
+            del X_mm
+            shutil.rmtree(carpeta_tmp, ignore_errors=True)
+
+    #Solo devolvemos configuraciones de la rejilla actual
+    claves = {_clave_config(p, huella, ajustes_aumentar) for p in configs}
+    ordenados = sorted((r for k, r in resultados.items() if k in claves),
+                       key=lambda r: r["accuracy_media"], reverse=True)
+
+    if ordenados:
+        mejor = ordenados[0]
+        print(f"Mejor configuración: {mejor['params']} -> {mejor['accuracy_media']*100:.2f}% "
+              f"(+-{mejor['accuracy_std']*100:.2f})")
+
+    return ordenados, completada
@@ -0,0 +1,218 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def estado_ficheros(data_dir, extension=None):
+    """
+    Estado de cada muestra de las carpetas de clase: ruta relativa ("letra/fichero") -> [tamanyo, fecha en ns].
+    Sirve para saber que ficheros se han anyadido, borrado o modificado desde que se guardo una cache.
+
+    Args:
+    --------
+        - data_dir (str): Directorio raiz con una carpeta por letra.
+        - extension (str, opcional): Solo los ficheros con esta extension. Por defecto, todos.
+    """
+    estado = {}
+    if not os.path.isdir(data_dir):
+        return estado
+    for etiqueta in sorted(os.listdir(data_dir)):
+        carpeta = os.path.join(data_dir, etiqueta)
+        if not os.path.isdir(carpeta):
+            continue
+        for fichero in sorted(os.listdir(carpeta)):
+            if extension is None or fichero.endswith(extension):
+                info = os.stat(os.path.join(carpeta, fichero))
+                estado[f"{etiqueta}/{fichero}"] = [info.st_size, info.st_mtime_ns]
+    return estado
+
+
+
+def leer_cache(ruta, data_dir=None, ajustes=None):
+    """
+    Lee una cache guardada con `guardar_cache`. Si se pasan `data_dir` o `ajustes` y no coinciden con
+    los de la cache (otra carpeta de datos, otra augmentation), se trata como si no existiera.
+
+    Retorna:
+    --------
+        - (X, y, origen, meta) o None si no hay cache compatible. `origen` es la ruta relativa de la
+          muestra de la que sale cada fila y `meta["ficheros"]` el estado de los ficheros procesados.
+    """
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta) as datos:
+        if "meta" not in datos:
+            return None   #Cache de una version anterior, sin origen de las filas
+        meta = json.loads(str(datos["meta"]))
+        if data_dir is not None and meta["data_dir"] != os.path.abspath(data_dir):
+            return None
+        if ajustes is not None and meta["ajustes"] != ajustes:
+            return None
+        return datos["X"], datos["y"], datos["origen"], meta
+
+
+
+def guardar_cache(ruta, X, y, origen, data_dir, ajustes, ficheros):
+    #Escritura atomica: un entrenamiento que lea la cache a la vez nunca ve un fichero a medias
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    meta = {"data_dir": os.path.abspath(data_dir), "ajustes": ajustes, "ficheros": ficheros}
+    with open(ruta + ".tmp", "wb") as f:
+        np.savez(f, X=X, y=y, origen=np.asarray(origen, dtype=str), meta=np.array(json.dumps(meta)))
+    os.replace(ruta + ".tmp", ruta)
+
+
+
+def actualizar_cache(ruta, data_dir, ajustes, extraer, extension=None):
+    """
+    Devuelve el dataset de `data_dir` usando la cache en `ruta` y la pone al dia: se conservan las
+    filas de los ficheros que no han cambiado, se extraen solo los nuevos o modificados y se quitan
+    las de los borrados. Un fichero modificado sustituye a sus filas anteriores, nunca se duplica.
+    Si la cache es de otra carpeta o de otros ajustes, se reconstruye entera.
+
+    Args:
+    --------
+        - ruta (str): Fichero .npz de la cache.
+        - data_dir (str): Directorio raiz con una carpeta por letra.
+        - ajustes (dict): Ajustes con los que se construyen las filas (augmentation...). Se guardan en la cache.
+        - extraer (callable): Funcion (lista de rutas relativas) -> (X, y, origen) con las filas de esos ficheros.
+        - extension (str, opcional): Solo los ficheros con esta extension.
+
+    Retorna:
+    --------
+        - X (np.array), y (np.array), origen (np.array): Filas de todos los ficheros actuales.
+    """
+    estado = estado_ficheros(data_dir, extension)
+    previa = leer_cache(ruta, data_dir, ajustes)
+    if previa is not None:
+        X, y, origen, meta = previa
+        anteriores = meta["ficheros"]
+    else:
+        X, y, origen, anteriores = None, None, np.array([], dtype=str), {}
+
+    iguales = {r for r, e in estado.items() if anteriores.get(r) == e}
+    pendientes = [r for r in estado if r not in iguales]
+    if previa is not None and not pendientes and len(iguales) == len(anteriores):
+        return X, y, origen
+
+    conservar = np.array([o in iguales for o in origen], dtype=bool)
+    partes_X, partes_y, partes_o = [], [], []
+    if conservar.any():
+        partes_X.append(X[conservar])
+        partes_y.append(y[conservar])
+        partes_o.append(origen[conservar])
+    if pendientes:
+        X_nuevo, y_nuevo, o_nuevo = extraer(pendientes)
+        if len(X_nuevo):
+            partes_X.append(X_nuevo)
+            partes_y.append(np.asarray(y_nuevo))
+            partes_o.append(np.asarray(o_nuevo, dtype=str))
+
+    if partes_X:
+        X, y, origen = np.vstack(partes_X), np.concatenate(partes_y), np.concatenate(partes_o)
+    else:
+        X, y, origen = np.empty((0, 0)), np.array([], dtype=str), np.array([], dtype=str)
+    guardar_cache(ruta, X, y, origen, data_dir, ajustes, estado)
+    borrados = len(set(anteriores) - set(estado))
+    print(f"Cache {ruta} actualizada: {len(pendientes)} ficheros nuevos o modificados, {borrados} borrados")
+    return X, y, origen
+
+
+
+#----Registro de las muestras con las que se entreno un modelo----#
+
+
+
+def ruta_muestras(ruta_modelo):
+    #El registro se guarda junto al modelo, como la seleccion de caracteristicas
+    return os.path.splitext(ruta_modelo)[0] + "_muestras.json"
+
+
+
+def huellas_ficheros(data_dir, extension=None):
+    #Ruta relativa -> md5 del contenido. No depende de la fecha: reescribir un fichero igual no lo hace nuevo
+    huellas = {}
+    for relativa in estado_ficheros(data_dir, extension):
+        with open(os.path.join(data_dir, relativa), "rb") as f:
+            huellas[relativa] = hashlib.md5(f.read()).hexdigest()
+    return huellas
+
+
+
+def registrar_muestras(ruta_modelo, data_dir, ajustes, extension=None):
+    """
+    Guarda junto al modelo la huella de cada muestra de `data_dir` y los ajustes (augmentation) con los
+    que se ha entrenado. Se llama cada vez que se guarda un modelo entrenado con todo `data_dir`; el
+    entrenamiento incremental lo usa para saber que muestras no ha visto todavia el modelo.
+
+    Args:
+    --------
+        - ruta_modelo (str): Ruta del .pkl del modelo.
+        - data_dir (str): Directorio raiz con una carpeta por letra.
+        - ajustes (dict): Ajustes del dataset con el que se entreno (por ejemplo {"augment_factor": 2}).
+        - extension (str, opcional): Solo los ficheros con esta extension.
+    """
+    registro = {"data_dir": os.path.abspath(data_dir), "ajustes": ajustes,
+                "muestras": huellas_ficheros(data_dir, extension)}
+    ruta = ruta_muestras(ruta_modelo)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(registro, f)
+    os.replace(ruta + ".tmp", ruta)
+
+
+
+def muestras_nuevas(ruta_modelo, data_dir, extension=None):
+    """
+    Muestras de `data_dir` que no estaban (o eran distintas) cuando se entreno el modelo, segun el
+    registro de `registrar_muestras`.
+
+    Retorna:
+    --------
+        - nuevas (list): Rutas relativas ("letra/fichero") de las muestras nuevas o modificadas.
+        - ajustes (dict): Ajustes con los que se entreno el modelo (el repaso y lo nuevo se construyen igual).
+    """
+    ruta = ruta_muestras(ruta_modelo)
+    if not os.path.exists(ruta):
+        raise ValueError("El modelo no tiene registro de sus muestras; entrena primero el modelo completo.")
+    with open(ruta, "r", encoding="utf-8") as f:
+        registro = json.load(f)
+    if registro["data_dir"] != os.path.abspath(data_dir):
+        raise ValueError(f"El modelo se entrenó con otra carpeta ({registro['data_dir']}).")
+
+    vistas = registro["muestras"]
+    nuevas = [r for r, huella in huellas_ficheros(data_dir, extension).items() if vistas.get(r) != huella]
+    return nuevas, registro["ajustes"]
+
+
+
+#----Separacion train/test por muestra----#
+
+
+
+def separar_train_test(y, origen=None, test_size=0.2, random_state=111):
+    """
+    Indices de un split train/test estratificado. Con `origen` se separa por muestra: una muestra y
+    todas sus copias aumentadas caen en la misma parte, asi el test no tiene casi copias de muestras
+    de entrenamiento (con un split por filas la accuracy sale inflada).
+
+    Args:
+    --------
+        - y (np.array): Etiquetas de cada fila.
+        - origen (np.array, opcional): Muestra de la que sale cada fila (`con_origen` de la cache). Por defecto, split por filas.
+        - test_size (float, opcional): Proporcion reservada para test (aproximada si se separa por muestra). Por defecto, 0.2.
+        - random_state (int, opcional): Semilla del split. Por defecto, 111.
+
+    Retorna:
+    --------
+        - idx_train (np.array), idx_test (np.array): Indices de las filas de cada parte.
+    """
+    from sklearn.model_selection import train_test_split, StratifiedGroupKFold
+
+    indices = np.arange(len(y))
+    if origen is None:
+        idx_train, idx_test = train_test_split(indices, test_size=test_size, random_state=random_state, stratify=y)
+        return idx_train, idx_test
+    folds = StratifiedGroupKFold(n_splits=max(2, int(round(1 / test_size))), shuffle=True, random_state=random_state)
+    return next(folds.split(indices, y, origen))
@@ -0,0 +1,160 @@
+import time
+import numpy as np
+import cv2
+
+from .servidor_inferencia import cargar_modelo, MODELOS
+from .seleccion_features import cargar_seleccion
+from .contexto_frame import ContextoFrame
+from .perfiles import abrir_camara
+
+
+class PredictorCascada:
+    """
+    Predictor en cascada: primero el pipeline clasico (ROI por color + features + RF), que es
+    barato, y solo si su prediccion es dudosa se escala al pipeline de MediaPipe.
+
+    Se escala cuando no se encuentra el ROI o cuando el margen entre las dos clases mas probables
+    de `predict_proba` del modelo clasico es menor que `umbral_margen`.
+
+    Args:
+    --------
+        - modelo_clasico, le_clasico: Modelo y codificador del pipeline clasico.
+        - modelo_mp, le_mp: Modelo y codificador del pipeline de MediaPipe.
+        - hands: Instancia de MediaPipe Hands usada al escalar.
+        - umbral_margen (float, opcional): Margen minimo para aceptar la prediccion clasica. Por defecto, 0.3.
+    """
+
+    def __init__(self, modelo_clasico, le_clasico, modelo_mp, le_mp, hands, umbral_margen=0.3):
+        self.modelo_clasico = modelo_clasico
+        self.le_clasico = le_clasico
+        self.modelo_mp = modelo_mp
+        self.le_mp = le_mp
+        self.hands = hands
+        self.umbral_margen = umbral_margen
+        self.frames = 0
+        self.escalados = 0
+        self.tiempo_clasico = 0.0
+        self.tiempo_mp = 0.0
+
+        #Caracteristicas que usa cada modelo si se ha guardado una seleccion
+        sel_clasico = cargar_seleccion(MODELOS["clasico"][0], modelo_clasico)
+        sel_mp = cargar_seleccion(MODELOS["mediapipe"][0], modelo_mp)
+        self.grupos_clasico = sel_clasico["grupos"] if sel_clasico else None
+        self.puntos_mp = sel_mp["grupos"] if sel_mp else None
+
+
+    def predecir(self, frame):
+        #Devuelve (etiqueta o None, "clasico" | "mediapipe") para un frame BGR o un ContextoFrame
+        from clasico.src.utils import extraer_features
+
+        ctx = frame if isinstance(frame, ContextoFrame) else ContextoFrame(frame)
+        self.frames += 1
+        inicio = time.perf_counter()
+        etiqueta_clasica = None
+        roi = ctx.roi_preprocesado()
+
+        if roi is not None:
+            probas = self.modelo_clasico.predict_proba(extraer_features(roi, self.grupos_clasico).reshape(1, -1))[0]
+            orden = np.argsort(probas)[::-1]
+            margen = probas[orden[0]] - (probas[orden[1]] if len(orden) > 1 else 0.0)
+            etiqueta_clasica = self.le_clasico.inverse_transform([self.modelo_clasico.classes_[orden[0]]])[0]
+            if margen >= self.umbral_margen:
+                self.tiempo_clasico += time.perf_counter() - inicio
+                return etiqueta_clasica, "clasico"
+        self.tiempo_clasico += time.perf_counter() - inicio
+
+        #Prediccion dudosa o sin ROI: escalamos a MediaPipe
+        self.escalados += 1
+        inicio = time.perf_counter()
+        landmarks = ctx.landmarks(self.hands, self.puntos_mp)
+        if landmarks is None:
+            #Si MediaPipe tampoco ve la mano nos quedamos con la prediccion clasica (si la hay)
+            self.tiempo_mp += time.perf_counter() - inicio
+            return etiqueta_clasica, "clasico"
+
+        pred = self.modelo_mp.predict([landmarks])[0]
+        self.tiempo_mp += time.perf_counter() - inicio
+        return self.le_mp.inverse_transform([pred])[0], "mediapipe"
+
+
+    def fraccion_escalada(self):
+        return self.escalados / self.frames if self.frames else 0.0
+
+
+    def resumen(self):
+        print(f"Frames: {self.frames} | Escalados a MediaPipe: {self.escalados} "
+              f"({self.fraccion_escalada()*100:.1f}%)")
+        if self.frames:
+            print(f"Tiempo medio por frame: clásico {self.tiempo_clasico / self.frames * 1000:.2f} ms, "
+                  f"MediaPipe {self.tiempo_mp / self.frames * 1000:.2f} ms")
+
+
+
+def prediccion_cascada(umbral_margen=0.3, buffer_size=5, fuente=0, mostrar=True):
+    """
+    Prediccion en tiempo real con la cascada clasico -> MediaPipe.
+
+    Args:
+    --------
+        - umbral_margen (float, opcional): Margen de `predict_proba` por debajo del cual se escala.
+        - buffer_size (int, opcional): Predicciones recientes usadas para suavizar. Por defecto, 5.
+        - fuente (int | str, opcional): Indice de camara, ruta de video o sesion .ses. Por defecto, 0.
+        - mostrar (bool, opcional): Si es False no se abre ninguna ventana. Por defecto, True.
+
+    Retorna:
+    --------
+        - historial (list[dict]): Latencia, etiqueta suavizada y ruta usada en cada frame.
+    """
+    import mediapipe as mp
+
+    modelo_clasico, le_clasico = cargar_modelo("clasico")
+    modelo_mp, le_mp = cargar_modelo("mediapipe")
+
+    cap = abrir_camara(fuente)
+    if not cap.isOpened():
+        print("No se puede abrir la cámara.")
+        return []
+
+    buffer_preds = []
+    historial = []
+    lienzo = None
+
+    with mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
+        cascada = PredictorCascada(modelo_clasico, le_clasico, modelo_mp, le_mp, hands, umbral_margen)
+
+        while True:
+            inicio = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            ctx = ContextoFrame(frame)
+            etiqueta, ruta = cascada.predecir(ctx)
+            letra = None
+            if etiqueta is not None:
+                buffer_preds.append(etiqueta)
+                if len(buffer_preds) > buffer_size:
+                    buffer_preds.pop(0)
+                letra = max(set(buffer_preds), key=buffer_preds.count)
+
+            historial.append({"latencia": time.perf_counter() - inicio, "etiqueta": letra, "ruta": ruta})
+
+            if mostrar:
+                lienzo = ctx.lienzo(lienzo)
+                if letra is not None:
+                    cv2.putText(lienzo, f"Gesto: {letra} ({ruta})", (10,30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
+                else:
+                    cv2.putText(lienzo, "Gesto no detectado", (10,30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+                cv2.putText(lienzo, f"Escalado: {cascada.fraccion_escalada()*100:.0f}%", (10,65),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,0), 2)
+                cv2.imshow("Predicción en cascada", lienzo)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+    cap.release()
+    if mostrar:
+        cv2.destroyAllWindows()
+    cascada.resumen()
+    return historial
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+from clasico.src.utils import mascara_piel, roi_desde_mascara
+from clasico.src.procesar_data import LOWER_SKIN_DEFAULT, UPPER_SKIN_DEFAULT, preprocesar_roi
+
+
+class ContextoFrame:
+    """
+    Vistas derivadas de un frame que se calculan la primera vez que alguien las pide y se
+    reutilizan en el resto del frame (RGB, HSV, gris, mascara de piel, ROI, landmarks), para que
+    los distintos consumidores no repitan conversiones de color ni detecciones.
+
+    El frame original queda sellado (solo lectura): lo que se dibuja para mostrar en pantalla va
+    en `lienzo()`, un buffer aparte que se puede reutilizar entre frames, asi la inferencia nunca
+    lee un frame con anotaciones.
+
+    Args:
+    --------
+        - frame (np.array): Frame BGR tal como sale de la camara o del video.
+        - lower_skin, upper_skin (np.array, opcional): Rango HSV de la piel. Por defecto, el del pipeline clasico.
+    """
+
+    def __init__(self, frame, lower_skin=LOWER_SKIN_DEFAULT, upper_skin=UPPER_SKIN_DEFAULT):
+        frame.flags.writeable = False
+        self.frame = frame
+        self.lower_skin = lower_skin
+        self.upper_skin = upper_skin
+        self._cache = {}
+
+
+    def _memo(self, clave, calcular):
+        if clave not in self._cache:
+            self._cache[clave] = calcular()
+        return self._cache[clave]
+
+
+    #----Conversiones de color----#
+
+    @property
+    def hsv(self):
+        return self._memo("hsv", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+
+
+    @property
+    def gray(self):
+        return self._memo("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+
+    def rgb(self, escala=1.0):
+        #Entrada de MediaPipe. Con escala < 1 se reduce antes de convertir (menos pixeles que convertir)
+        def calcular():
+            frame = self.frame
+            if escala < 1.0:
+                frame = cv2.resize(frame, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            rgb.flags.writeable = False   #MediaPipe la recibe por referencia sin copiarla
+            return rgb
+        return self._memo(("rgb", escala), calcular)
+
+
+    #----Pipeline clasico----#
+
+    @property
+    def mascara(self):
+        return self._memo("mascara", lambda: mascara_piel(self.frame, self.lower_skin, self.upper_skin, hsv=self.hsv))
+
+
+    def roi(self, tamanyo=(64, 64)):
+        """
+        Retorna:
+        --------
+            - (roi, coords): Igual que `obtener_roi()`, reutilizando la mascara del frame.
+        """
+        return self._memo(("roi", tamanyo), lambda: roi_desde_mascara(self.frame, self.mascara, tamanyo))
+
+
+    def roi_preprocesado(self):
+        #Lo mismo que preprocesar_imagen(frame): ROI 64x64 en gris ecualizado (None si no hay mano)
+        return self._memo("roi_preprocesado", lambda: preprocesar_roi(self.roi((64, 64))[0]))
+
+
+    #----Pipeline de MediaPipe----#
+
+    def resultados_mp(self, hands, escala=1.0):
+        #Salida de hands.process(); cada detector se ejecuta como mucho una vez por frame
+        return self._memo(("mp", id(hands), escala), lambda: hands.process(self.rgb(escala)))
+
+
+    def landmarks(self, hands, puntos=None, escala=1.0):
+        #Mismo vector que extraer_landmarks(frame, hands, puntos), sin repetir la deteccion
+        from pipeline_mediapipe.src.extraccion_caracteristicas_mp import landmarks_desde_resultados
+        return landmarks_desde_resultados(self.resultados_mp(hands, escala), puntos)
+
+
+    #----Visualizacion----#
+
+    def lienzo(self, buffer=None):
+        """
+        Copia del frame para dibujar encima. Solo se crea si se pide (sin ventana no se copia nada)
+        y, si se pasa el buffer del frame anterior con la misma forma, se escribe en el sin reservar memoria.
+
+        Args:
+        --------
+            - buffer (np.array, opcional): Lienzo del frame anterior para reutilizar.
+
+        Retorna:
+        --------
+            - np.array: Lienzo BGR escribible.
+        """
+        def calcular():
+            if buffer is not None and buffer.shape == self.frame.shape and buffer.dtype == self.frame.dtype:
+                np.copyto(buffer, self.frame)
+                return buffer
+            return self.frame.copy()
+        return self._memo("lienzo", calcular)
@@ -0,0 +1,141 @@
+import time
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from .cache_dataset import separar_train_test
+
+
+def _kcenter_greedy(Z, k, rng):
+    #Elige k puntos de forma que el punto mas alejado de los elegidos este lo mas cerca posible
+    elegidos = [int(rng.integers(len(Z)))]
+    distancias = np.linalg.norm(Z - Z[elegidos[0]], axis=1)
+    for _ in range(k - 1):
+        nuevo = int(distancias.argmax())
+        if distancias[nuevo] == 0:
+            break   #Todo esta cubierto (menos puntos distintos que k): seguir repetiria indices
+        elegidos.append(nuevo)
+        distancias = np.minimum(distancias, np.linalg.norm(Z - Z[nuevo], axis=1))
+    return np.array(elegidos)
+
+
+
+def _kmeans(Z, k, random_state):
+    #Agrupa en k clusters y se queda con la muestra real mas cercana a cada centroide
+    km = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3).fit(Z)
+    elegidos = set()
+    for centro in km.cluster_centers_:
+        orden = np.argsort(np.linalg.norm(Z - centro, axis=1))
+        for i in orden:
+            if int(i) not in elegidos:
+                elegidos.add(int(i))
+                break
+    return np.array(sorted(elegidos))
+
+
+
+def seleccionar_coreset(X, y, fraccion=None, tamanyo=None, metodo="kcenter", random_state=111):
+    """
+    Selecciona por clase un subconjunto representativo de las muestras para entrenar mas rapido.
+
+    Args:
+    --------
+        - X (np.array): Matriz de caracteristicas.
+        - y (np.array): Etiquetas de cada muestra.
+        - fraccion (float, opcional): Fraccion de muestras que se conserva en cada clase.
+        - tamanyo (int, opcional): Numero total de muestras a conservar (repartido
+          proporcionalmente entre clases). Se usa si no se indica `fraccion`.
+        - metodo (str, opcional): "kcenter" (k-center greedy) o "kmeans". Por defecto, "kcenter".
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+
+    Proceso:
+    --------
+    1. Estandariza las caracteristicas para que todas pesen lo mismo en las distancias.
+    2. Para cada clase calcula cuantas muestras conservar (al menos una).
+    3. Elige las muestras con k-center greedy o con el representante de cada cluster de k-means.
+
+    Retorna:
+    --------
+        - np.array: Indices de las muestras seleccionadas, ordenados.
+    """
+    if fraccion is None:
+        if tamanyo is None:
+            raise ValueError("Hay que indicar la fracción o el tamaño del coreset.")
+        fraccion = min(tamanyo / len(X), 1.0)
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    Z = (X - X.mean(axis=0)) / np.maximum(X.std(axis=0), 1e-12)
+    rng = np.random.default_rng(random_state)
+
+    seleccion = []
+    for clase in np.unique(y):
+        indices = np.flatnonzero(y == clase)
+        k = max(1, int(round(fraccion * len(indices))))
+        if k >= len(indices):
+            seleccion.append(indices)
+        elif metodo == "kmeans":
+            seleccion.append(indices[_kmeans(Z[indices], k, random_state)])
+        else:
+            seleccion.append(indices[_kcenter_greedy(Z[indices], k, rng)])
+
+    return np.sort(np.concatenate(seleccion))
+
+
+
+def curva_coreset(X, y, fracciones=(0.1, 0.2, 0.3, 0.5, 0.75, 1.0), metodo="kcenter",
+                  n_estimators=200, test_size=0.2, random_state=111, aumentar=None, origen=None):
+    """
+    Mide accuracy y tiempo de entrenamiento del Random Forest entrenado con coresets de distinto
+    tamanyo, siempre evaluando sobre el mismo conjunto de test.
+
+    Args:
+    --------
+        - X (np.array): Matriz de caracteristicas.
+        - y (np.array): Etiquetas de cada muestra.
+        - fracciones (tuple, opcional): Fracciones del conjunto de entrenamiento a probar.
+        - metodo (str, opcional): "kcenter" o "kmeans". Por defecto, "kcenter".
+        - n_estimators (int, opcional): Arboles del Random Forest. Por defecto, 200.
+        - test_size (float, opcional): Proporcion reservada para test. Por defecto, 0.2.
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+        - aumentar (callable, opcional): Funcion (X, y) -> (X, y) con data augmentation. Solo se aplica
+          a la parte de entrenamiento, despues de separar el test. Por defecto, None.
+        - origen (np.array, opcional): Muestra de la que sale cada fila, si X ya trae copias aumentadas.
+          El test se separa por muestra (`separar_train_test`). Por defecto, split por filas.
+
+    Retorna:
+    --------
+        - list[dict]: Por cada fraccion, muestras usadas, tiempo de seleccion, tiempo de fit y accuracy.
+    """
+    y = np.asarray(y)
+    idx_train, idx_test = separar_train_test(y, origen, test_size, random_state)
+    X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y[idx_train], y[idx_test]
+    if aumentar is not None:
+        X_train, y_train = aumentar(X_train, y_train)
+
+    filas = []
+    for fraccion in fracciones:
+        inicio = time.perf_counter()
+        idx = seleccionar_coreset(X_train, y_train, fraccion=fraccion, metodo=metodo, random_state=random_state)
+        t_seleccion = time.perf_counter() - inicio
+
+        rf = RandomForestClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                    random_state=random_state, n_jobs=-1)
+        inicio = time.perf_counter()
+        rf.fit(X_train[idx], y_train[idx])
+        t_fit = time.perf_counter() - inicio
+
+        filas.append({
+            "fraccion": fraccion,
+            "muestras": len(idx),
+            "seleccion_s": t_seleccion,
+            "fit_s": t_fit,
+            "accuracy": accuracy_score(y_test, rf.predict(X_test)),
+        })
+
+    print(f"{'Fracción':>9}{'Muestras':>10}{'Selección (s)':>15}{'Fit (s)':>9}{'Acc (%)':>9}")
+    for f in filas:
+        print(f"{f['fraccion']:>9.2f}{f['muestras']:>10}{f['seleccion_s']:>15.2f}{f['fit_s']:>9.2f}"
+              f"{f['accuracy']*100:>9.2f}")
+    return filas
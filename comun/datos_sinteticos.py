@@ -0,0 +1,228 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import cv2
+
+LETRAS = ["A", "B", "C", "CH", "D", "E", "F", "G", "H", "I", "J", "K", "L", "LL",
+          "M", "N", "Ñ", "O", "P", "Q", "R", "RR", "S", "T", "U", "V", "W", "X", "Y", "Z"]
+TAMANYO_LOTE = 500          #Muestras que escribe cada tarea del pool
+
+
+def nombres_clases(n_clases):
+    #Las letras del alfabeto y, si se piden mas, clases "C31", "C32", ...
+    return LETRAS[:n_clases] + [f"C{i + 1}" for i in range(len(LETRAS), n_clases)]
+
+
+
+#----Pipeline clasico: manchas con forma de mano en tonos de piel----#
+
+def _forma_clase(indice_clase):
+    #Parametros fijos de cada clase: dedos extendidos, su longitud y la apertura de la mano
+    rng = np.random.default_rng([7, indice_clase])
+    dedos = rng.random(5) < 0.6
+    if not dedos.any():
+        dedos[rng.integers(5)] = True
+    return {
+        "dedos": dedos,
+        "longitudes": rng.uniform(25, 45, 5),
+        "apertura": rng.uniform(10, 25),
+        "palma": rng.uniform(20, 30, 2),
+    }
+
+
+
+def _dibujar_mano(forma, rng, tamanyo=128):
+    """
+    Dibuja un ROI BGR sintetico como los que guarda la captura del pipeline clasico: mano
+    (palma + dedos) en un tono de piel dentro del rango HSV de deteccion sobre un fondo que
+    no es piel, con rotacion, escala, desplazamiento y ruido distintos en cada muestra.
+    """
+    #Fondo: azulado o muy oscuro, fuera del rango de piel
+    if rng.random() < 0.5:
+        fondo_hsv = (rng.integers(90, 130), rng.integers(40, 200), rng.integers(40, 200))
+    else:
+        fondo_hsv = (rng.integers(0, 180), rng.integers(0, 255), rng.integers(0, 45))
+    piel_hsv = (rng.integers(2, 18), rng.integers(70, 200), rng.integers(110, 240))
+    fondo = cv2.cvtColor(np.uint8([[fondo_hsv]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
+    piel = cv2.cvtColor(np.uint8([[piel_hsv]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
+
+    img = np.empty((tamanyo, tamanyo, 3), np.uint8)
+    img[:] = fondo
+    centro = (tamanyo // 2, int(tamanyo * 0.62))
+    ejes = tuple(int(a) for a in forma["palma"])
+    cv2.ellipse(img, centro, ejes, 0, 0, 360, piel, -1)
+
+    #Dedos: lineas gruesas desde el borde superior de la palma
+    for i, extendido in enumerate(forma["dedos"]):
+        angulo = np.deg2rad(-90 + (i - 2) * forma["apertura"] + rng.normal(0, 3))
+        longitud = forma["longitudes"][i] * (1.0 if extendido else 0.35)
+        base = (centro[0] + int((i - 2) * ejes[0] * 0.4), centro[1] - int(ejes[1] * 0.6))
+        punta = (int(base[0] + longitud * np.cos(angulo)), int(base[1] + longitud * np.sin(angulo)))
+        cv2.line(img, base, punta, piel, int(rng.integers(8, 12)))
+
+    #Variacion de cada muestra: rotacion, escala y desplazamiento
+    M = cv2.getRotationMatrix2D((tamanyo / 2, tamanyo / 2), rng.uniform(-15, 15), rng.uniform(0.85, 1.05))
+    M[:, 2] += rng.uniform(-6, 6, 2)
+    img = cv2.warpAffine(img, M, (tamanyo, tamanyo), borderValue=fondo)
+
+    ruido = rng.normal(0, 4, img.shape)
+    return np.clip(img + ruido, 0, 255).astype(np.uint8)
+
+
+
+def _lote_clasico(destino, clase, indice_clase, inicio, n, etapa, semilla):
+    from clasico.src.procesar_data import preprocesar_imagen
+
+    rng = np.random.default_rng([semilla, indice_clase, inicio])
+    forma = _forma_clase(indice_clase)
+    carpeta = os.path.join(destino, clase)
+    escritos, bytes_escritos = 0, 0
+
+    i = inicio
+    while escritos < n:
+        img = _dibujar_mano(forma, rng)
+        if etapa == "procesado":
+            #Mismo preprocesado que procesar_data.run(): ROI 64x64 en gris ecualizado
+            img = preprocesar_imagen(img)
+            if img is None:
+                continue
+        ruta = os.path.join(carpeta, f"{i}.jpg")
+        cv2.imwrite(ruta, img)
+        bytes_escritos += os.path.getsize(ruta)
+        escritos += 1
+        i += 1
+    return escritos, bytes_escritos
+
+
+
+#----Pipeline de MediaPipe: plantillas de landmarks por clase con ruido----#
+
+def plantilla_landmarks(indice_clase, aspecto=4/3):
+    """
+    Plantilla de 21 landmarks (63 valores, coordenadas normalizadas como las de MediaPipe) de una
+    clase: muneca, palma y cinco dedos con una flexion fija por clase.
+    """
+    rng = np.random.default_rng([11, indice_clase])
+    flexion = rng.uniform(0.0, 1.0, 5)            #0 = dedo estirado, 1 = dedo cerrado
+    angulos_dedo = np.deg2rad([-55, -18, -4, 10, 24]) + rng.normal(0, 0.05, 5)
+    segmentos = [(0.05, 0.04, 0.035), (0.05, 0.03, 0.025), (0.055, 0.035, 0.025),
+                 (0.05, 0.03, 0.025), (0.04, 0.025, 0.02)]
+
+    puntos = np.zeros((21, 3))
+    muneca = np.array([0.5, 0.75, 0.0])
+    puntos[0] = muneca
+    for dedo in range(5):
+        #Base del dedo (CMC del pulgar o MCP del resto) sobre la palma
+        direccion = angulos_dedo[dedo] - np.pi / 2
+        radio = 0.06 if dedo == 0 else 0.12
+        actual = muneca + radio * np.array([np.cos(direccion), np.sin(direccion), 0.0])
+        indice = 1 + 4 * dedo
+        puntos[indice] = actual
+
+        #Cada articulacion gira hacia la palma segun la flexion de la clase
+        for j, largo in enumerate(segmentos[dedo]):
+            direccion += flexion[dedo] * np.deg2rad(55) * (-1 if dedo == 0 else 1) * (j > 0 or dedo > 0)
+            actual = actual + largo * np.array([np.cos(direccion), np.sin(direccion), -0.3 * flexion[dedo]])
+            puntos[indice + 1 + j] = actual
+
+    #x esta normalizada por el ancho de la imagen
+    puntos[:, 0] = muneca[0] + (puntos[:, 0] - muneca[0]) / aspecto
+    return puntos.ravel()
+
+
+
+def _lote_mediapipe(destino, clase, indice_clase, inicio, n, semilla):
+    from pipeline_mediapipe.src.aumentacion_mp import aumentar_landmarks
+
+    plantilla = plantilla_landmarks(indice_clase)
+    semilla_lote = int(np.random.SeedSequence([semilla, indice_clase, inicio]).generate_state(1)[0])
+    X, _ = aumentar_landmarks(plantilla[None], np.array([clase]), factor=n, rotacion=12, escala=(0.85, 1.15),
+                              traslacion=0.12, prob_espejo=0.0, ruido=0.006, random_state=semilla_lote)
+
+    carpeta = os.path.join(destino, clase)
+    bytes_escritos = 0
+    for k, coords in enumerate(X[1:]):  #La primera fila es la plantilla sin variar
+        ruta = os.path.join(carpeta, f"{inicio + k}.npy")
+        np.save(ruta, coords)
+        bytes_escritos += os.path.getsize(ruta)
+    return n, bytes_escritos
+
+
+
+def generar_dataset(destino, pipeline="mediapipe", n_clases=30, muestras_por_clase=200, etapa="raw",
+                    n_workers=None, semilla=111):
+    """
+    Genera un dataset sintetico con la misma estructura en disco que leen los pipelines
+    (una carpeta por clase), para medir como escalan la construccion del dataset y el
+    entrenamiento sin horas de captura con la webcam.
+
+    - clasico, etapa "raw": ROI BGR de 128x128 como los de `get_data` (entrada de `procesar_data.run`).
+    - clasico, etapa "procesado": ROI 64x64 en gris ecualizado como los de `procesar_data`
+      (entrada de `construir_dataset`).
+    - mediapipe: un .npy de 63 landmarks por muestra como los de la captura (entrada de
+      `construir_dataset_mediapipe`).
+
+    Args:
+    --------
+        - destino (str): Directorio raiz donde se crean las carpetas de cada clase.
+        - pipeline (str, opcional): "clasico" o "mediapipe". Por defecto, "mediapipe".
+        - n_clases (int, opcional): Numero de clases (las 30 letras y despues C31, C32...). Por defecto, 30.
+        - muestras_por_clase (int, opcional): Muestras de cada clase. Por defecto, 200.
+        - etapa (str, opcional): "raw" o "procesado" (solo pipeline clasico). Por defecto, "raw".
+        - n_workers (int, opcional): Procesos del pool. Por defecto, uno por nucleo.
+        - semilla (int, opcional): Semilla; el resultado no depende del numero de procesos. Por defecto, 111.
+
+    Retorna:
+    --------
+        - dict: Muestras escritas, bytes en disco, segundos y muestras por segundo.
+    """
+    clases = nombres_clases(n_clases)
+    for clase in clases:
+        os.makedirs(os.path.join(destino, clase), exist_ok=True)
+
+    tareas = [(clase, i, inicio, min(TAMANYO_LOTE, muestras_por_clase - inicio))
+              for i, clase in enumerate(clases)
+              for inicio in range(0, muestras_por_clase, TAMANYO_LOTE)]
+
+    inicio_t = time.perf_counter()
+    total, total_bytes = 0, 0
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        if pipeline == "clasico":
+            futuros = [pool.submit(_lote_clasico, destino, c, i, ini, n, etapa, semilla) for c, i, ini, n in tareas]
+        else:
+            futuros = [pool.submit(_lote_mediapipe, destino, c, i, ini, n, semilla) for c, i, ini, n in tareas]
+
+        for k, futuro in enumerate(as_completed(futuros), 1):
+            escritos, bytes_escritos = futuro.result()
+            total += escritos
+            total_bytes += bytes_escritos
+            if k % max(1, len(futuros) // 10) == 0:
+                print(f"  {total}/{n_clases * muestras_por_clase} muestras")
+
+    duracion = time.perf_counter() - inicio_t
+    informe = {
+        "muestras": total,
+        "bytes": total_bytes,
+        "segundos": duracion,
+        "muestras_por_segundo": total / duracion if duracion > 0 else 0.0,
+    }
+    print(f"{total} muestras ({total_bytes / 1e6:.1f} MB) en {duracion:.1f}s "
+          f"-> {informe['muestras_por_segundo']:.0f} muestras/s en '{destino}'")
+    return informe
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de datasets sinteticos con la estructura de cada pipeline")
+    parser.add_argument("destino", help="Directorio de salida (una carpeta por clase)")
+    parser.add_argument("--pipeline", choices=["clasico", "mediapipe"], default="mediapipe")
+    parser.add_argument("--etapa", choices=["raw", "procesado"], default="raw",
+                        help="Solo clasico: ROI capturados o ya preprocesados")
+    parser.add_argument("--clases", type=int, default=30)
+    parser.add_argument("--muestras", type=int, default=200, help="Muestras por clase")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=111)
+    args = parser.parse_args()
+    generar_dataset(args.destino, args.pipeline, args.clases, args.muestras, args.etapa, args.workers, args.semilla)
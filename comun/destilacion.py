@@ -0,0 +1,312 @@
+import os
+import time
+import pickle
+import numpy as np
+
+#Este modulo solo usa NumPy en la prediccion: sklearn solo hace falta para el profesor al destilar
+
+
+class EtiquetasNumpy:
+    #Codificador minimo (classes_, transform, inverse_transform) que se guarda dentro del .npz del alumno
+
+    def __init__(self, clases):
+        self.classes_ = np.asarray(clases)
+        self._indices = {c: i for i, c in enumerate(self.classes_)}
+
+
+    def transform(self, y):
+        return np.array([self._indices[e] for e in y], dtype=int)
+
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=int)]
+
+
+
+class AlumnoNumpy:
+    """
+    Modelo destilado de un Random Forest: un MLP pequenyo (o un modelo lineal multinomial si no
+    tiene capas ocultas) sobre las caracteristicas estandarizadas. La prediccion son un par de
+    productos de matrices de NumPy, sin sklearn.
+
+    Tiene la interfaz de prediccion de un clasificador de sklearn (predict, predict_proba, classes_,
+    n_features_in_); `predict` devuelve el indice de la clase en `EtiquetasNumpy`.
+
+    Args:
+    --------
+        - media, escala (np.array): Estandarizacion de cada caracteristica.
+        - pesos (list[np.array]): Matriz de pesos de cada capa.
+        - sesgos (list[np.array]): Sesgo de cada capa.
+    """
+
+    def __init__(self, media, escala, pesos, sesgos):
+        self.media = np.asarray(media, dtype=np.float32)
+        self.escala = np.asarray(escala, dtype=np.float32)
+        self.pesos = [np.asarray(W, dtype=np.float32) for W in pesos]
+        self.sesgos = [np.asarray(b, dtype=np.float32) for b in sesgos]
+        self.n_features_in_ = len(self.media)
+        self.classes_ = np.arange(self.pesos[-1].shape[1])
+
+
+    def _logits(self, X):
+        Z = (np.asarray(X, dtype=np.float32).reshape(-1, self.n_features_in_) - self.media) / self.escala
+        for W, b in zip(self.pesos[:-1], self.sesgos[:-1]):
+            Z = np.maximum(Z @ W + b, 0.0)
+        return Z @ self.pesos[-1] + self.sesgos[-1]
+
+
+    def predict_proba(self, X):
+        logits = self._logits(X)
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        return P / P.sum(axis=1, keepdims=True)
+
+
+    def predict(self, X):
+        return self._logits(X).argmax(axis=1)
+
+
+    def guardar(self, ruta, clases):
+        #Un solo .npz con la estandarizacion, las capas y las etiquetas (escritura atomica)
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        capas = {}
+        for i, (W, b) in enumerate(zip(self.pesos, self.sesgos)):
+            capas[f"W{i}"], capas[f"b{i}"] = W, b
+        tmp = ruta + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, media=self.media, escala=self.escala, clases=np.asarray(clases, dtype=str),
+                     n_capas=len(self.pesos), **capas)
+        os.replace(tmp, ruta)
+
+
+
+def cargar_alumno(ruta):
+    """
+    Carga un alumno guardado con `AlumnoNumpy.guardar` sin importar sklearn.
+
+    Retorna:
+    --------
+        - alumno (AlumnoNumpy): Modelo.
+        - le (EtiquetasNumpy): Codificador de etiquetas.
+    """
+    with np.load(ruta) as datos:
+        n_capas = int(datos["n_capas"])
+        alumno = AlumnoNumpy(datos["media"], datos["escala"],
+                             [datos[f"W{i}"] for i in range(n_capas)],
+                             [datos[f"b{i}"] for i in range(n_capas)])
+        return alumno, EtiquetasNumpy(datos["clases"])
+
+
+
+def _probabilidades_profesor(profesor, le, X):
+    #predict_proba del profesor con una columna por etiqueta (las columnas de classes_ son indices del le)
+    P = profesor.predict_proba(X)
+    return P.astype(np.float32), le.inverse_transform(profesor.classes_)
+
+
+
+def ampliar_entradas(X, factor=5, ruido=0.1, aumentar=None, random_state=111):
+    """
+    Entradas sin etiquetar para la destilacion: el profesor las etiqueta con `predict_proba`, asi
+    que no hace falta que sean muestras reales. Ademas de las originales se generan `factor` copias:
+    con `aumentar` (p. ej. `aumentar_landmarks`) o, si no, ruido gaussiano de `ruido` desviaciones
+    tipicas y mezclas de pares de muestras (que cubren las fronteras entre clases).
+    """
+    if factor <= 0:
+        return X
+    if aumentar is not None:
+        return np.asarray(aumentar(X, factor))
+
+    rng = np.random.default_rng(random_state)
+    desviacion = X.std(axis=0)
+    copias = [X]
+    for _ in range(factor):
+        if rng.random() < 0.5:
+            copias.append(X + rng.normal(0.0, ruido, X.shape) * desviacion)
+        else:
+            pareja = X[rng.permutation(len(X))]
+            alfa = rng.uniform(0.0, 1.0, (len(X), 1))
+            copias.append(alfa * X + (1 - alfa) * pareja)
+    return np.vstack(copias)
+
+
+
+def entrenar_alumno(X, P, ocultas=(64,), epocas=40, lote=256, lr=0.01, l2=1e-4, random_state=111):
+    """
+    Entrena el alumno para imitar las probabilidades del profesor (entropia cruzada con objetivos
+    blandos) con descenso por gradiente en mini-lotes y Adam, solo con NumPy.
+
+    Args:
+    --------
+        - X (np.array): Entradas (N, d).
+        - P (np.array): Probabilidades del profesor (N, n_clases).
+        - ocultas (tuple, opcional): Neuronas de cada capa oculta; () da un modelo lineal multinomial. Por defecto, (64,).
+        - epocas (int, opcional): Pasadas sobre los datos. Por defecto, 40.
+        - lote (int, opcional): Tamanyo del mini-lote. Por defecto, 256.
+        - lr (float, opcional): Tasa de aprendizaje de Adam. Por defecto, 0.01.
+        - l2 (float, opcional): Regularizacion de los pesos. Por defecto, 1e-4.
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+
+    Retorna:
+    --------
+        - AlumnoNumpy: Modelo entrenado.
+    """
+    rng = np.random.default_rng(random_state)
+    X = np.asarray(X, dtype=np.float32)
+    P = np.asarray(P, dtype=np.float32)
+    media, escala = X.mean(axis=0), np.maximum(X.std(axis=0), 1e-6)
+    Z = (X - media) / escala
+
+    #Inicializacion de He para las capas con ReLU
+    tamanyos = [X.shape[1], *ocultas, P.shape[1]]
+    params = []
+    for entrada, salida in zip(tamanyos[:-1], tamanyos[1:]):
+        params.append(rng.normal(0.0, np.sqrt(2.0 / entrada), (entrada, salida)).astype(np.float32))
+        params.append(np.zeros(salida, dtype=np.float32))
+    m = [np.zeros_like(p) for p in params]
+    v = [np.zeros_like(p) for p in params]
+    b1, b2, eps, paso = 0.9, 0.999, 1e-8, 0
+
+    n_capas = len(tamanyos) - 1
+    for epoca in range(epocas):
+        orden = rng.permutation(len(Z))
+        for inicio in range(0, len(Z), lote):
+            idx = orden[inicio:inicio + lote]
+            activaciones = [Z[idx]]
+
+            #Hacia delante
+            for c in range(n_capas - 1):
+                activaciones.append(np.maximum(activaciones[-1] @ params[2*c] + params[2*c + 1], 0.0))
+            logits = activaciones[-1] @ params[-2] + params[-1]
+            logits -= logits.max(axis=1, keepdims=True)
+            Q = np.exp(logits)
+            Q /= Q.sum(axis=1, keepdims=True)
+
+            #Hacia atras: el gradiente de la entropia cruzada respecto a los logits es Q - P
+            delta = (Q - P[idx]) / len(idx)
+            gradientes = [None] * len(params)
+            for c in range(n_capas - 1, -1, -1):
+                gradientes[2*c] = activaciones[c].T @ delta + l2 * params[2*c]
+                gradientes[2*c + 1] = delta.sum(axis=0)
+                if c > 0:
+                    delta = (delta @ params[2*c].T) * (activaciones[c] > 0)
+
+            #Adam
+            paso += 1
+            for i, g in enumerate(gradientes):
+                m[i] = b1 * m[i] + (1 - b1) * g
+                v[i] = b2 * v[i] + (1 - b2) * g * g
+                m_hat = m[i] / (1 - b1 ** paso)
+                v_hat = v[i] / (1 - b2 ** paso)
+                params[i] -= lr * m_hat / (np.sqrt(v_hat) + eps)
+
+    return AlumnoNumpy(media, escala, params[0::2], params[1::2])
+
+
+
+def _latencia(modelo, X, n_repeticiones=200):
+    #Mediana de una prediccion individual, como en el bucle en tiempo real
+    tiempos = []
+    for i in range(n_repeticiones):
+        muestra = X[i % len(X)].reshape(1, -1)
+        inicio = time.perf_counter()
+        modelo.predict(muestra)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+
+def comparar_con_profesor(profesor, le, alumno, clases, X_test, y_test=None):
+    """
+    Retorna:
+    --------
+        - dict: Acuerdo alumno-profesor, accuracy de ambos (si hay etiquetas), latencia de una
+          prediccion, aceleracion y tamanyo serializado.
+    """
+    pred_profesor = le.inverse_transform(profesor.predict(X_test))
+    pred_alumno = np.asarray(clases)[alumno.predict(X_test)]
+    informe = {
+        "acuerdo": float(np.mean(pred_profesor == pred_alumno)),
+        "latencia_profesor_ms": _latencia(profesor, X_test) * 1000,
+        "latencia_alumno_ms": _latencia(alumno, X_test) * 1000,
+        "tamanyo_profesor_kb": len(pickle.dumps(profesor)) / 1024,
+    }
+    informe["aceleracion"] = informe["latencia_profesor_ms"] / max(informe["latencia_alumno_ms"], 1e-9)
+    if y_test is not None:
+        informe["accuracy_profesor"] = float(np.mean(pred_profesor == np.asarray(y_test)))
+        informe["accuracy_alumno"] = float(np.mean(pred_alumno == np.asarray(y_test)))
+    return informe
+
+
+
+def run(profesor, le, X, y, ruta_alumno, ruta_profesor=None, ocultas=(64,), factor=5, aumentar=None,
+        test_size=0.2, random_state=111, origen=None):
+    """
+    Destila el modelo de un pipeline en un `AlumnoNumpy` y lo guarda en un .npz.
+
+    Proceso:
+    --------
+    1. Separa un test estratificado de las muestras reales (el alumno no lo ve). Con `origen`, por
+       muestra: las copias aumentadas de una muestra del test tampoco las ve.
+    2. Amplia el resto con `ampliar_entradas` y lo etiqueta con `predict_proba` del profesor.
+    3. Entrena el alumno con esas probabilidades.
+    4. Compara alumno y profesor en el test: acuerdo, accuracy, latencia y tamanyo. El profesor
+       guardado se entreno con todo el dataset, asi que su accuracy en el test es optimista; la
+       del alumno y el acuerdo si son sobre muestras que el alumno no ha visto.
+    5. Guarda el alumno y, si el profesor tiene una seleccion de caracteristicas, una copia junto al alumno.
+
+    Args:
+    --------
+        - profesor: Modelo entrenado del pipeline (Random Forest o compatible con predict_proba).
+        - le: Codificador de etiquetas del profesor.
+        - X, y (np.array): Dataset con las caracteristicas que usa el profesor y sus etiquetas.
+        - ruta_alumno (str): Fichero .npz de salida.
+        - ruta_profesor (str, opcional): .pkl del profesor, para copiar su seleccion de caracteristicas.
+        - ocultas (tuple, opcional): Capas ocultas del alumno; () = modelo lineal. Por defecto, (64,).
+        - factor (int, opcional): Copias sinteticas por muestra para la destilacion. Por defecto, 5.
+        - aumentar (callable, opcional): Funcion (X, factor) -> X ampliado. Por defecto, ruido y mezclas.
+        - test_size (float, opcional): Proporcion de test. Por defecto, 0.2.
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+        - origen (np.array, opcional): Muestra de la que sale cada fila, si X ya trae copias aumentadas
+          (`separar_train_test`). Por defecto, split por filas.
+
+    Retorna:
+    --------
+        - informe (dict): Resultado de `comparar_con_profesor` mas el tamanyo del alumno.
+    """
+    from .seleccion_features import ruta_seleccion
+    from .cache_dataset import separar_train_test
+
+    y = np.asarray(y)
+    idx_train, idx_test = separar_train_test(y, origen, test_size, random_state)
+    X_train, X_test, y_test = X[idx_train], X[idx_test], y[idx_test]
+
+    inicio = time.perf_counter()
+    X_amp = ampliar_entradas(X_train, factor, aumentar=aumentar, random_state=random_state)
+    P, clases = _probabilidades_profesor(profesor, le, X_amp)
+    print(f"Entradas de destilación: {len(X_amp)} ({len(X_train)} reales y {len(X_amp) - len(X_train)} sintéticas)")
+
+    alumno = entrenar_alumno(X_amp, P, ocultas=ocultas, random_state=random_state)
+    duracion = time.perf_counter() - inicio
+
+    informe = comparar_con_profesor(profesor, le, alumno, clases, X_test, y_test)
+    alumno.guardar(ruta_alumno, clases)
+    informe["tamanyo_alumno_kb"] = os.path.getsize(ruta_alumno) / 1024
+    informe["segundos"] = duracion
+
+    #La seleccion de caracteristicas del profesor vale tambien para el alumno
+    if ruta_profesor is not None and os.path.exists(ruta_seleccion(ruta_profesor)):
+        with open(ruta_seleccion(ruta_profesor), "rb") as f_origen, open(ruta_seleccion(ruta_alumno), "wb") as f_destino:
+            f_destino.write(f_origen.read())
+
+    arquitectura = "lineal" if not ocultas else "MLP " + "-".join(str(n) for n in ocultas)
+    print(f"\nAlumno ({arquitectura}) entrenado en {duracion:.1f}s y guardado en {ruta_alumno}")
+    print(f"Acuerdo con el profesor: {informe['acuerdo']*100:.2f}%")
+    if "accuracy_alumno" in informe:
+        print(f"Accuracy: profesor {informe['accuracy_profesor']*100:.2f}% | alumno {informe['accuracy_alumno']*100:.2f}%")
+    print(f"Latencia por muestra: profesor {informe['latencia_profesor_ms']:.3f} ms | "
+          f"alumno {informe['latencia_alumno_ms']:.3f} ms (x{informe['aceleracion']:.0f})")
+    print(f"Tamaño: profesor {informe['tamanyo_profesor_kb']:.0f} KB | alumno {informe['tamanyo_alumno_kb']:.0f} KB")
+    return informe
@@ -0,0 +1,139 @@
+import itertools
+from collections import deque
+import numpy as np
+import cv2
+
+
+def hash_perceptual(imagen):
+    """
+    Calcula el hash perceptual por diferencias (dHash) de 64 bits de una imagen.
+    Imagenes casi iguales dan hashes con pocos bits distintos.
+
+    Args:
+    --------
+        - imagen (np.array): Imagen BGR o en escala de grises (por ejemplo el ROI de la mano).
+
+    Retorna:
+    --------
+        - int: Hash de 64 bits.
+    """
+    if imagen.ndim == 3:
+        imagen = cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+    pequenya = cv2.resize(imagen, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (pequenya[:, 1:] > pequenya[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+
+def _distancia_hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+
+class IndiceHashes:
+    """
+    Indice de los ultimos hashes perceptuales guardados para descartar muestras casi duplicadas.
+
+    Usa multi-index hashing: el hash se parte en (tolerancia + 1) trozos y, si dos hashes
+    se diferencian en como mucho `tolerancia` bits, al menos un trozo coincide exactamente.
+    Asi solo se comparan los candidatos que comparten algun trozo y la consulta es O(1).
+
+    Args:
+    --------
+        - tolerancia (int, opcional): Bits distintos maximos para considerar duplicado. Por defecto, 6.
+        - capacidad (int, opcional): Numero de muestras recientes que se recuerdan. Por defecto, 200.
+    """
+
+    def __init__(self, tolerancia=6, capacidad=200):
+        self.tolerancia = tolerancia
+        n_trozos = tolerancia + 1
+        limites = np.linspace(0, 64, n_trozos + 1).astype(int)
+        self.trozos = [(int(ini), int(fin - ini)) for ini, fin in zip(limites[:-1], limites[1:])]
+        self.recientes = deque()
+        self.capacidad = capacidad
+        self.cubetas = {}
+
+
+    def _claves(self, h):
+        return [(i, (h >> ini) & ((1 << ancho) - 1)) for i, (ini, ancho) in enumerate(self.trozos)]
+
+
+    def es_duplicado(self, h):
+        for clave in self._claves(h):
+            for candidato in self.cubetas.get(clave, ()):
+                if _distancia_hamming(h, candidato) <= self.tolerancia:
+                    return True
+        return False
+
+
+    def anyadir(self, h):
+        if len(self.recientes) == self.capacidad:
+            antiguo = self.recientes.popleft()
+            for clave in self._claves(antiguo):
+                cubeta = self.cubetas.get(clave)
+                if cubeta is not None:
+                    cubeta.discard(antiguo)
+                    if not cubeta:
+                        del self.cubetas[clave]
+        self.recientes.append(h)
+        for clave in self._claves(h):
+            self.cubetas.setdefault(clave, set()).add(h)
+
+
+
+class IndiceLandmarks:
+    """
+    Indice de los ultimos vectores de landmarks (normalizados) guardados para descartar
+    muestras casi duplicadas por distancia euclidea.
+
+    Cada vector se proyecta sobre unas pocas direcciones aleatorias y se cuantiza con celdas
+    del tamanyo de la tolerancia. Dos vectores a distancia <= tolerancia caen en la misma celda
+    o en una vecina, asi que solo se comparan los vectores de las 3^k celdas vecinas (O(1)).
+
+    Args:
+    --------
+        - tolerancia (float, opcional): Distancia euclidea maxima para considerar duplicado.
+        - capacidad (int, opcional): Numero de muestras recientes que se recuerdan. Por defecto, 200.
+        - n_proyecciones (int, opcional): Dimensiones de la proyeccion. Por defecto, 4.
+        - dim (int, opcional): Dimension de los vectores. Por defecto, 63.
+    """
+
+    def __init__(self, tolerancia=0.15, capacidad=200, n_proyecciones=4, dim=63, semilla=111):
+        self.tolerancia = tolerancia
+        self.capacidad = capacidad
+        direcciones = np.random.default_rng(semilla).normal(size=(dim, n_proyecciones))
+        self.direcciones = direcciones / np.linalg.norm(direcciones, axis=0)
+        self.vecinos = list(itertools.product((-1, 0, 1), repeat=n_proyecciones))
+        self.recientes = deque()
+        self.cubetas = {}
+        self._siguiente_id = 0
+
+
+    def _celda(self, vector):
+        return tuple(np.floor(vector @ self.direcciones / self.tolerancia).astype(int))
+
+
+    def es_duplicado(self, vector):
+        vector = np.asarray(vector, dtype=np.float64).ravel()
+        celda = self._celda(vector)
+        for desplazamiento in self.vecinos:
+            clave = tuple(c + d for c, d in zip(celda, desplazamiento))
+            for otro in self.cubetas.get(clave, {}).values():
+                if np.linalg.norm(vector - otro) <= self.tolerancia:
+                    return True
+        return False
+
+
+    def anyadir(self, vector):
+        vector = np.asarray(vector, dtype=np.float64).ravel()
+        if len(self.recientes) == self.capacidad:
+            id_antiguo, celda_antigua = self.recientes.popleft()
+            cubeta = self.cubetas[celda_antigua]
+            del cubeta[id_antiguo]
+            if not cubeta:
+                del self.cubetas[celda_antigua]
+
+        celda = self._celda(vector)
+        self.cubetas.setdefault(celda, {})[self._siguiente_id] = vector
+        self.recientes.append((self._siguiente_id, celda))
+        self._siguiente_id += 1
@@ -0,0 +1,93 @@
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+import numpy as np
+
+
+def _cliente(host, puerto, n_peticiones, dim, semilla, latencias, errores):
+    #Cada cliente mantiene una conexion persistente y envia vectores aleatorios
+    rng = np.random.default_rng(semilla)
+    conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+    cabeceras = {"Content-Type": "application/json"}
+
+    for _ in range(n_peticiones):
+        cuerpo = json.dumps({"landmarks": rng.random(dim).tolist()})
+        inicio = time.perf_counter()
+        try:
+            conexion.request("POST", "/predict/landmarks", cuerpo, cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(str(e))
+            conexion.close()
+            conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+
+    conexion.close()
+
+
+
+def generar_carga(url="http://127.0.0.1:8000", n_clientes=8, peticiones_por_cliente=200, dim=63):
+    """
+    Lanza varios clientes concurrentes contra el servidor de inferencia local y mide
+    el throughput y la latencia de las respuestas.
+
+    Args:
+    --------
+        - url (str, opcional): Direccion del servidor. Por defecto, "http://127.0.0.1:8000".
+        - n_clientes (int, opcional): Clientes concurrentes. Por defecto, 8.
+        - peticiones_por_cliente (int, opcional): Peticiones de cada cliente. Por defecto, 200.
+        - dim (int, opcional): Dimension del vector enviado (63 para landmarks, 74 para el clasico).
+
+    Retorna:
+    --------
+        - dict: Peticiones correctas, errores, throughput (peticiones/s) y percentiles de latencia en ms.
+    """
+    destino = urlparse(url)
+    latencias, errores = [], []
+
+    hilos = [threading.Thread(target=_cliente,
+                              args=(destino.hostname, destino.port or 80, peticiones_por_cliente,
+                                    dim, i, latencias, errores))
+             for i in range(n_clientes)]
+
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    lat_ms = np.array(latencias) * 1000
+    informe = {
+        "peticiones": len(latencias),
+        "errores": len(errores),
+        "throughput_rps": len(latencias) / duracion if duracion > 0 else 0.0,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else None,
+        "p95_ms": float(np.percentile(lat_ms, 95)) if len(lat_ms) else None,
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else None,
+    }
+
+    print(f"{informe['peticiones']} peticiones ({informe['errores']} errores) en {duracion:.2f}s "
+          f"-> {informe['throughput_rps']:.1f} peticiones/s")
+    if len(lat_ms):
+        print(f"Latencia p50={informe['p50_ms']:.2f} ms  p95={informe['p95_ms']:.2f} ms  p99={informe['p99_ms']:.2f} ms")
+    return informe
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de inferencia")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clientes", type=int, default=8)
+    parser.add_argument("--peticiones", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=63)
+    args = parser.parse_args()
+    generar_carga(args.url, args.clientes, args.peticiones, args.dim)
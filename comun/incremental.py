@@ -0,0 +1,171 @@
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+
+class LabelEncoderExtensible:
+    """
+    Codificador de etiquetas que se puede ampliar con clases nuevas sin renumerar las existentes
+    (LabelEncoder las ordena alfabeticamente, asi que anyadir una letra cambia los indices).
+
+    Tiene la misma interfaz que LabelEncoder (classes_, fit, fit_transform, transform,
+    inverse_transform), por lo que se usa igual en la prediccion en tiempo real.
+    """
+
+    def __init__(self, clases=()):
+        self.classes_ = np.array(list(clases))
+        self._indices = {c: i for i, c in enumerate(self.classes_)}
+
+
+    @classmethod
+    def desde(cls, le):
+        #Copia un LabelEncoder (o LabelEncoderExtensible) ya ajustado conservando sus indices
+        return cls(le.classes_)
+
+
+    def extender(self, etiquetas):
+        #Anyade al final las etiquetas que no existian y devuelve las nuevas
+        nuevas = [e for e in dict.fromkeys(etiquetas) if e not in self._indices]
+        if nuevas:
+            self.classes_ = np.array(list(self.classes_) + nuevas)
+            self._indices = {c: i for i, c in enumerate(self.classes_)}
+        return nuevas
+
+
+    def fit(self, y):
+        self.classes_ = np.array([])
+        self._indices = {}
+        self.extender(sorted(set(y)))
+        return self
+
+
+    def fit_transform(self, y):
+        return self.fit(y).transform(y)
+
+
+    def transform(self, y):
+        desconocidas = [e for e in set(y) if e not in self._indices]
+        if desconocidas:
+            raise ValueError(f"y contiene etiquetas nuevas: {desconocidas}")
+        return np.array([self._indices[e] for e in y], dtype=int)
+
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=int)]
+
+
+
+class BosqueIncremental:
+    """
+    Conjunto de bosques entrenados en distintas sesiones que votan juntos.
+
+    Cada miembro es un Random Forest que conoce solo algunas clases (sus `classes_` son indices
+    globales del LabelEncoderExtensible). La probabilidad de cada clase es la media, ponderada por
+    numero de arboles, de los miembros que conocen esa clase; asi una letra anyadida despues (que
+    solo conocen los miembros nuevos) compite en igualdad con las antiguas.
+
+    Tiene la interfaz de prediccion de un clasificador de sklearn (predict, predict_proba, classes_).
+
+    Args:
+    --------
+        - miembros (list): Bosques entrenados con etiquetas ya codificadas.
+        - n_clases (int): Numero total de clases del codificador.
+    """
+
+    def __init__(self, miembros, n_clases):
+        self.miembros = list(miembros)
+        self.classes_ = np.arange(n_clases)
+        self.n_features_in_ = self.miembros[0].n_features_in_
+
+
+    @property
+    def pesos(self):
+        return [len(m.estimators_) for m in self.miembros]
+
+
+    def anyadir(self, miembro, n_clases):
+        self.miembros.append(miembro)
+        self.classes_ = np.arange(n_clases)
+
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        P = np.zeros((len(X), len(self.classes_)))
+        cobertura = np.zeros(len(self.classes_))
+        for miembro, peso in zip(self.miembros, self.pesos):
+            P[:, miembro.classes_] += peso * miembro.predict_proba(X)
+            cobertura[miembro.classes_] += peso
+
+        #Renormalizamos cada clase por el peso de los miembros que la conocen
+        P /= np.maximum(cobertura, 1e-12)
+        return P / np.maximum(P.sum(axis=1, keepdims=True), 1e-12)
+
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+
+def muestreo_repaso(X, y, fraccion=0.2, random_state=111):
+    #Submuestra estratificada de los datos antiguos para que los miembros nuevos distingan tambien las clases viejas
+    rng = np.random.default_rng(random_state)
+    idx = []
+    for clase in np.unique(y):
+        posiciones = np.flatnonzero(y == clase)
+        n = max(1, int(round(fraccion * len(posiciones))))
+        idx.extend(rng.choice(posiciones, size=min(n, len(posiciones)), replace=False))
+    idx = np.sort(np.array(idx, dtype=int))
+    return X[idx], y[idx]
+
+
+
+def entrenar_incremental(modelo, le, X_nuevo, y_nuevo, X_antiguo=None, y_antiguo=None,
+                         n_estimators=50, fraccion_repaso=0.2, random_state=111):
+    """
+    Anyade al modelo existente un bosque entrenado solo con los datos nuevos (mas un repaso de
+    los antiguos), sin reentrenar los arboles que ya habia.
+
+    Args:
+    --------
+        - modelo: RandomForestClassifier o BosqueIncremental ya entrenado.
+        - le: LabelEncoder o LabelEncoderExtensible del modelo.
+        - X_nuevo, y_nuevo (np.array): Muestras nuevas (letras nuevas o mas muestras de las existentes).
+        - X_antiguo, y_antiguo (np.array, opcional): Dataset anterior del que se toma el repaso.
+        - n_estimators (int, opcional): Arboles del nuevo miembro. Por defecto, 50.
+        - fraccion_repaso (float, opcional): Fraccion de cada clase antigua que se repasa. Por defecto, 0.2.
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+
+    Retorna:
+    --------
+        - bosque (BosqueIncremental): Modelo ampliado.
+        - le (LabelEncoderExtensible): Codificador ampliado (los indices antiguos no cambian).
+    """
+    if not isinstance(modelo, BosqueIncremental) and not hasattr(modelo, "estimators_"):
+        #Los miembros votan ponderados por su numero de arboles: solo se amplia un bosque
+        raise ValueError("El modelo guardado no es un bosque de árboles; entrena primero el Random Forest.")
+
+    inicio = time.perf_counter()
+    le = LabelEncoderExtensible.desde(le)
+    nuevas = le.extender(list(y_nuevo))
+    if nuevas:
+        print(f"Clases nuevas: {', '.join(nuevas)}")
+
+    if isinstance(modelo, BosqueIncremental):
+        bosque = modelo
+    else:
+        bosque = BosqueIncremental([modelo], len(le.classes_))
+
+    X_train, y_train = np.asarray(X_nuevo), np.asarray(y_nuevo)
+    if X_antiguo is not None and len(X_antiguo):
+        X_rep, y_rep = muestreo_repaso(np.asarray(X_antiguo), np.asarray(y_antiguo), fraccion_repaso, random_state)
+        X_train = np.vstack([X_train, X_rep])
+        y_train = np.concatenate([y_train.astype(str), y_rep.astype(str)])
+
+    miembro = RandomForestClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                     random_state=random_state, n_jobs=-1)
+    miembro.fit(X_train, le.transform(y_train))
+    bosque.anyadir(miembro, len(le.classes_))
+
+    print(f"Miembro nuevo con {n_estimators} árboles entrenado con {len(X_train)} muestras "
+          f"en {time.perf_counter() - inicio:.1f}s ({len(bosque.miembros)} miembros, {sum(bosque.pesos)} árboles)")
+    return bosque, le
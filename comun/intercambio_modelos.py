@@ -0,0 +1,315 @@
+import os
+import time
+import queue
+import pickle
+import threading
+import numpy as np
+import joblib
+import cv2
+
+
+def cargar_pickle(ruta):
+    with open(ruta, "rb") as f:
+        return pickle.load(f)
+
+
+
+def _volcar(objeto, ruta, formato):
+    #Se escribe en un temporal y se renombra, asi nunca se lee un fichero a medio escribir
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    if formato == "joblib":
+        joblib.dump(objeto, temporal)
+    else:
+        with open(temporal, "wb") as f:
+            pickle.dump(objeto, f)
+    os.replace(temporal, ruta)
+
+
+
+def guardar_modelo_atomico(modelo, le, ruta_modelo, ruta_le, formato="pickle"):
+    """
+    Guarda modelo y codificador de forma atomica y actualiza el fichero de version que vigilan
+    los bucles en tiempo real (`<ruta_modelo>.version`).
+
+    Args:
+    --------
+        - modelo: Clasificador entrenado.
+        - le (LabelEncoder): Codificador de etiquetas.
+        - ruta_modelo (str): Ruta del .pkl del modelo.
+        - ruta_le (str): Ruta del .pkl del codificador.
+        - formato (str, opcional): "pickle" (pipeline clasico) o "joblib" (MediaPipe).
+
+    Retorna:
+    --------
+        - None
+    """
+    carpeta = os.path.dirname(ruta_modelo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    _volcar(modelo, ruta_modelo, formato)
+    _volcar(le, ruta_le, formato)
+
+    #La version se escribe la ultima: indica que el par modelo/codificador esta completo
+    ruta_version = ruta_modelo + ".version"
+    temporal = f"{ruta_version}.tmp{os.getpid()}"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+    os.replace(temporal, ruta_version)
+
+
+
+class ModeloIntercambiable:
+    """
+    Modelo que se recarga solo cuando cambia en disco, sin parar el bucle de prediccion.
+
+    Un hilo vigila el modelo, el codificador y su fichero de version. Cuando cambian (y dejan de
+    cambiar durante un ciclo, por si otro proceso los esta escribiendo) carga la nueva pareja en
+    segundo plano y la sustituye de una sola vez. El bucle llama a `actual()` al principio de cada
+    frame y siempre recibe una pareja completa (modelo, le).
+
+    Args:
+    --------
+        - ruta_modelo (str): Ruta del .pkl del modelo.
+        - ruta_le (str): Ruta del .pkl del codificador.
+        - cargar (callable, opcional): Funcion ruta -> objeto. Por defecto, joblib.load.
+        - inicial (tuple, opcional): Pareja (modelo, le) ya cargada. Si no, se carga de disco.
+        - envolver (callable, opcional): Transformacion aplicada a cada modelo cargado
+          (por ejemplo la salida temprana).
+        - intervalo_s (float, opcional): Cada cuanto se comprueba el disco. Por defecto, 1 s.
+    """
+
+    def __init__(self, ruta_modelo, ruta_le, cargar=joblib.load, inicial=None, envolver=None, intervalo_s=1.0):
+        self.ruta_modelo = ruta_modelo
+        self.ruta_le = ruta_le
+        self.cargar = cargar
+        self.envolver = envolver
+        self.intervalo_s = intervalo_s
+        self.intercambios = 0
+
+        self._firma = self._firma_disco()
+        if inicial is None:
+            inicial = self._cargar()
+        self._actual = inicial
+
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._vigilar, daemon=True)
+        self._hilo.start()
+
+
+    def _firma_disco(self):
+        firma = []
+        for ruta in (self.ruta_modelo, self.ruta_le, self.ruta_modelo + ".version"):
+            try:
+                firma.append(os.stat(ruta).st_mtime_ns)
+            except FileNotFoundError:
+                firma.append(None)
+        return tuple(firma)
+
+
+    def _cargar(self):
+        modelo = self.cargar(self.ruta_modelo)
+        le = self.cargar(self.ruta_le)
+        if self.envolver is not None:
+            modelo = self.envolver(modelo)
+        return modelo, le
+
+
+    def _vigilar(self):
+        pendiente = None
+        while not self._parar.wait(self.intervalo_s):
+            firma = self._firma_disco()
+            if firma == self._firma:
+                pendiente = None
+                continue
+            #Esperamos a que la firma se estabilice un ciclo antes de cargar
+            if firma != pendiente:
+                pendiente = firma
+                continue
+            try:
+                nuevo = self._cargar()
+            except Exception as e:
+                print(f"No se pudo cargar el nuevo modelo: {e}")
+                continue
+            self._actual = nuevo  #Sustitucion atomica de la referencia
+            self._firma = firma
+            self.intercambios += 1
+            pendiente = None
+            print("Nuevo modelo cargado sin detener la predicción.")
+
+
+    def actual(self):
+        return self._actual
+
+
+    def parar(self):
+        self._parar.set()
+        self._hilo.join()
+
+
+
+def pesos_correcciones(origen, peso_correcciones=5):
+    """
+    Peso de cada fila del dataset segun el fichero del que sale: las correcciones guardadas desde la
+    prediccion en tiempo real (corr_*) pesan `peso_correcciones`, el resto 1.
+
+    Args:
+    --------
+        - origen (np.array): Ruta del fichero de cada fila (ver `comun.cache_dataset`).
+        - peso_correcciones (float, opcional): Peso de las filas de correcciones. Por defecto, 5.
+    """
+    es_correccion = np.array([os.path.basename(str(o)).startswith("corr_") for o in origen], dtype=bool)
+    return np.where(es_correccion, float(peso_correcciones), 1.0)
+
+
+
+class EntrenadorFondo:
+    """
+    Hilo que reentrena el modelo con las correcciones del usuario mientras la prediccion sigue.
+
+    Las correcciones se guardan en disco junto al resto del dataset antes de avisar con `anyadir()`,
+    y `entrenar()` las lee de ahi: el hilo no guarda muestras, asi cada correccion entra una sola
+    vez en el reentrenamiento. Cada vez que hay correcciones nuevas llama a `entrenar()` y guarda
+    el resultado con `guardar(modelo, le)`. Si durante un entrenamiento llegan mas, se juntan en el siguiente.
+
+    Args:
+    --------
+        - entrenar (callable): Funcion sin argumentos -> (modelo, le), con el dataset de disco.
+        - guardar (callable): Funcion (modelo, le) que escribe la nueva version en disco.
+    """
+
+    def __init__(self, entrenar, guardar):
+        self.entrenar = entrenar
+        self.guardar = guardar
+        self.correcciones = 0   #Muestras corregidas en la sesion (solo para informar)
+        self.versiones = 0
+        self.entrenando = False
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+
+    def anyadir(self, n_muestras):
+        #Avisa de una correccion ya guardada en disco con `n_muestras` muestras
+        self._cola.put(n_muestras)
+
+
+    def _bucle(self):
+        while True:
+            item = self._cola.get()
+            terminar = item is None
+            pendientes = [] if terminar else [item]
+            while not self._cola.empty():
+                otro = self._cola.get_nowait()
+                if otro is None:
+                    terminar = True
+                else:
+                    pendientes.append(otro)
+
+            if pendientes:
+                self.correcciones += sum(pendientes)
+                self.entrenando = True
+                try:
+                    inicio = time.perf_counter()
+                    modelo, le = self.entrenar()
+                    self.guardar(modelo, le)
+                    self.versiones += 1
+                    print(f"Modelo reentrenado con {self.correcciones} correcciones en {time.perf_counter() - inicio:.1f}s")
+                except Exception as e:
+                    print(f"Error al reentrenar en segundo plano: {e}")
+                finally:
+                    self.entrenando = False
+
+            if terminar:
+                break
+
+
+    def parar(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+
+
+class EditorCorrecciones:
+    """
+    Estado de la correccion de una letra desde el bucle en tiempo real, sin bloquearlo.
+
+    Controles:
+    --------
+        - 'c': empieza a escribir la letra correcta (la Ñ se escribe como N~).
+        - Enter: confirma la letra y graba las siguientes `n_muestras` muestras con mano detectada.
+        - Esc: cancela.
+
+    Args:
+    --------
+        - n_muestras (int, opcional): Muestras que se graban por correccion. Por defecto, 20.
+    """
+
+    def __init__(self, n_muestras=20):
+        self.n_muestras = n_muestras
+        self.texto = None       #Texto escrito (None si no se esta escribiendo)
+        self.etiqueta = None    #Letra confirmada que se esta grabando
+        self.muestras = []
+        self.extras = []
+
+
+    @property
+    def activo(self):
+        return self.texto is not None or self.etiqueta is not None
+
+
+    def procesar_tecla(self, key):
+        #Devuelve True si la tecla la consume el editor
+        if self.texto is not None:
+            if key == 27:  #Esc
+                self.texto = None
+            elif key in (13, 10):  #Enter
+                if self.texto:
+                    self.etiqueta = self.texto.upper().replace("N~", "Ñ")
+                    self.muestras, self.extras = [], []
+                self.texto = None
+            elif key == 8:  #Retroceso
+                self.texto = self.texto[:-1]
+            elif 32 < key < 127:
+                self.texto += chr(key)
+            return True
+
+        if self.etiqueta is not None and key == 27:
+            self.etiqueta = None
+            return True
+
+        if key == ord('c'):
+            self.texto = ""
+            return True
+        return False
+
+
+    def anyadir_muestra(self, features, extra=None):
+        """
+        Anyade una muestra a la correccion en curso.
+
+        Retorna:
+        --------
+            - (etiqueta, muestras, extras) cuando se completa la correccion, si no None.
+        """
+        if self.etiqueta is None:
+            return None
+        self.muestras.append(features)
+        self.extras.append(extra)
+        if len(self.muestras) < self.n_muestras:
+            return None
+
+        completa = (self.etiqueta, self.muestras, self.extras)
+        self.etiqueta = None
+        self.muestras, self.extras = [], []
+        return completa
+
+
+    def dibujar(self, frame, y=100):
+        if self.texto is not None:
+            mensaje = f"Corregir letra: {self.texto}_  (Enter/Esc)"
+        elif self.etiqueta is not None:
+            mensaje = f"Grabando '{self.etiqueta}': {len(self.muestras)}/{self.n_muestras}"
+        else:
+            return
+        cv2.putText(frame, mensaje, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
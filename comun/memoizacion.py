@@ -0,0 +1,138 @@
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+def escala_desde_cache(ruta_npz, n_features=None, columnas=None):
+    """
+    Desviacion tipica de cada caracteristica en el dataset guardado, para medir distancias en
+    unidades comparables (en el pipeline clasico el area va en miles y los momentos de Hu en
+    milesimas).
+
+    Args:
+    --------
+        - ruta_npz (str): Fichero .npz con X (features.npz o features_mp.npz).
+        - n_features (int, opcional): Numero de caracteristicas que espera el modelo.
+        - columnas (list, opcional): Columnas que usa el modelo si tiene una seleccion de caracteristicas.
+
+    Retorna:
+    --------
+        - np.array | None: Escala por caracteristica, o None si no hay cache compatible.
+    """
+    if not os.path.exists(ruta_npz):
+        return None
+    X = np.load(ruta_npz)["X"]
+    if columnas is not None:
+        X = X[:, columnas]
+    if n_features is not None and X.shape[1] != n_features:
+        return None
+    return X.std(axis=0)
+
+
+
+class PrediccionMemoizada:
+    """
+    Capa de memoizacion delante del clasificador para cuando la mano esta quieta.
+
+    1. Si el vector nuevo esta a menos de `tolerancia` del ultimo vector que se predijo de verdad
+       (distancia maxima por caracteristica, en unidades de `escala`), se reutiliza su resultado.
+    2. Si no, se busca en una cache LRU indexada por el vector cuantizado con paso `paso`
+       (posturas que se repiten al volver a una letra ya vista).
+    3. Si tampoco esta, se llama a `predict` e `inverse_transform` y se guarda el resultado.
+
+    Args:
+    --------
+        - modelo: Clasificador con `predict`.
+        - le: Codificador de etiquetas con `inverse_transform`.
+        - tolerancia (float, opcional): Distancia maxima para reutilizar el ultimo resultado. Por defecto, 0.05.
+        - paso (float, opcional): Tamanyo de celda de la cuantizacion de la LRU. Por defecto, 0.1.
+        - capacidad (int, opcional): Entradas de la LRU. Por defecto, 512.
+        - escala (np.array, opcional): Escala por caracteristica (ver `escala_desde_cache`). Por defecto, 1.
+    """
+
+    def __init__(self, modelo, le, tolerancia=0.05, paso=0.1, capacidad=512, escala=None):
+        self.tolerancia = tolerancia
+        self.paso = paso
+        self.capacidad = capacidad
+        self.cambiar_modelo(modelo, le, escala)
+
+        self.consultas = 0
+        self.aciertos_tolerancia = 0
+        self.aciertos_lru = 0
+        self.tiempo_modelo = 0.0    #Tiempo en predict + inverse_transform (solo fallos)
+        self.tiempo_memo = 0.0      #Tiempo de las comprobaciones de la memoizacion
+
+
+    def cambiar_modelo(self, modelo, le, escala=None):
+        #Un modelo nuevo invalida todo lo guardado (las estadisticas se conservan)
+        self.modelo = modelo
+        self.le = le
+        self.escala = None if escala is None else np.maximum(np.asarray(escala, dtype=np.float64), 1e-6)
+        self._ultimo = None
+        self._ultimo_resultado = None
+        self._lru = OrderedDict()
+
+
+    def _normalizar(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        return x if self.escala is None else x / self.escala
+
+
+    def predecir(self, x):
+        """
+        Retorna:
+        --------
+            - (pred, etiqueta): Prediccion codificada del modelo y su etiqueta.
+        """
+        self.consultas += 1
+        inicio = time.perf_counter()
+        z = self._normalizar(x)
+
+        #1. Mano quieta: el vector apenas ha cambiado
+        if self._ultimo is not None and np.max(np.abs(z - self._ultimo)) <= self.tolerancia:
+            self.aciertos_tolerancia += 1
+            self.tiempo_memo += time.perf_counter() - inicio
+            return self._ultimo_resultado
+
+        #2. Postura ya vista
+        clave = np.floor(z / self.paso).astype(np.int32).tobytes()
+        resultado = self._lru.get(clave)
+        if resultado is not None:
+            self._lru.move_to_end(clave)
+            self.aciertos_lru += 1
+            self._ultimo, self._ultimo_resultado = z, resultado
+            self.tiempo_memo += time.perf_counter() - inicio
+            return resultado
+        self.tiempo_memo += time.perf_counter() - inicio
+
+        #3. Prediccion real
+        inicio = time.perf_counter()
+        pred = self.modelo.predict(np.asarray(x).reshape(1, -1))[0]
+        resultado = (pred, self.le.inverse_transform([pred])[0])
+        self.tiempo_modelo += time.perf_counter() - inicio
+
+        self._lru[clave] = resultado
+        if len(self._lru) > self.capacidad:
+            self._lru.popitem(last=False)
+        self._ultimo, self._ultimo_resultado = z, resultado
+        return resultado
+
+
+    def tasa_aciertos(self):
+        return (self.aciertos_tolerancia + self.aciertos_lru) / self.consultas if self.consultas else 0.0
+
+
+    def tiempo_ahorrado(self):
+        #Estimacion: aciertos por coste medio de una prediccion real menos el coste de las comprobaciones
+        fallos = self.consultas - self.aciertos_tolerancia - self.aciertos_lru
+        if not fallos:
+            return 0.0
+        aciertos = self.aciertos_tolerancia + self.aciertos_lru
+        return aciertos * self.tiempo_modelo / fallos - self.tiempo_memo
+
+
+    def resumen(self):
+        print(f"Memoización: {self.tasa_aciertos()*100:.1f}% de aciertos en {self.consultas} predicciones "
+              f"({self.aciertos_tolerancia} por tolerancia, {self.aciertos_lru} en la LRU) | "
+              f"tiempo ahorrado estimado {self.tiempo_ahorrado()*1000:.0f} ms")
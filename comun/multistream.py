@@ -0,0 +1,306 @@
+import time
+import signal
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+
+from .servidor_inferencia import cargar_modelo, MODELOS
+from .seleccion_features import cargar_seleccion
+
+
+class AnilloFrames:
+    """
+    Buffer circular de frames en memoria compartida. El proceso principal escribe cada frame
+    decodificado en un hueco y los workers de extraccion lo leen sin copiarlo entre procesos.
+
+    Args:
+    --------
+        - n_huecos (int): Numero de frames que caben en el anillo.
+        - alto (int): Alto de los frames.
+        - ancho (int): Ancho de los frames.
+        - nombre (str, opcional): Nombre de un anillo ya creado al que conectarse (workers).
+    """
+
+    def __init__(self, n_huecos, alto, ancho, nombre=None):
+        self.forma = (n_huecos, alto, ancho, 3)
+        tamanyo = int(np.prod(self.forma))
+        self.propietario = nombre is None
+
+        if self.propietario:
+            self.shm = shared_memory.SharedMemory(create=True, size=tamanyo)
+        else:
+            #Los workers solo se conectan; el anillo lo libera el proceso principal
+            self.shm = shared_memory.SharedMemory(name=nombre)
+
+        self.nombre = self.shm.name
+        self.frames = np.ndarray(self.forma, dtype=np.uint8, buffer=self.shm.buf)
+
+
+    def cerrar(self):
+        del self.frames
+        self.shm.close()
+        if self.propietario:
+            self.shm.unlink()
+
+
+
+#Estado de cada proceso worker: pipeline, MediaPipe Hands y anillos abiertos
+_WORKER = {}
+
+
+def _iniciar_worker(pipeline, grupos=None):
+    #Ctrl+C lo gestiona el proceso principal, que para las fuentes y cierra el pool de forma ordenada
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER["pipeline"] = pipeline
+    _WORKER["grupos"] = grupos  #Grupos de caracteristicas (clasico) o landmarks (MediaPipe) que usa el modelo
+    _WORKER["anillos"] = {}
+    if pipeline == "mediapipe":
+        import mediapipe as mp
+        #Los frames de distintas fuentes se mezclan en cada worker, asi que no hay seguimiento
+        _WORKER["hands"] = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1)
+
+
+
+def _extraer_en_worker(nombre, forma, hueco):
+    #Lee el frame del anillo compartido y devuelve su vector de caracteristicas (o None)
+    anillos = _WORKER["anillos"]
+    if nombre not in anillos:
+        anillos[nombre] = AnilloFrames(forma[0], forma[1], forma[2], nombre=nombre)
+    frame = anillos[nombre].frames[hueco]
+
+    if _WORKER["pipeline"] == "clasico":
+        from clasico.src.procesar_data import preprocesar_imagen
+        from clasico.src.utils import extraer_features
+        roi = preprocesar_imagen(frame)
+        return None if roi is None else extraer_features(roi, _WORKER["grupos"])
+
+    from pipeline_mediapipe.src.extraccion_caracteristicas_mp import extraer_landmarks
+    return extraer_landmarks(frame, _WORKER["hands"], _WORKER["grupos"])
+
+
+
+def _leer_en_hueco(cap, destino):
+    #Decodifica un frame y lo escribe redimensionado directamente en el hueco del anillo
+    ret, frame = cap.read()
+    if not ret:
+        return False
+    cv2.resize(frame, (destino.shape[1], destino.shape[0]), dst=destino)
+    return True
+
+
+
+class _EstadisticasFuente:
+    def __init__(self, fuente):
+        self.fuente = fuente
+        self.inicio = None
+        self.fin = None
+        self.frames = 0
+        self.detectados = 0
+        self.latencias = []
+        self.ultima_etiqueta = None
+
+    def registrar(self, t_captura, detectado):
+        ahora = time.perf_counter()
+        self.fin = ahora
+        self.frames += 1
+        self.detectados += int(detectado)
+        self.latencias.append(ahora - t_captura)
+
+    def resumen(self):
+        duracion = (self.fin - self.inicio) if self.fin and self.inicio else 0.0
+        lat_ms = np.array(self.latencias) * 1000
+        return {
+            "fuente": str(self.fuente),
+            "frames": self.frames,
+            "fps": self.frames / duracion if duracion > 0 else 0.0,
+            "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else 0.0,
+            "p95_ms": float(np.percentile(lat_ms, 95)) if len(lat_ms) else 0.0,
+            "deteccion": self.detectados / self.frames if self.frames else 0.0,
+            "ultima_etiqueta": self.ultima_etiqueta,
+        }
+
+
+
+async def _procesar_fuente(fuente, anillo, stats, cola_pred, hilos, procesos, limite, parar):
+    loop = asyncio.get_running_loop()
+    cap = await loop.run_in_executor(hilos, cv2.VideoCapture, fuente)
+    if not cap.isOpened():
+        print(f"No se ha podido abrir la fuente {fuente}.")
+        return
+
+    #Huecos libres del anillo: un frame no se sobrescribe hasta que su extraccion termina
+    libres = asyncio.Queue()
+    for hueco in range(anillo.forma[0]):
+        libres.put_nowait(hueco)
+
+    async def extraer_y_encolar(hueco, t_captura):
+        feats = await loop.run_in_executor(procesos, _extraer_en_worker, anillo.nombre, anillo.forma, hueco)
+        libres.put_nowait(hueco)
+        if feats is None:
+            stats.registrar(t_captura, False)
+        else:
+            await cola_pred.put((stats, t_captura, feats))
+
+    pendientes = set()
+    stats.inicio = time.perf_counter()
+    while (limite is None or time.perf_counter() < limite) and not parar.is_set():
+        hueco = await libres.get()
+        t_captura = time.perf_counter()
+        if not await loop.run_in_executor(hilos, _leer_en_hueco, cap, anillo.frames[hueco]):
+            break
+        tarea = asyncio.ensure_future(extraer_y_encolar(hueco, t_captura))
+        pendientes.add(tarea)
+        tarea.add_done_callback(pendientes.discard)
+
+    if pendientes:
+        await asyncio.gather(*pendientes)
+    cap.release()
+
+
+
+async def _predecir_lotes(modelo, le, cola_pred, max_lote):
+    #Unico consumidor que comparte el modelo entre todas las fuentes, prediciendo por lotes
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as hilo_modelo:
+        terminar = False
+        while not terminar:
+            lote = [await cola_pred.get()]
+            while len(lote) < max_lote and not cola_pred.empty():
+                lote.append(cola_pred.get_nowait())
+            if lote[-1] is None:
+                terminar = True
+                lote.pop()
+            if not lote:
+                continue
+
+            X = np.vstack([feats for _, _, feats in lote])
+            preds = await loop.run_in_executor(hilo_modelo, modelo.predict, X)
+            etiquetas = le.inverse_transform(preds)
+            for (stats, t_captura, _), etiqueta in zip(lote, etiquetas):
+                stats.ultima_etiqueta = str(etiqueta)
+                stats.registrar(t_captura, True)
+
+
+
+async def _multistream(fuentes, pipeline, modelo, le, n_workers, duracion_s, alto, ancho, n_huecos, max_lote, parar):
+    anillos = [AnilloFrames(n_huecos, alto, ancho) for _ in fuentes]
+    seleccion = cargar_seleccion(MODELOS[pipeline][0], modelo)
+    stats = [_EstadisticasFuente(f) for f in fuentes]
+    cola_pred = asyncio.Queue()
+    limite = time.perf_counter() + duracion_s if duracion_s else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(fuentes)) as hilos, \
+             ProcessPoolExecutor(max_workers=n_workers, initializer=_iniciar_worker,
+                                 initargs=(pipeline, seleccion["grupos"] if seleccion else None)) as procesos:
+            predictor = asyncio.ensure_future(_predecir_lotes(modelo, le, cola_pred, max_lote))
+            await asyncio.gather(*[
+                _procesar_fuente(f, a, s, cola_pred, hilos, procesos, limite, parar)
+                for f, a, s in zip(fuentes, anillos, stats)
+            ])
+            await cola_pred.put(None)
+            await predictor
+    finally:
+        for anillo in anillos:
+            anillo.cerrar()
+
+    return [s.resumen() for s in stats]
+
+
+
+def imprimir_resumen(resumenes):
+    print(f"{'Fuente':<30}{'Frames':>8}{'FPS':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Detección':>11}")
+    for r in resumenes:
+        print(f"{r['fuente'][-30:]:<30}{r['frames']:>8}{r['fps']:>8.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['deteccion']*100:>10.1f}%")
+
+
+
+def run(fuentes, pipeline="mediapipe", n_workers=None, duracion_s=None, alto=480, ancho=640,
+        n_huecos=4, max_lote=32):
+    """
+    Procesa varias fuentes de video a la vez compartiendo un unico modelo cargado.
+
+    Cada fuente se decodifica en un hilo y escribe sus frames en un anillo de memoria
+    compartida. Un pool de procesos (cada uno con su MediaPipe) extrae landmarks o features
+    leyendo directamente del anillo, y un unico predictor en el proceso principal clasifica
+    por lotes las caracteristicas de todas las fuentes.
+
+    Args:
+    --------
+        - fuentes (list): Rutas de video o indices de camara.
+        - pipeline (str, opcional): "clasico" o "mediapipe". Por defecto, "mediapipe".
+        - n_workers (int, opcional): Procesos de extraccion. Por defecto, uno por nucleo.
+        - duracion_s (float, opcional): Tiempo maximo de procesado. Por defecto, hasta que acaben las fuentes
+          o se pulse Ctrl+C (las camaras no acaban nunca): se dejan de leer frames, se terminan los que
+          estan en vuelo y se devuelve el resumen igual que al acabar.
+        - alto, ancho (int, opcional): Tamanyo al que se redimensionan los frames. Por defecto, 480x640.
+        - n_huecos (int, opcional): Frames en vuelo por fuente. Por defecto, 4.
+        - max_lote (int, opcional): Tamanyo maximo de cada lote de prediccion.
+
+    Retorna:
+    --------
+        - list[dict]: FPS, latencia (p50/p95) y tasa de deteccion de cada fuente.
+    """
+    modelo, le = cargar_modelo(pipeline)
+
+    #El primer Ctrl+C para las fuentes; el segundo interrumpe como siempre
+    parar = threading.Event()
+    anterior = None
+    if threading.current_thread() is threading.main_thread():
+        def _al_pulsar_ctrl_c(*_):
+            parar.set()
+            signal.signal(signal.SIGINT, anterior)
+            print("\nParando las fuentes (Ctrl+C otra vez para salir sin esperar)...")
+        anterior = signal.signal(signal.SIGINT, _al_pulsar_ctrl_c)
+    try:
+        resumenes = asyncio.run(_multistream(fuentes, pipeline, modelo, le, n_workers, duracion_s,
+                                             alto, ancho, n_huecos, max_lote, parar))
+    finally:
+        if anterior is not None:
+            signal.signal(signal.SIGINT, anterior)
+    imprimir_resumen(resumenes)
+    return resumenes
+
+
+
+def escalar(fuentes, valores_n=(1, 2, 4, 8), pipeline="mediapipe", **kwargs):
+    #Repite el procesado con N fuentes crecientes para ver como escala el FPS y la latencia
+    filas = []
+    for n in valores_n:
+        seleccion = [fuentes[i % len(fuentes)] for i in range(n)]
+        print(f"\n--- {n} fuentes ---")
+        resumenes = run(seleccion, pipeline=pipeline, **kwargs)
+        filas.append({
+            "n": n,
+            "fps_medio": float(np.mean([r["fps"] for r in resumenes])),
+            "fps_total": float(np.sum([r["fps"] for r in resumenes])),
+            "p95_ms_max": float(np.max([r["p95_ms"] for r in resumenes])),
+        })
+
+    print(f"\n{'N':>3}{'FPS/fuente':>12}{'FPS total':>11}{'p95 máx (ms)':>14}")
+    for f in filas:
+        print(f"{f['n']:>3}{f['fps_medio']:>12.1f}{f['fps_total']:>11.1f}{f['p95_ms_max']:>14.1f}")
+    return filas
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Procesado de varias fuentes de video con un solo modelo")
+    parser.add_argument("fuentes", nargs="+", help="Rutas de video o indices de camara")
+    parser.add_argument("--pipeline", choices=["clasico", "mediapipe"], default="mediapipe")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--duracion", type=float, default=None)
+    parser.add_argument("--escalar", type=int, nargs="*", default=None,
+                        help="Valores de N para medir el escalado (p.ej. --escalar 1 2 4 8)")
+    args = parser.parse_args()
+
+    fuentes = [int(f) if f.isdigit() else f for f in args.fuentes]
+    if args.escalar:
+        escalar(fuentes, args.escalar, pipeline=args.pipeline, n_workers=args.workers, duracion_s=args.duracion)
+    else:
+        run(fuentes, pipeline=args.pipeline, n_workers=args.workers, duracion_s=args.duracion)
@@ -0,0 +1,134 @@
+import cv2
+
+#Perfiles de rendimiento: todos los ajustes que afectan a FPS y latencia en un solo sitio
+PERFILES = {
+    "baja_latencia": {
+        "ancho": 640, "alto": 480, "fps": 30, "mjpeg": True,
+        "complejidad": 0, "conf_deteccion": 0.5, "conf_seguimiento": 0.5,
+        "escala": 0.5,          #Factor de reduccion de la imagen que entra en MediaPipe
+        "buffer_size": 3,       #Ventana de suavizado de predicciones
+        "wait_ms": 1,
+    },
+    "equilibrado": {
+        "ancho": 640, "alto": 480, "fps": 30, "mjpeg": True,
+        "complejidad": 1, "conf_deteccion": 0.5, "conf_seguimiento": 0.5,
+        "escala": 1.0,
+        "buffer_size": 5,
+        "wait_ms": 1,
+    },
+    "preciso": {
+        "ancho": 1280, "alto": 720, "fps": 30, "mjpeg": True,
+        "complejidad": 1, "conf_deteccion": 0.7, "conf_seguimiento": 0.7,
+        "escala": 1.0,
+        "buffer_size": 9,
+        "wait_ms": 1,
+    },
+}
+
+
+def obtener_perfil(nombre):
+    """
+    Devuelve la configuracion de un perfil de rendimiento.
+
+    Args:
+    --------
+        - nombre (str | dict | None): Nombre del perfil, un perfil ya resuelto o None.
+
+    Retorna:
+    --------
+        - dict | None: Ajustes del perfil, o None si no se usa ningun perfil.
+    """
+    if nombre is None or isinstance(nombre, dict):
+        return nombre
+    if nombre not in PERFILES:
+        raise ValueError(f"Perfil desconocido '{nombre}'. Disponibles: {', '.join(PERFILES)}")
+    return PERFILES[nombre]
+
+
+
+def pedir_perfil():
+    #Pregunta el perfil en los menus; Enter deja los valores por defecto de cada bucle
+    opciones = "/".join(PERFILES)
+    nombre = input(f"Perfil de rendimiento [{opciones}] (Enter para el de por defecto): ").strip().lower()
+    if nombre and nombre not in PERFILES:
+        print("Perfil no válido, se usan los valores por defecto.")
+        return None
+    return nombre or None
+
+
+
+def abrir_camara(fuente=0, perfil=None):
+    """
+    Abre la fuente de video aplicando los ajustes de captura del perfil.
+
+    Con una camara (indice entero) y un perfil, pide MJPEG a la resolucion y FPS del perfil y un
+    buffer de 1 frame, para leer siempre el frame mas reciente en lugar de uno encolado. Con un
+    fichero de video o sin perfil se abre tal cual.
+
+    Args:
+    --------
+        - fuente (int | str, opcional): Indice de camara, ruta de video, ruta de una sesion .ses o un
+          `LectorSesion` ya abierto. Por defecto, 0.
+        - perfil (str | dict, opcional): Perfil de rendimiento. Por defecto, None.
+
+    Retorna:
+    --------
+        - cv2.VideoCapture: Captura abierta (comprobar con isOpened()).
+    """
+    #Sesiones grabadas con comun.sesiones: el lector tiene la misma interfaz que VideoCapture
+    if isinstance(fuente, str) and fuente.endswith(".ses"):
+        from .sesiones import LectorSesion
+        return LectorSesion(fuente)
+    if not isinstance(fuente, (int, str)):
+        return fuente
+
+    perfil = obtener_perfil(perfil)
+    cap = cv2.VideoCapture(fuente)
+    if perfil is None or not isinstance(fuente, int) or not cap.isOpened():
+        return cap
+
+    #El FOURCC se pide antes que la resolucion: algunos drivers solo dan MJPEG a alta resolucion
+    if perfil["mjpeg"]:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, perfil["ancho"])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, perfil["alto"])
+    cap.set(cv2.CAP_PROP_FPS, perfil["fps"])
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+
+def crear_hands(perfil=None):
+    """
+    Crea el detector de manos de MediaPipe para video con los ajustes del perfil
+    (complejidad del modelo y umbrales de confianza). Sin perfil usa los valores por defecto.
+
+    Args:
+    --------
+        - perfil (str | dict, opcional): Perfil de rendimiento. Por defecto, None.
+
+    Retorna:
+    --------
+        - mp.solutions.hands.Hands: Detector listo para usar como context manager.
+    """
+    import mediapipe as mp
+
+    perfil = obtener_perfil(perfil)
+    if perfil is None:
+        return mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1)
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=1,
+        model_complexity=perfil["complejidad"],
+        min_detection_confidence=perfil["conf_deteccion"],
+        min_tracking_confidence=perfil["conf_seguimiento"],
+    )
+
+
+
+def reducir(frame, perfil=None):
+    #Reduce el frame que entra en MediaPipe; los landmarks son relativos a la imagen y no cambian de escala
+    perfil = obtener_perfil(perfil)
+    if perfil is None or perfil["escala"] >= 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=perfil["escala"], fy=perfil["escala"], interpolation=cv2.INTER_AREA)
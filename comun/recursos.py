@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import platform
+import functools
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource   #No existe en Windows
+except ImportError:
+    resource = None
+
+EXTENSIONES_IGNORADAS = (".py", ".pyc", ".pyd", ".so")   #Imports perezosos dentro de una etapa
+
+_activo = None      #Configuracion del informe en curso (None = contabilidad desactivada)
+_pila = []          #Etapas abiertas (una etapa puede llamar a otra)
+_hook_instalado = False
+
+
+
+def _escritura(modo, flags):
+    #Evento "open" de la auditoria: open() da el modo en texto, os.open solo las flags
+    if isinstance(modo, str):
+        return any(c in modo for c in "wax+")
+    return bool(flags and flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT))
+
+
+
+def _registrar_fichero(ruta, escritura):
+    for medida in _pila:
+        (medida["escritos"] if escritura else medida["leidos"]).add(ruta)
+
+
+
+def _hook_auditoria(evento, args):
+    if evento != "open" or not _pila:
+        return
+    ruta, modo, flags = (tuple(args) + (None, None, None))[:3]
+    if isinstance(ruta, bytes):
+        ruta = os.fsdecode(ruta)
+    if not isinstance(ruta, str) or ruta.endswith(EXTENSIONES_IGNORADAS):
+        return
+    _registrar_fichero(os.path.abspath(ruta), _escritura(modo, flags))
+
+
+
+def _envolver_cv2(cv2, nombre, escritura):
+    #cv2.imread/imwrite abren los ficheros en C y no pasan por la auditoria de Python
+    original = getattr(cv2, nombre)
+
+    @functools.wraps(original)
+    def envoltura(ruta, *args, **kwargs):
+        if _pila:
+            _registrar_fichero(os.path.abspath(ruta), escritura)
+        return original(ruta, *args, **kwargs)
+
+    envoltura._original = original
+    setattr(cv2, nombre, envoltura)
+
+
+
+def _leer_proc_io():
+    #Bytes de E/S del proceso (todas sus hebras). Solo Linux
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {clave: int(valor) for clave, valor in (linea.split(":") for linea in f)}
+    except (OSError, ValueError):
+        return None
+
+
+
+def _rss_pico_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 if sys.platform != "darwin" else pico / 1024**2   #KB en Linux, bytes en macOS
+
+
+
+def activar(ruta_informe="informe_recursos.json", dir_perfiles=None, memoria=True):
+    """
+    Activa la contabilidad de recursos de las etapas offline (las funciones decoradas con `etapa`).
+    Mientras no se active, las etapas se ejecutan sin ninguna medicion.
+
+    Args:
+    --------
+        - ruta_informe (str, opcional): JSON donde se escribe el informe (se reescribe al terminar cada etapa).
+          Por defecto, "informe_recursos.json".
+        - dir_perfiles (str, opcional): Si se indica, se guarda un volcado de cProfile de cada etapa en ese
+          directorio (se abre con `python -m pstats` o snakeviz). Por defecto, None.
+        - memoria (bool, opcional): Medir el pico de memoria de Python con tracemalloc (ralentiza las etapas
+          que reservan mucha memoria). Por defecto, True.
+    """
+    global _activo, _hook_instalado
+    if not _hook_instalado:
+        #Los hooks de auditoria no se pueden quitar: se instala uno y solo actua con etapas abiertas
+        sys.addaudithook(_hook_auditoria)
+        _hook_instalado = True
+
+    try:
+        import cv2
+        if not hasattr(cv2.imread, "_original"):
+            _envolver_cv2(cv2, "imread", False)
+            _envolver_cv2(cv2, "imwrite", True)
+    except ImportError:
+        pass
+
+    if dir_perfiles:
+        os.makedirs(dir_perfiles, exist_ok=True)
+    _activo = {
+        "ruta": ruta_informe,
+        "dir_perfiles": dir_perfiles,
+        "memoria": memoria,
+        "informe": {
+            "inicio": datetime.now().isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "etapas": [],
+        },
+    }
+    print(f"Contabilidad de recursos activada -> {ruta_informe}")
+
+
+
+def desactivar():
+    global _activo
+    _activo = None
+    try:
+        import cv2
+        for nombre in ("imread", "imwrite"):
+            funcion = getattr(cv2, nombre)
+            if hasattr(funcion, "_original"):
+                setattr(cv2, nombre, funcion._original)
+    except ImportError:
+        pass
+
+
+
+def _guardar_informe():
+    #Escritura atomica para que el informe nunca quede a medias si se interrumpe el programa
+    ruta = _activo["ruta"]
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_activo["informe"], f, indent=2, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+
+@contextmanager
+def medir(nombre):
+    """
+    Mide una etapa: tiempo real, tiempo de CPU (del proceso y de sus hijos), pico de RSS, pico de
+    memoria de Python (tracemalloc), ficheros leidos/escritos y bytes de E/S. Al terminar anyade
+    la etapa al informe JSON y muestra un resumen.
+
+    El pico de RSS de `getrusage` es el maximo de toda la vida del proceso, asi que se guarda tambien
+    cuanto ha crecido durante la etapa (0 si la etapa no supera el pico de una etapa anterior).
+    """
+    if _activo is None:
+        yield
+        return
+
+    medida = {"leidos": set(), "escritos": set(), "pico_hijas": 0}
+    padre = _pila[-1] if _pila else None
+
+    memoria = _activo["memoria"]
+    if memoria:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            medida["tracemalloc_propio"] = True
+        elif padre is not None:
+            #Guardamos el pico de la etapa exterior antes de reiniciarlo para esta
+            padre["pico_hijas"] = max(padre["pico_hijas"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    #cProfile no admite perfiles anidados: solo se perfila la etapa exterior
+    perfil = cProfile.Profile() if _activo["dir_perfiles"] and padre is None else None
+
+    rss_antes = _rss_pico_mb()
+    io_antes = _leer_proc_io()
+    tiempos_antes = os.times()
+    inicio = time.perf_counter()
+    _pila.append(medida)
+    if perfil is not None:
+        perfil.enable()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if perfil is not None:
+            perfil.disable()
+        _pila.pop()
+        duracion = time.perf_counter() - inicio
+        tiempos = os.times()
+        io_despues = _leer_proc_io()
+        rss_despues = _rss_pico_mb()
+
+        pico_python = None
+        if memoria:
+            pico_python = max(medida["pico_hijas"], tracemalloc.get_traced_memory()[1])
+            if padre is not None:
+                padre["pico_hijas"] = max(padre["pico_hijas"], pico_python)
+            if medida.get("tracemalloc_propio"):
+                tracemalloc.stop()
+
+        cpu = (tiempos.user - tiempos_antes.user) + (tiempos.system - tiempos_antes.system)
+        cpu_hijos = ((tiempos.children_user - tiempos_antes.children_user)
+                     + (tiempos.children_system - tiempos_antes.children_system))
+        registro = {
+            "etapa": nombre,
+            "nivel": len(_pila),
+            "error": error,
+            "tiempo_s": round(duracion, 4),
+            "cpu_s": round(cpu, 4),
+            "cpu_hijos_s": round(cpu_hijos, 4),
+            "uso_cpu": round(cpu / duracion, 2) if duracion > 0 else None,
+            "rss_pico_mb": None if rss_despues is None else round(rss_despues, 1),
+            "rss_incremento_pico_mb": None if rss_despues is None else round(rss_despues - rss_antes, 1),
+            "python_pico_mb": None if pico_python is None else round(pico_python / 1024**2, 1),
+            "ficheros_leidos": len(medida["leidos"]),
+            "ficheros_escritos": len(medida["escritos"]),
+        }
+        if io_antes and io_despues:
+            registro.update({
+                "bytes_leidos": io_despues["rchar"] - io_antes["rchar"],
+                "bytes_escritos": io_despues["wchar"] - io_antes["wchar"],
+                "bytes_disco_leidos": io_despues["read_bytes"] - io_antes["read_bytes"],
+                "bytes_disco_escritos": io_despues["write_bytes"] - io_antes["write_bytes"],
+            })
+        if perfil is not None:
+            ruta_perfil = os.path.join(_activo["dir_perfiles"],
+                                       f"{nombre}_{len(_activo['informe']['etapas']) + 1}.prof")
+            perfil.dump_stats(ruta_perfil)
+            registro["perfil"] = ruta_perfil
+
+        _activo["informe"]["etapas"].append(registro)
+        _guardar_informe()
+        _imprimir(registro)
+
+
+
+def _imprimir(r):
+    partes = [f"{r['tiempo_s']:.2f}s", f"CPU {r['cpu_s']:.2f}s (x{r['uso_cpu'] or 0:.1f})"]
+    if r["rss_pico_mb"] is not None:
+        partes.append(f"RSS pico {r['rss_pico_mb']:.0f} MB")
+    if r["python_pico_mb"] is not None:
+        partes.append(f"Python pico {r['python_pico_mb']:.0f} MB")
+    partes.append(f"{r['ficheros_leidos']} ficheros leídos / {r['ficheros_escritos']} escritos")
+    if "bytes_leidos" in r:
+        partes.append(f"E/S {r['bytes_leidos'] / 1e6:.1f} MB leídos / {r['bytes_escritos'] / 1e6:.1f} MB escritos")
+    print(f"[recursos] {r['etapa']}: " + " | ".join(partes))
+
+
+
+def etapa(nombre):
+    """
+    Decorador para las etapas offline (preprocesado, construccion del dataset, entrenamiento).
+    Sin `activar()` no mide nada y solo anyade una comprobacion por llamada.
+
+    Args:
+    --------
+        - nombre (str): Nombre de la etapa en el informe.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with medir(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+from .servidor_inferencia import cargar_modelo, MODELOS
+from .arranque import Arranque
+from .perfiles import PERFILES
+
+CLIPS_DIR = "replay"                                  #Una carpeta por letra con clips grabados
+UMBRALES_FILE = os.path.join(CLIPS_DIR, "umbrales.json")
+EXT_VIDEO = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".ses")   #.ses: sesiones de comun.sesiones
+
+
+def _listar_clips(clips_dir):
+    clips = []
+    for letra in sorted(os.listdir(clips_dir)):
+        carpeta = os.path.join(clips_dir, letra)
+        if not os.path.isdir(carpeta):
+            continue
+        for fichero in sorted(os.listdir(carpeta)):
+            if fichero.lower().endswith(EXT_VIDEO):
+                clips.append((os.path.join(carpeta, fichero), letra))
+    return clips
+
+
+
+def _reproducir(pipeline, clip, modelo, le, perfil=None):
+    #Pasa un clip por el bucle en tiempo real del pipeline sin abrir ventanas
+    if pipeline == "clasico":
+        from clasico.src.prediccion_tiempo_real import predecir
+        return predecir(modelo, le, buffer_size=5, fuente=clip, mostrar=False, perfil=perfil)
+
+    #Mismo modelo ya cargado para todos los clips; la ruta solo sirve para encontrar su seleccion de caracteristicas
+    from pipeline_mediapipe.src.prediccion_mp import prediccion_tiempo_real_mediapipe
+    arranque = Arranque(lambda m=modelo, c=le: (m, c), informe=False)
+    return prediccion_tiempo_real_mediapipe(MODELOS["mediapipe"][0], fuente=clip, mostrar=False, perfil=perfil,
+                                            arranque=arranque)
+
+
+
+def evaluar_pipeline(pipeline, clips_dir=CLIPS_DIR, perfil=None):
+    """
+    Reproduce todos los clips etiquetados a traves del bucle en tiempo real de un pipeline
+    (con la visualizacion desactivada) y calcula sus metricas de extremo a extremo.
+
+    Args:
+    --------
+        - pipeline (str): "clasico" o "mediapipe".
+        - clips_dir (str, opcional): Directorio con una carpeta de clips por letra. Por defecto, "replay".
+        - perfil (str, opcional): Perfil de rendimiento de `comun.perfiles`. Con clips grabados solo
+          influyen los ajustes de procesado (MediaPipe, reduccion, suavizado), no los de la camara.
+
+    Retorna:
+    --------
+        - dict: FPS, percentiles de latencia por frame (ms), tasa de deteccion, accuracy global
+          y accuracy por letra de la prediccion suavizada.
+    """
+    modelo, le = cargar_modelo(pipeline)
+    latencias, aciertos, detectados, frames = [], {}, 0, 0
+
+    for clip, letra in _listar_clips(clips_dir):
+        historial = _reproducir(pipeline, clip, modelo, le, perfil)
+        frames += len(historial)
+        for registro in historial:
+            latencias.append(registro["latencia"])
+            if registro["etiqueta"] is not None:
+                detectados += 1
+                a = aciertos.setdefault(letra, [0, 0])
+                a[0] += int(registro["etiqueta"] == letra)
+                a[1] += 1
+
+    if not frames:
+        raise FileNotFoundError(f"No hay clips en '{clips_dir}'.")
+
+    lat_ms = np.array(latencias) * 1000
+    total_aciertos = sum(a[0] for a in aciertos.values())
+    return {
+        "frames": frames,
+        "fps": frames / (lat_ms.sum() / 1000),
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "deteccion": detectados / frames,
+        "accuracy": total_aciertos / detectados if detectados else 0.0,
+        "accuracy_por_letra": {l: a[0] / a[1] for l, a in sorted(aciertos.items())},
+    }
+
+
+
+def comprobar_umbrales(metricas, umbrales):
+    """
+    Compara las metricas de un pipeline con sus umbrales guardados.
+
+    Umbrales admitidos: fps_min, p95_ms_max, p99_ms_max, deteccion_min, accuracy_min y
+    accuracy_letra_min (se aplica a cada letra).
+
+    Retorna:
+    --------
+        - list[str]: Descripcion de cada umbral incumplido (vacia si todo esta bien).
+    """
+    fallos = []
+    minimos = {"fps_min": "fps", "deteccion_min": "deteccion", "accuracy_min": "accuracy"}
+    maximos = {"p95_ms_max": "p95_ms", "p99_ms_max": "p99_ms"}
+
+    for clave, metrica in minimos.items():
+        if clave in umbrales and metricas[metrica] < umbrales[clave]:
+            fallos.append(f"{metrica} = {metricas[metrica]:.3f} < {umbrales[clave]:.3f}")
+    for clave, metrica in maximos.items():
+        if clave in umbrales and metricas[metrica] > umbrales[clave]:
+            fallos.append(f"{metrica} = {metricas[metrica]:.2f} > {umbrales[clave]:.2f}")
+    if "accuracy_letra_min" in umbrales:
+        for letra, acc in metricas["accuracy_por_letra"].items():
+            if acc < umbrales["accuracy_letra_min"]:
+                fallos.append(f"accuracy de '{letra}' = {acc:.3f} < {umbrales['accuracy_letra_min']:.3f}")
+    return fallos
+
+
+
+def umbrales_desde_metricas(metricas, margen_rendimiento=0.2, margen_accuracy=0.03):
+    #Umbrales a partir de una ejecucion de referencia, con margen para el ruido de medida
+    return {
+        "fps_min": metricas["fps"] * (1 - margen_rendimiento),
+        "p95_ms_max": metricas["p95_ms"] * (1 + margen_rendimiento),
+        "p99_ms_max": metricas["p99_ms"] * (1 + margen_rendimiento),
+        "deteccion_min": max(metricas["deteccion"] - margen_accuracy, 0.0),
+        "accuracy_min": max(metricas["accuracy"] - margen_accuracy, 0.0),
+        "accuracy_letra_min": max(min(metricas["accuracy_por_letra"].values(), default=0.0) - margen_accuracy, 0.0),
+    }
+
+
+
+def run(pipelines=("clasico", "mediapipe"), clips_dir=CLIPS_DIR, umbrales_file=UMBRALES_FILE, guardar_umbrales=False,
+        perfiles=(None,)):
+    """
+    Ejecuta la suite de regresion: reproduce los clips por cada pipeline, muestra sus metricas
+    y las compara con los umbrales guardados. Con `guardar_umbrales=True` guarda las metricas
+    actuales (con margen) como nueva referencia.
+
+    Con `perfiles` se repite la medida con cada perfil de rendimiento; los umbrales de cada
+    combinacion se guardan bajo la clave "pipeline:perfil".
+
+    Retorna:
+    --------
+        - bool: True si ningun pipeline incumple sus umbrales.
+    """
+    umbrales = {}
+    if os.path.exists(umbrales_file):
+        with open(umbrales_file, "r", encoding="utf-8") as f:
+            umbrales = json.load(f)
+
+    correcto = True
+    for pipeline, perfil in [(p, f) for p in pipelines for f in perfiles]:
+        clave = pipeline if perfil is None else f"{pipeline}:{perfil}"
+        metricas = evaluar_pipeline(pipeline, clips_dir, perfil)
+        print(f"\n--- {clave} ---")
+        print(f"{metricas['frames']} frames | {metricas['fps']:.1f} FPS | latencia p50={metricas['p50_ms']:.1f} ms "
+              f"p95={metricas['p95_ms']:.1f} ms p99={metricas['p99_ms']:.1f} ms")
+        print(f"Detección {metricas['deteccion']*100:.1f}% | Accuracy {metricas['accuracy']*100:.1f}%")
+        for letra, acc in metricas["accuracy_por_letra"].items():
+            print(f"  {letra:<4}{acc*100:6.1f}%")
+
+        if guardar_umbrales:
+            umbrales[clave] = umbrales_desde_metricas(metricas)
+            continue
+
+        if clave not in umbrales:
+            print("Sin umbrales guardados para este pipeline.")
+            continue
+        fallos = comprobar_umbrales(metricas, umbrales[clave])
+        for fallo in fallos:
+            print(f"FALLO: {fallo}")
+        if not fallos:
+            print("OK: dentro de los umbrales.")
+        correcto = correcto and not fallos
+
+    if guardar_umbrales:
+        with open(umbrales_file, "w", encoding="utf-8") as f:
+            json.dump(umbrales, f, indent=2)
+        print(f"\nUmbrales guardados en {umbrales_file}")
+
+    return correcto
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suite de regresion de rendimiento y accuracy sobre clips grabados")
+    parser.add_argument("--pipeline", choices=["clasico", "mediapipe", "ambos"], default="ambos")
+    parser.add_argument("--clips", default=CLIPS_DIR)
+    parser.add_argument("--umbrales", default=UMBRALES_FILE)
+    parser.add_argument("--guardar-umbrales", action="store_true",
+                        help="Guarda las metricas actuales como referencia en lugar de comprobarlas")
+    parser.add_argument("--perfil", choices=list(PERFILES) + ["todos"], default=None,
+                        help="Perfil de rendimiento con el que se reproducen los clips")
+    args = parser.parse_args()
+
+    pipelines = ("clasico", "mediapipe") if args.pipeline == "ambos" else (args.pipeline,)
+    perfiles = tuple(PERFILES) if args.perfil == "todos" else (args.perfil,)
+    sys.exit(0 if run(pipelines, args.clips, args.umbrales, args.guardar_umbrales, perfiles) else 1)
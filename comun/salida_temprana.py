@@ -0,0 +1,126 @@
+import math
+from collections import deque
+import numpy as np
+
+
+class BosqueSalidaTemprana:
+    """
+    Envoltorio de un Random Forest entrenado que evalua los arboles en orden fijo y deja de
+    evaluar en cuanto la clase ganadora ya no puede cambiar.
+
+    Cada arbol aporta como mucho 1 voto a una clase. Si tras t arboles la ventaja de la clase
+    lider sobre la segunda es mayor que el numero de arboles que quedan, el resultado es el mismo
+    que con el bosque completo. Opcionalmente se puede parar antes con una cota de Hoeffding
+    (`delta`), aceptando una probabilidad pequenya de cambiar la etiqueta.
+
+    Tiene la misma interfaz de prediccion que el modelo original (predict, predict_proba, classes_).
+
+    Args:
+    --------
+        - rf (RandomForestClassifier): Bosque entrenado.
+        - delta (float, opcional): Probabilidad de error admitida para la parada por confianza.
+          Por defecto, None (solo parada exacta).
+        - bloque (int, opcional): Arboles evaluados entre comprobaciones de parada. Por defecto, 8.
+        - n_verificacion (int, opcional): Ultimas entradas que se guardan para comprobar en `resumen()`
+          que las etiquetas coinciden con las del bosque completo. Por defecto, 500.
+    """
+
+    def __init__(self, rf, delta=None, bloque=8, n_verificacion=500):
+        self.rf = rf
+        self.classes_ = rf.classes_
+        self.delta = delta
+        self.bloque = bloque
+        self.arboles = [est.tree_ for est in rf.estimators_]
+
+        #Probabilidad de cada clase en cada hoja, normalizada para que cada arbol sume 1 voto
+        self.valores = []
+        for arbol in self.arboles:
+            v = arbol.value[:, 0, :]
+            self.valores.append(v / np.maximum(v.sum(axis=1, keepdims=True), 1e-12))
+
+        self.muestras = 0
+        self.arboles_evaluados = 0
+        self.entradas = deque(maxlen=n_verificacion)
+
+
+    def _votos(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32).reshape(1, -1)
+        self.entradas.append(x[0].copy())
+        votos = np.zeros(len(self.classes_))
+        total = len(self.arboles)
+        t = 0
+
+        while t < total:
+            fin = min(t + self.bloque, total)
+            for i in range(t, fin):
+                votos += self.valores[i][self.arboles[i].apply(x)[0]]
+            t = fin
+
+            if len(votos) < 2 or t == total:
+                break
+            segundo, primero = np.partition(votos, -2)[-2:]
+            margen = primero - segundo
+
+            #Parada exacta: los arboles restantes no pueden dar la vuelta al resultado
+            if margen > total - t:
+                break
+            #Parada por confianza (Hoeffding sobre la diferencia media de votos, en [-1, 1])
+            if self.delta is not None and margen / t > math.sqrt(2 * math.log(1 / self.delta) / t):
+                break
+
+        self.muestras += 1
+        self.arboles_evaluados += t
+        return votos / t
+
+
+    def predict_proba(self, X):
+        return np.vstack([self._votos(x) for x in np.asarray(X)])
+
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+    def arboles_medios(self):
+        return self.arboles_evaluados / self.muestras if self.muestras else 0.0
+
+
+    def resumen(self):
+        print(f"Salida temprana: {self.arboles_medios():.1f} de {len(self.arboles)} árboles "
+              f"evaluados de media en {self.muestras} predicciones")
+        if self.entradas:
+            #Sin `delta` la parada es exacta: las etiquetas tienen que coincidir siempre con las del bosque completo
+            verificar_salida_temprana(self.rf, np.array(self.entradas), delta=self.delta, bloque=self.bloque)
+
+
+
+def verificar_salida_temprana(rf, X, delta=None, bloque=8):
+    """
+    Compara las etiquetas de la salida temprana con las del bosque completo. `BosqueSalidaTemprana.resumen`
+    la usa con las ultimas entradas que ha visto (los frames del bucle en tiempo real).
+
+    Args:
+    --------
+        - rf (RandomForestClassifier): Bosque entrenado.
+        - X (np.array): Muestras de prueba.
+        - delta (float, opcional): Igual que en BosqueSalidaTemprana.
+        - bloque (int, opcional): Igual que en BosqueSalidaTemprana.
+
+    Retorna:
+    --------
+        - dict: Fraccion de etiquetas iguales y media de arboles evaluados.
+    """
+    bosque = BosqueSalidaTemprana(rf, delta=delta, bloque=bloque, n_verificacion=0)
+    iguales = float(np.mean(bosque.predict(X) == rf.predict(X)))
+    print(f"Etiquetas iguales al bosque completo: {iguales*100:.2f}% en {len(X)} predicciones "
+          f"({bosque.arboles_medios():.1f} árboles de media)")
+    return {"coincidencia": iguales, "arboles_medios": bosque.arboles_medios()}
+
+
+
+def envolver_si_es_bosque(modelo, delta=None):
+    #Aplica la salida temprana solo a modelos de arboles (RF / ExtraTrees) y deja el resto igual
+    if hasattr(modelo, "estimators_") and hasattr(modelo.estimators_[0], "tree_"):
+        return BosqueSalidaTemprana(modelo, delta=delta)
+    print("El modelo no es un bosque de árboles; se usa la evaluación completa.")
+    return modelo
@@ -0,0 +1,159 @@
+import os
+import json
+import pickle
+
+#sklearn se importa dentro de las funciones de entrenamiento: la prediccion en tiempo real importa
+#`cargar_seleccion` y con el modelo destilado no debe cargar sklearn
+from .intercambio_modelos import guardar_modelo_atomico
+
+
+def ruta_seleccion(ruta_modelo):
+    #La seleccion de caracteristicas se guarda junto al modelo que la usa
+    return os.path.splitext(ruta_modelo)[0] + "_features.json"
+
+
+
+def cargar_seleccion(ruta_modelo, modelo=None):
+    """
+    Carga la seleccion de caracteristicas guardada junto a un modelo.
+
+    Args:
+    --------
+        - ruta_modelo (str): Ruta del .pkl del modelo.
+        - modelo (opcional): Modelo cargado. Si se indica, la seleccion solo se devuelve si el modelo
+          espera ese numero de caracteristicas (un reentrenamiento completo la invalida).
+
+    Retorna:
+    --------
+        - dict | None: {"grupos", "indices", ...} o None si el modelo usa todas las caracteristicas.
+    """
+    ruta = ruta_seleccion(ruta_modelo)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "r", encoding="utf-8") as f:
+        seleccion = json.load(f)
+
+    if modelo is not None:
+        base = getattr(modelo, "rf", modelo)  #Modelos envueltos (salida temprana)
+        n = getattr(base, "n_features_in_", None)
+        if n is not None and n != len(seleccion["indices"]):
+            return None
+    return seleccion
+
+
+
+def _columnas(grupos, elegidos):
+    #Columnas de los grupos elegidos, en el orden canonico del extractor
+    return [c for nombre, cols in grupos.items() if nombre in elegidos for c in cols]
+
+
+
+def _entrenar_y_medir(X_train, X_test, y_train, y_test, columnas, n_estimators, random_state):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+
+    rf = RandomForestClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                random_state=random_state, n_jobs=-1)
+    rf.fit(X_train[:, columnas], y_train)
+    return rf, accuracy_score(y_test, rf.predict(X_test[:, columnas]))
+
+
+
+def seleccionar_grupos(X, y, grupos, tolerancia=0.01, n_estimators=200, random_state=111, aumentar=None,
+                       origen=None):
+    """
+    Busca el menor conjunto de grupos de caracteristicas cuyo modelo pierde como mucho
+    `tolerancia` de accuracy respecto al modelo con todas.
+
+    Los grupos se ordenan por la suma de `feature_importances_` del Random Forest completo y se
+    busca por biseccion cuantos de los mas importantes hacen falta (se asume que la accuracy no
+    empeora al anyadir grupos, asi bastan log2(n) entrenamientos).
+
+    Args:
+    --------
+        - X (np.array): Matriz de caracteristicas completa.
+        - y (np.array): Etiquetas.
+        - grupos (dict): Nombre del grupo -> columnas de X que calcula (en el orden del extractor).
+        - tolerancia (float, opcional): Perdida de accuracy admitida. Por defecto, 0.01.
+        - n_estimators (int, opcional): Arboles de cada Random Forest. Por defecto, 200.
+        - random_state (int, opcional): Semilla. Por defecto, 111.
+        - aumentar (callable, opcional): Funcion (X, y) -> (X, y) con data augmentation. Solo se aplica
+          a la parte de entrenamiento, despues de separar el test. Por defecto, None.
+        - origen (np.array, opcional): Muestra de la que sale cada fila, si X ya trae copias aumentadas.
+          El test se separa por muestra (`separar_train_test`): con un split por filas las accuracies
+          que se comparan con la tolerancia salen infladas. Por defecto, split por filas.
+
+    Retorna:
+    --------
+        - seleccion (dict): Grupos elegidos, indices de columnas, accuracy completa y reducida e
+          importancia de cada grupo.
+        - rf (RandomForestClassifier): Modelo entrenado solo con las columnas elegidas.
+        - le (LabelEncoder): Codificador de etiquetas.
+    """
+    from sklearn.preprocessing import LabelEncoder
+    from .cache_dataset import separar_train_test
+
+    le = LabelEncoder()
+    y_enc = le.fit_transform(y)
+    idx_train, idx_test = separar_train_test(y_enc, origen, 0.2, random_state)
+    X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y_enc[idx_train], y_enc[idx_test]
+    if aumentar is not None:
+        X_train, y_train = aumentar(X_train, y_train)
+
+    todas = list(range(X.shape[1]))
+    rf, acc_base = _entrenar_y_medir(X_train, X_test, y_train, y_test, todas, n_estimators, random_state)
+    importancia = {nombre: float(rf.feature_importances_[cols].sum()) for nombre, cols in grupos.items()}
+    orden = sorted(grupos, key=importancia.get, reverse=True)
+    print(f"Accuracy con todas las caracteristicas: {acc_base*100:.2f}%")
+
+    #Biseccion sobre el numero de grupos (k = todos ya cumple)
+    mejor = (len(orden), rf, acc_base)
+    bajo, alto = 1, len(orden) - 1
+    while bajo <= alto:
+        k = (bajo + alto) // 2
+        columnas = _columnas(grupos, orden[:k])
+        rf_k, acc_k = _entrenar_y_medir(X_train, X_test, y_train, y_test, columnas, n_estimators, random_state)
+        print(f"  {k} grupos ({len(columnas)} caracteristicas): {acc_k*100:.2f}%")
+        if acc_k >= acc_base - tolerancia:
+            mejor = (k, rf_k, acc_k)
+            alto = k - 1
+        else:
+            bajo = k + 1
+
+    k, rf_sel, acc_sel = mejor
+    elegidos = [nombre for nombre in grupos if nombre in orden[:k]]
+    seleccion = {
+        "grupos": elegidos,
+        "indices": _columnas(grupos, elegidos),
+        "accuracy_base": acc_base,
+        "accuracy": acc_sel,
+        "importancia": importancia,
+    }
+    return seleccion, rf_sel, le
+
+
+
+def run(X, y, grupos, ruta_modelo, ruta_le, formato="pickle", tolerancia=0.01, aumentar=None, origen=None):
+    """
+    Seleccion de caracteristicas tras el entrenamiento: elige los grupos, guarda la seleccion
+    (`<modelo>_features.json`) y el modelo reducido en el hueco del pipeline, de forma que la
+    prediccion en tiempo real solo calcule los grupos que el modelo usa.
+
+    Retorna:
+    --------
+        - seleccion (dict): La seleccion guardada.
+    """
+    seleccion, rf, le = seleccionar_grupos(X, y, grupos, tolerancia=tolerancia, aumentar=aumentar, origen=origen)
+
+    n_total = X.shape[1]
+    print(f"\nGrupos elegidos: {', '.join(str(g) for g in seleccion['grupos'])}")
+    print(f"Caracteristicas: {len(seleccion['indices'])} de {n_total} | "
+          f"accuracy {seleccion['accuracy']*100:.2f}% (completa {seleccion['accuracy_base']*100:.2f}%)")
+    print(f"Tamanyo del modelo: {len(pickle.dumps(rf)) / 1024:.0f} KB")
+
+    #La seleccion se escribe antes que el modelo para que quien recargue el modelo ya la encuentre
+    with open(ruta_seleccion(ruta_modelo), "w", encoding="utf-8") as f:
+        json.dump(seleccion, f, indent=2)
+    guardar_modelo_atomico(rf, le, ruta_modelo, ruta_le, formato=formato)
+    print(f"Modelo reducido guardado en {ruta_modelo}")
+    return seleccion
@@ -0,0 +1,287 @@
+import json
+import time
+import queue
+import pickle
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import joblib
+
+#Rutas de los modelos entrenados de cada pipeline
+MODELOS = {
+    "clasico": ("modelos_clasico/random_forest_model.pkl", "modelos_clasico/label_encoder.pkl"),
+    "mediapipe": ("pipeline_mediapipe/modelos_mediapipe/rf_model.pkl",
+                  "pipeline_mediapipe/modelos_mediapipe/rf_model_le.pkl"),
+}
+
+
+class _Peticion:
+    #Vector pendiente de prediccion y evento para avisar al hilo que la envio
+    __slots__ = ("vector", "evento", "resultado", "error")
+
+    def __init__(self, vector):
+        self.vector = vector
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+
+class MicroLotes:
+    """
+    Agrupa las peticiones concurrentes que llegan dentro de una ventana de tiempo corta
+    y las resuelve con una sola llamada a `predict_proba`.
+
+    Args:
+    --------
+        - modelo: Clasificador entrenado con etiquetas codificadas (como los de los pipelines).
+        - le (LabelEncoder): Codificador de etiquetas del modelo.
+        - ventana_ms (float, opcional): Tiempo maximo que se espera a que se llene un lote.
+        - max_lote (int, opcional): Tamanyo maximo de cada lote.
+    """
+
+    def __init__(self, modelo, le, ventana_ms=5, max_lote=64):
+        self.modelo = modelo
+        self.le = le
+        self.ventana_s = ventana_ms / 1000
+        self.max_lote = max_lote
+        self.cola = queue.Queue()
+        self.n_lotes = 0
+        self.n_peticiones = 0
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+
+    def predecir(self, vector, timeout=10):
+        #Encola un vector y espera a que su lote se resuelva
+        try:
+            peticion = _Peticion(np.asarray(vector, dtype=np.float64).ravel())
+        except TypeError as e:
+            raise ValueError(f"El vector tiene valores que no son números: {e}") from e
+        #Un vector de otra longitud haria fallar el lote entero: se rechaza antes de encolarlo
+        n_features = getattr(self.modelo, "n_features_in_", None)
+        if n_features is not None and len(peticion.vector) != n_features:
+            raise ValueError(f"El vector tiene {len(peticion.vector)} características y el modelo espera {n_features}.")
+        self.cola.put(peticion)
+        if not peticion.evento.wait(timeout):
+            raise TimeoutError("La predicción no ha terminado a tiempo.")
+        if peticion.error is not None:
+            raise peticion.error
+        return peticion.resultado
+
+
+    def parar(self):
+        self._activo = False
+        self._hilo.join()
+
+
+    def estadisticas(self):
+        return {
+            "lotes": self.n_lotes,
+            "peticiones": self.n_peticiones,
+            "tamanyo_medio_lote": self.n_peticiones / self.n_lotes if self.n_lotes else 0.0,
+        }
+
+
+    def _bucle(self):
+        while self._activo:
+            try:
+                primera = self.cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            #Recogemos las peticiones que lleguen dentro de la ventana
+            lote = [primera]
+            limite = time.perf_counter() + self.ventana_s
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self.cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self._resolver(lote)
+
+
+    def _predecir_lote(self, lote):
+        probas = self.modelo.predict_proba(np.vstack([p.vector for p in lote]))
+        indices = probas.argmax(axis=1)
+        etiquetas = self.le.inverse_transform(self.modelo.classes_[indices])
+        for peticion, etiqueta, i, fila in zip(lote, etiquetas, indices, probas):
+            peticion.resultado = {"label": str(etiqueta), "confidence": float(fila[i])}
+
+
+    def _resolver(self, lote):
+        try:
+            self._predecir_lote(lote)
+        except Exception:
+            #Si falla el lote se resuelve cada peticion por separado: el error solo le llega a la que lo provoca
+            for peticion in lote:
+                try:
+                    self._predecir_lote([peticion])
+                except Exception as e:
+                    peticion.error = e
+
+        self.n_lotes += 1
+        self.n_peticiones += len(lote)
+        for peticion in lote:
+            peticion.evento.set()
+
+
+
+def _extractor_frames(pipeline, modelo=None):
+    #Funcion frame BGR -> vector de caracteristicas (o None si no hay mano) de cada pipeline.
+    #Si el modelo guardado usa una seleccion de caracteristicas, solo se calculan esas.
+    from .seleccion_features import cargar_seleccion
+
+    seleccion = cargar_seleccion(MODELOS[pipeline][0], modelo) if modelo is not None else None
+    grupos = seleccion["grupos"] if seleccion is not None else None
+
+    if pipeline == "clasico":
+        from clasico.src.procesar_data import preprocesar_imagen
+        from clasico.src.utils import extraer_features
+
+        def extraer(frame):
+            roi = preprocesar_imagen(frame)
+            return None if roi is None else extraer_features(roi, grupos)
+        return extraer
+
+    import mediapipe as mp
+    from pipeline_mediapipe.src.extraccion_caracteristicas_mp import extraer_landmarks
+
+    #MediaPipe Hands no se puede usar desde varios hilos a la vez
+    hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1)
+    candado = threading.Lock()
+
+    def extraer(frame):
+        with candado:
+            return extraer_landmarks(frame, hands, grupos)
+    return extraer
+
+
+
+def crear_manejador(lotes, extraer_frame):
+    #Manejador HTTP que comparte el agrupador de lotes entre todos los hilos del servidor
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  #Conexiones persistentes entre peticiones
+
+        def _responder(self, codigo, cuerpo):
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._responder(200, lotes.estadisticas())
+            else:
+                self._responder(404, {"error": "Ruta no encontrada"})
+
+        def do_POST(self):
+            cuerpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.path == "/predict/landmarks":
+                    datos = json.loads(cuerpo)
+                    if not isinstance(datos, dict) or not isinstance(datos.get("landmarks"), list):
+                        self._responder(400, {"error": 'El cuerpo tiene que ser un objeto JSON con "landmarks": [...]'})
+                        return
+                    vector = datos["landmarks"]
+                elif self.path == "/predict/frame":
+                    import cv2
+                    frame = cv2.imdecode(np.frombuffer(cuerpo, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if frame is None:
+                        self._responder(400, {"error": "Imagen JPEG no válida"})
+                        return
+                    vector = extraer_frame(frame)
+                    if vector is None:
+                        self._responder(200, {"label": None, "confidence": 0.0})
+                        return
+                else:
+                    self._responder(404, {"error": "Ruta no encontrada"})
+                    return
+
+                self._responder(200, lotes.predecir(vector))
+
+            except (KeyError, ValueError) as e:
+                self._responder(400, {"error": str(e)})
+            except Exception as e:
+                self._responder(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass #Sin una linea por peticion, que penaliza el rendimiento
+
+    return Manejador
+
+
+
+def cargar_modelo(pipeline):
+    #Carga el modelo y el codificador guardados por el entrenamiento de cada pipeline
+    ruta_modelo, ruta_le = MODELOS[pipeline]
+    if pipeline == "clasico":
+        with open(ruta_modelo, "rb") as f:
+            modelo = pickle.load(f)
+        with open(ruta_le, "rb") as f:
+            le = pickle.load(f)
+        return modelo, le
+    return joblib.load(ruta_modelo), joblib.load(ruta_le)
+
+
+
+def run(pipeline="mediapipe", host="127.0.0.1", puerto=8000, ventana_ms=5, max_lote=64):
+    """
+    Arranca un servidor HTTP local que sirve el modelo de un pipeline a varios clientes.
+
+    Rutas:
+    --------
+        - POST /predict/landmarks: JSON {"landmarks": [...]} con el vector de caracteristicas
+          (landmarks en MediaPipe, features clasicas en el pipeline clasico).
+        - POST /predict/frame: Imagen JPEG en el cuerpo de la peticion.
+        - GET /stats: Numero de lotes y tamanyo medio de lote.
+
+    Cada respuesta es {"label": ..., "confidence": ...}. Las peticiones concurrentes que llegan
+    dentro de `ventana_ms` se agrupan en una sola llamada a `predict_proba`.
+
+    Args:
+    --------
+        - pipeline (str, opcional): "clasico" o "mediapipe". Por defecto, "mediapipe".
+        - host (str, opcional): Direccion de escucha. Por defecto, solo local.
+        - puerto (int, opcional): Puerto de escucha. Por defecto, 8000.
+        - ventana_ms (float, opcional): Ventana de agrupacion de peticiones.
+        - max_lote (int, opcional): Tamanyo maximo de lote.
+
+    Retorna:
+    --------
+        - None: El servidor se detiene con Ctrl+C.
+    """
+    modelo, le = cargar_modelo(pipeline)
+    lotes = MicroLotes(modelo, le, ventana_ms=ventana_ms, max_lote=max_lote)
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(lotes, _extractor_frames(pipeline, modelo)))
+
+    print(f"Servidor de inferencia ({pipeline}) escuchando en http://{host}:{puerto}. Ctrl+C para parar.")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        lotes.parar()
+        print(f"Servidor detenido. {lotes.estadisticas()}")
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de inferencia con micro-lotes")
+    parser.add_argument("--pipeline", choices=list(MODELOS), default="mediapipe")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--ventana-ms", type=float, default=5)
+    parser.add_argument("--max-lote", type=int, default=64)
+    args = parser.parse_args()
+    run(args.pipeline, args.host, args.puerto, args.ventana_ms, args.max_lote)
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import queue
+import struct
+import bisect
+import threading
+from datetime import datetime
+import numpy as np
+import cv2
+
+MAGICO = b"SESLSE01"        #Cabecera del contenedor
+MAGICO_INDICE = b"SESIDX01" #Pie que marca que el indice se escribio al cerrar
+CABECERA_REGISTRO = struct.Struct("<II")   #Longitud de los metadatos y de la imagen
+PIE = struct.Struct("<Q8s")                #Posicion del indice y MAGICO_INDICE
+
+
+def _a_json(valor):
+    #Tipos de numpy (caracteristicas, predicciones codificadas) a tipos de JSON
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+
+class GrabadorSesion:
+    """
+    Graba una sesion de prediccion en tiempo real en un unico fichero indexado (.ses) sin frenar
+    el bucle: `grabar()` solo encola el frame y sus datos y una hebra en segundo plano los
+    comprime en JPEG y los escribe.
+
+    Cada registro guarda el instante, el numero de frame, las caracteristicas o landmarks, la
+    prediccion, la etiqueta mostrada y los tiempos de cada etapa. Todos los frames dejan sus datos;
+    la imagen solo se guarda uno de cada `cada` y reducida a `escala`. Al cerrar se anyade un indice
+    (instante -> posicion) para buscar por tiempo; si el programa se corta sin cerrar, el lector
+    lo reconstruye recorriendo el fichero.
+
+    Si la hebra no da abasto la cola se llena y los registros nuevos se descartan (se cuentan en
+    `descartados`) en lugar de bloquear el bucle. Si falla la escritura (disco lleno...), el error
+    queda en `error`, se deja de grabar y la prediccion sigue; el fichero se cierra sin indice.
+
+    Args:
+    --------
+        - ruta (str): Fichero .ses de salida.
+        - cada (int, opcional): Se guarda la imagen de uno de cada `cada` frames. Por defecto, 1.
+        - escala (float, opcional): Factor de reduccion de las imagenes guardadas. Por defecto, 1.0.
+        - calidad (int, opcional): Calidad JPEG (0-100). Por defecto, 80.
+        - info (dict, opcional): Datos de la sesion que se guardan en el indice (pipeline, perfil...).
+        - max_cola (int, opcional): Registros pendientes como maximo. Por defecto, 64.
+    """
+
+    def __init__(self, ruta, cada=1, escala=1.0, calidad=80, info=None, max_cola=64):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.ruta = ruta
+        self.cada = max(1, int(cada))
+        self.escala = escala
+        self.calidad = calidad
+        self.info = dict(info or {})
+        self.frames = 0
+        self.descartados = 0
+        self.bytes_imagenes = 0
+        self.error = None
+
+        self._inicio = time.perf_counter()
+        self._indice = []      #[(t, posicion, tiene_imagen)]
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._fichero = open(ruta, "wb")
+        self._fichero.write(MAGICO)
+        self._hebra = threading.Thread(target=self._escribir, daemon=True)
+        self._hebra.start()
+
+
+    def grabar(self, frame, features=None, prediccion=None, etiqueta=None, tiempos=None):
+        """
+        Encola un frame. El frame no se copia: los bucles no lo modifican despues (se dibuja en un
+        lienzo aparte) y `cap.read()` devuelve un array nuevo en cada lectura.
+
+        Args:
+        --------
+            - frame (np.array): Frame BGR leido de la fuente.
+            - features (np.array, opcional): Caracteristicas o landmarks extraidos (None si no hay mano).
+            - prediccion (opcional): Prediccion del modelo en este frame.
+            - etiqueta (str, opcional): Etiqueta suavizada mostrada.
+            - tiempos (dict, opcional): Segundos de cada etapa del frame (lectura, extraccion, prediccion...).
+        """
+        n = self.frames
+        self.frames += 1
+        meta = {
+            "t": time.perf_counter() - self._inicio,
+            "n": n,
+            "features": _a_json(features),
+            "prediccion": _a_json(prediccion),
+            "etiqueta": _a_json(etiqueta),
+            "tiempos": {k: round(v, 6) for k, v in (tiempos or {}).items()},
+        }
+        imagen = frame if n % self.cada == 0 else None
+        if self.error is not None:
+            self.descartados += 1
+            return
+        try:
+            self._cola.put_nowait((meta, imagen))
+        except queue.Full:
+            self.descartados += 1
+
+
+    def _escribir(self):
+        parametros = [cv2.IMWRITE_JPEG_QUALITY, self.calidad]
+        while True:
+            elemento = self._cola.get()
+            if elemento is None:
+                break
+            if self.error is not None:
+                continue   #Tras un error se sigue vaciando la cola para que `cerrar()` no se quede esperando
+            try:
+                self._escribir_registro(*elemento, parametros)
+            except Exception as e:
+                self.error = e
+                print(f"Error al grabar la sesión en {self.ruta}, se deja de grabar: {e}")
+
+
+    def _escribir_registro(self, meta, imagen, parametros):
+        datos = b""
+        if imagen is not None:
+            if self.escala < 1.0:
+                imagen = cv2.resize(imagen, None, fx=self.escala, fy=self.escala, interpolation=cv2.INTER_AREA)
+            ok, codificada = cv2.imencode(".jpg", imagen, parametros)
+            if ok:
+                datos = codificada.tobytes()
+                self.bytes_imagenes += len(datos)
+
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        posicion = self._fichero.tell()
+        self._fichero.write(CABECERA_REGISTRO.pack(len(meta_bytes), len(datos)))
+        self._fichero.write(meta_bytes)
+        self._fichero.write(datos)
+        self._indice.append((meta["t"], posicion, bool(datos)))
+
+
+    def cerrar(self):
+        #Termina de escribir lo pendiente y anyade el indice al final del fichero
+        if self._fichero.closed:
+            return
+        if self._hebra.is_alive():
+            try:
+                self._cola.put(None, timeout=10)
+                self._hebra.join()
+            except queue.Full:
+                self.error = self.error or RuntimeError("la hebra de escritura no responde")
+
+        if self.error is not None:
+            #Sin indice: el lector reconstruye los registros completos recorriendo el fichero
+            self._fichero.close()
+            print(f"Sesión grabada en {self.ruta} incompleta ({len(self._indice)} frames): {self.error}")
+            return
+
+        posicion = self._fichero.tell()
+        indice = {
+            "version": 1,
+            "creado": datetime.now().isoformat(timespec="seconds"),
+            "info": self.info,
+            "cada": self.cada,
+            "escala": self.escala,
+            "duracion": time.perf_counter() - self._inicio,
+            "registros": self._indice,
+        }
+        self._fichero.write(json.dumps(indice).encode("utf-8"))
+        self._fichero.write(PIE.pack(posicion, MAGICO_INDICE))
+        self._fichero.close()
+
+        tamanyo = os.path.getsize(self.ruta) / 1e6
+        print(f"Sesión grabada en {self.ruta}: {len(self._indice)} frames, {tamanyo:.1f} MB"
+              + (f" ({self.descartados} descartados por cola llena)" if self.descartados else ""))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+
+
+class LectorSesion:
+    """
+    Lee una sesion grabada con `GrabadorSesion`. Tiene la interfaz de `cv2.VideoCapture` que usan
+    los bucles (isOpened, read, get, set, release), asi que se puede pasar como `fuente` (o la ruta
+    .ses directamente) para volver a reproducir la sesion. Solo devuelve los frames con imagen.
+
+    Args:
+    --------
+        - ruta (str): Fichero .ses.
+        - ritmo_real (bool, opcional): Si es True, `read()` espera para respetar los tiempos
+          originales. Por defecto, False (lo mas rapido posible).
+    """
+
+    def __init__(self, ruta, ritmo_real=False):
+        self.ruta = ruta
+        self.ritmo_real = ritmo_real
+        self._fichero = open(ruta, "rb")
+        if self._fichero.read(len(MAGICO)) != MAGICO:
+            self._fichero.close()
+            raise ValueError(f"{ruta} no es una sesión grabada.")
+
+        self.info, registros = self._leer_indice()
+        self._registros = registros
+        self._con_imagen = [i for i, (_, _, imagen) in enumerate(registros) if imagen]
+        self._tiempos = [registros[i][0] for i in self._con_imagen]
+        self._pos = 0
+        self._reloj = None
+
+
+    def _leer_indice(self):
+        f = self._fichero
+        f.seek(0, os.SEEK_END)
+        fin = f.tell()
+        if fin >= len(MAGICO) + PIE.size:
+            f.seek(fin - PIE.size)
+            posicion, magico = PIE.unpack(f.read(PIE.size))
+            if magico == MAGICO_INDICE:
+                f.seek(posicion)
+                indice = json.loads(f.read(fin - PIE.size - posicion).decode("utf-8"))
+                return indice, [tuple(r) for r in indice["registros"]]
+
+        #Sesion sin cerrar: se reconstruye el indice recorriendo los registros completos
+        registros = []
+        f.seek(len(MAGICO))
+        while True:
+            posicion = f.tell()
+            cabecera = f.read(CABECERA_REGISTRO.size)
+            if len(cabecera) < CABECERA_REGISTRO.size:
+                break
+            n_meta, n_datos = CABECERA_REGISTRO.unpack(cabecera)
+            if posicion + CABECERA_REGISTRO.size + n_meta + n_datos > fin:
+                break
+            meta = json.loads(f.read(n_meta).decode("utf-8"))
+            f.seek(n_datos, os.SEEK_CUR)
+            registros.append((meta["t"], posicion, n_datos > 0))
+        print(f"{self.ruta}: sesión sin índice, reconstruido con {len(registros)} registros.")
+        return {"info": {}, "registros": registros}, registros
+
+
+    def __len__(self):
+        return len(self._registros)
+
+
+    @property
+    def duracion(self):
+        return self._registros[-1][0] if self._registros else 0.0
+
+
+    def registro(self, i, imagen=True):
+        """
+        Retorna:
+        --------
+            - meta (dict): Instante, numero de frame, caracteristicas, prediccion, etiqueta y tiempos.
+            - frame (np.array | None): Imagen BGR decodificada (None si no se guardo o `imagen` es False).
+        """
+        _, posicion, _ = self._registros[i]
+        self._fichero.seek(posicion)
+        n_meta, n_datos = CABECERA_REGISTRO.unpack(self._fichero.read(CABECERA_REGISTRO.size))
+        meta = json.loads(self._fichero.read(n_meta).decode("utf-8"))
+        frame = None
+        if imagen and n_datos:
+            datos = np.frombuffer(self._fichero.read(n_datos), dtype=np.uint8)
+            frame = cv2.imdecode(datos, cv2.IMREAD_COLOR)
+        return meta, frame
+
+
+    def registros(self):
+        #Metadatos de todos los frames sin decodificar imagenes (para analizar predicciones y tiempos)
+        for i in range(len(self._registros)):
+            yield self.registro(i, imagen=False)[0]
+
+
+    def buscar(self, t):
+        #Se coloca en el primer frame con imagen grabado en el instante t (segundos) o despues
+        self._pos = bisect.bisect_left(self._tiempos, t)
+        self._reloj = None
+
+
+    #----Interfaz de cv2.VideoCapture----#
+
+    def isOpened(self):
+        return not self._fichero.closed
+
+
+    def read(self):
+        if self._fichero.closed or self._pos >= len(self._con_imagen):
+            return False, None
+        meta, frame = self.registro(self._con_imagen[self._pos])
+
+        if self.ritmo_real:
+            ahora = time.perf_counter()
+            if self._reloj is None:
+                self._reloj = ahora - meta["t"]
+            espera = self._reloj + meta["t"] - ahora
+            if espera > 0:
+                time.sleep(espera)
+        self._pos += 1
+        return True, frame
+
+
+    def get(self, propiedad):
+        if propiedad == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._con_imagen))
+        if propiedad == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        if propiedad == cv2.CAP_PROP_POS_MSEC:
+            return self._tiempos[min(self._pos, len(self._tiempos) - 1)] * 1000 if self._tiempos else 0.0
+        if propiedad == cv2.CAP_PROP_FPS:
+            return (len(self._tiempos) - 1) / (self._tiempos[-1] - self._tiempos[0]) if len(self._tiempos) > 1 else 0.0
+        return 0.0
+
+
+    def set(self, propiedad, valor):
+        if propiedad == cv2.CAP_PROP_POS_MSEC:
+            self.buscar(valor / 1000)
+            return True
+        if propiedad == cv2.CAP_PROP_POS_FRAMES:
+            self._pos = max(0, min(int(valor), len(self._con_imagen)))
+            self._reloj = None
+            return True
+        return False
+
+
+    def release(self):
+        self._fichero.close()
+
+
+
+def crear_grabador(grabar, info=None):
+    #`grabar` puede ser la ruta del .ses (opciones por defecto) o un GrabadorSesion ya configurado
+    if grabar is None or isinstance(grabar, GrabadorSesion):
+        return grabar
+    return GrabadorSesion(grabar, info=info)
@@ -0,0 +1,167 @@
+import os
+import time
+import pickle
+import numpy as np
+import joblib
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.metrics import accuracy_score
+
+from .cache_dataset import separar_train_test
+
+#Modelos candidatos. Los modelos lineales y el kNN necesitan escalado previo.
+#El SVM lineal se calibra para que tenga predict_proba como el resto.
+MODELOS_ZOO = {
+    "RandomForest": lambda rs: RandomForestClassifier(n_estimators=200, class_weight="balanced",
+                                                      n_jobs=-1, random_state=rs),
+    "ExtraTrees": lambda rs: ExtraTreesClassifier(n_estimators=200, class_weight="balanced",
+                                                  n_jobs=-1, random_state=rs),
+    "HistGradientBoosting": lambda rs: HistGradientBoostingClassifier(random_state=rs),
+    "kNN (KD-tree)": lambda rs: make_pipeline(StandardScaler(),
+                                              KNeighborsClassifier(n_neighbors=5, algorithm="kd_tree")),
+    "LogisticRegression": lambda rs: make_pipeline(StandardScaler(),
+                                                   LogisticRegression(max_iter=2000, random_state=rs)),
+    "LinearSVC": lambda rs: make_pipeline(StandardScaler(),
+                                          CalibratedClassifierCV(LinearSVC(random_state=rs), cv=3)),
+}
+
+
+
+def _latencia_individual(modelo, X, n_repeticiones):
+    #Mediana del tiempo de prediccion de una sola muestra, como en el bucle en tiempo real
+    tiempos = []
+    for i in range(n_repeticiones):
+        muestra = X[i % len(X)].reshape(1, -1)
+        inicio = time.perf_counter()
+        modelo.predict(muestra)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+
+def comparar_modelos(X, y, modelos=None, test_size=0.2, random_state=111, n_repeticiones=200, aumentar=None,
+                     origen=None):
+    """
+    Entrena varios clasificadores sobre las mismas caracteristicas y el mismo split
+    train/test, y mide para cada uno accuracy, tiempo de entrenamiento, latencia de
+    prediccion (una muestra y lote completo) y tamanyo serializado.
+
+    Args:
+    --------
+        - X (np.array): Matriz de caracteristicas (features clasicas o landmarks).
+        - y (np.array): Etiquetas de texto de cada muestra.
+        - modelos (list[str], opcional): Nombres de MODELOS_ZOO a comparar. Por defecto, todos.
+        - test_size (float, opcional): Proporcion reservada para test. Por defecto, 0.2.
+        - random_state (int, opcional): Semilla del split y de los modelos. Por defecto, 111.
+        - n_repeticiones (int, opcional): Predicciones individuales usadas para la latencia.
+        - aumentar (callable, opcional): Funcion (X, y) -> (X, y) con data augmentation. Solo se aplica
+          a la parte de entrenamiento, despues de separar el test. Por defecto, None.
+        - origen (np.array, opcional): Muestra de la que sale cada fila, si el dataset ya trae copias
+          aumentadas. El split se hace por muestra (`separar_train_test`). Por defecto, split por filas.
+
+    Retorna:
+    --------
+        - filas (list[dict]): Una fila por modelo con sus metricas y el modelo entrenado ("modelo").
+        - le (LabelEncoder): Codificador de etiquetas comun a todos los modelos.
+    """
+    if modelos is None:
+        modelos = list(MODELOS_ZOO)
+
+    le = LabelEncoder()
+    y_enc = le.fit_transform(y)
+    idx_train, idx_test = separar_train_test(y_enc, origen, test_size, random_state)
+    X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y_enc[idx_train], y_enc[idx_test]
+    if aumentar is not None:
+        X_train, y_train = aumentar(X_train, y_train)
+
+    filas = []
+    for nombre in modelos:
+        modelo = MODELOS_ZOO[nombre](random_state)
+
+        inicio = time.perf_counter()
+        modelo.fit(X_train, y_train)
+        t_fit = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        y_pred = modelo.predict(X_test)
+        t_lote = time.perf_counter() - inicio
+
+        filas.append({
+            "nombre": nombre,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "fit_s": t_fit,
+            "latencia_1_ms": _latencia_individual(modelo, X_test, n_repeticiones) * 1000,
+            "latencia_lote_ms": t_lote * 1000,
+            "latencia_lote_muestra_us": t_lote / len(X_test) * 1e6,
+            "tamanyo_kb": len(pickle.dumps(modelo, protocol=pickle.HIGHEST_PROTOCOL)) / 1024,
+            "modelo": modelo,
+        })
+        print(f"Evaluado {nombre}")
+
+    return filas, le
+
+
+
+def imprimir_tabla(filas):
+    #Tabla de texto con una fila por modelo
+    cabecera = (f"{'#':>2}  {'Modelo':<22}{'Acc (%)':>9}{'Fit (s)':>10}{'1 muestra (ms)':>16}"
+                f"{'Lote (ms)':>11}{'Lote/muestra (us)':>19}{'Tamaño (KB)':>13}")
+    print(cabecera)
+    print("-" * len(cabecera))
+    for i, f in enumerate(filas):
+        print(f"{i:>2}  {f['nombre']:<22}{f['accuracy']*100:>9.2f}{f['fit_s']:>10.2f}"
+              f"{f['latencia_1_ms']:>16.3f}{f['latencia_lote_ms']:>11.2f}"
+              f"{f['latencia_lote_muestra_us']:>19.2f}{f['tamanyo_kb']:>13.1f}")
+
+
+
+def exportar_modelo(modelo, le, ruta_modelo, ruta_le, formato="pickle"):
+    """
+    Guarda un modelo de la tabla en el hueco .pkl que usa la prediccion en tiempo real.
+    Todos los modelos de la tabla tienen predict_proba y classes_; lo que solo sirve para
+    bosques (salida temprana, entrenamiento incremental) comprueba el tipo del modelo cargado.
+
+    Args:
+    --------
+        - modelo: Clasificador entrenado por `comparar_modelos`.
+        - le (LabelEncoder): Codificador de etiquetas devuelto por `comparar_modelos`.
+        - ruta_modelo (str): Ruta del .pkl del modelo.
+        - ruta_le (str): Ruta del .pkl del codificador.
+        - formato (str, opcional): "pickle" (pipeline clasico) o "joblib" (pipeline MediaPipe).
+
+    Retorna:
+    --------
+        - str: Ruta en la que se ha guardado el modelo.
+    """
+    carpeta = os.path.dirname(ruta_modelo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    if formato == "joblib":
+        joblib.dump(modelo, ruta_modelo)
+        joblib.dump(le, ruta_le)
+    else:
+        with open(ruta_modelo, "wb") as f:
+            pickle.dump(modelo, f)
+        with open(ruta_le, "wb") as f:
+            pickle.dump(le, f)
+    print(f"Modelo guardado en '{ruta_modelo}'")
+    return ruta_modelo
+
+
+
+def run(X, y, ruta_modelo, ruta_le, formato="pickle", aumentar=None, origen=None):
+    #Compara los modelos y permite elegir uno para exportarlo. Devuelve la ruta del modelo exportado (o None)
+    filas, le = comparar_modelos(X, y, aumentar=aumentar, origen=origen)
+    print()
+    imprimir_tabla(filas)
+
+    eleccion = input("\nNúmero del modelo a exportar (Enter para ninguno): ").strip()
+    if eleccion.isdigit() and int(eleccion) < len(filas):
+        return exportar_modelo(filas[int(eleccion)]["modelo"], le, ruta_modelo, ruta_le, formato)
+    return None
@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 
 # Importar los dos menus principales
 from clasico import menu_clasico
@@ -14,7 +15,10 @@ def main():
         print("Selecciona el modo de trabajo:\n")
         print("[0] Salir del programa")
         print("[1] Pipeline clásico (segmentación por color y ROI)")
-        print("[2] Pipeline con MediaPipe (landmarks en tiempo real)\n")
+        print("[2] Pipeline con MediaPipe (landmarks en tiempo real)")
+        print("[3] Servidor de inferencia local (varios clientes)")
+        print("[4] Procesar varias fuentes de vídeo a la vez")
+        print("[5] Predicción en cascada (clásico y, si hay dudas, MediaPipe)\n")
 
         opcion = input("Opción: ")
 
@@ -32,9 +36,58 @@ def main():
             print("\nHas seleccionado el modo MEDIAPIPE.\n")
             menu_mediapipe.main()
 
+        #SERVIDOR
+        elif opcion == '3':
+            from comun import servidor_inferencia
+            pipeline = input("Pipeline a servir (clasico/mediapipe): ").strip().lower()
+            if pipeline not in servidor_inferencia.MODELOS:
+                print("Pipeline no válido.")
+                continue
+            try:
+                servidor_inferencia.run(pipeline)
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Entrénalo primero.")
+
+        #VARIAS FUENTES
+        elif opcion == '4':
+            from comun import multistream
+            pipeline = input("Pipeline (clasico/mediapipe): ").strip().lower()
+            entrada = input("Fuentes separadas por comas (rutas de vídeo o índices de cámara): ")
+            fuentes = [int(f) if f.strip().isdigit() else f.strip() for f in entrada.split(",") if f.strip()]
+            if pipeline not in ("clasico", "mediapipe") or not fuentes:
+                print("Opción no válida.")
+                continue
+            try:
+                multistream.run(fuentes, pipeline=pipeline)
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Entrénalo primero.")
+
+        #CASCADA
+        elif opcion == '5':
+            from comun import cascada
+            umbral = input("Margen mínimo para aceptar el clásico (Enter = 0.3): ").strip()
+            try:
+                cascada.prediccion_cascada(umbral_margen=float(umbral) if umbral else 0.3)
+            except FileNotFoundError:
+                print("Faltan modelos entrenados. Entrena los dos pipelines primero.")
+
         else:
             print("Opción no válida. Intenta nuevamente.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconocimiento del alfabeto dactilológico")
+    parser.add_argument("--informe-recursos", nargs="?", const="informe_recursos.json", default=None, metavar="RUTA",
+                        help="Guarda tiempo, CPU, memoria y E/S de cada etapa offline en un JSON "
+                             "(por defecto informe_recursos.json)")
+    parser.add_argument("--perfilar", default=None, metavar="DIR",
+                        help="Guarda ademas un volcado de cProfile de cada etapa en DIR")
+    parser.add_argument("--sin-tracemalloc", action="store_true",
+                        help="No mide el pico de memoria de Python (tracemalloc ralentiza las etapas)")
+    args = parser.parse_args()
+
+    if args.informe_recursos or args.perfilar:
+        from comun import recursos
+        recursos.activar(args.informe_recursos or "informe_recursos.json", args.perfilar,
+                         memoria=not args.sin_tracemalloc)
     main()
@@ -1,10 +1,27 @@
+import os
+import functools
+import numpy as np
 from .src.captura_mp import capturar_por_letra_mediapipe
-from .src.construccion_dataset_mp import construir_dataset_mediapipe
-from .src.entrenamiento_mp import entrenar_modelo_mediapipe
-from .src.prediccion_mp import prediccion_tiempo_real_mediapipe
+from .src.construccion_dataset_mp import construir_dataset_mediapipe, FEATURES_FILE_MP
+from .src.entrenamiento_mp import entrenar_modelo_mediapipe, buscar_modelo_mediapipe, entrenar_incremental_mediapipe
+from .src.prediccion_mp import prediccion_tiempo_real_mediapipe, cargar_modelo_mp, RUTA_ALUMNO_MP
+from .src.ingesta_masiva_mp import ingestar_carpeta
+from .src.aumentacion_mp import aumentar_landmarks
+from comun.perfiles import pedir_perfil
+from comun.almacen_features import AlmacenFeatures
+from comun.arranque import Arranque
+from comun.cache_dataset import registrar_muestras
+from .src.secuencias_mp import (LETRAS_DINAMICAS, capturar_secuencias_mediapipe,
+                                construir_dataset_secuencias, prediccion_secuencias_mediapipe)
 
 def main():
     DATA_DIR = "pipeline_mediapipe/data_mediapipe"
+    SECUENCIAS_DIR = "pipeline_mediapipe/data_secuencias_mp"  #Secuencias de landmarks (letras con movimiento)
+    ALMACEN_DIR = "pipeline_mediapipe/almacen_features_mp"   #Landmarks extraidos durante la captura
+    RUTA_MODELO = "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl"
+    #El dataset se carga sin aumentar y cada opcion aumenta solo su parte de entrenamiento (despues de separar
+    #el test), asi las copias sinteticas de una muestra nunca quedan a los dos lados del split
+    AUMENTAR = functools.partial(aumentar_landmarks, factor=5)
 
     letras = ["A","B","C","CH","D","E","F","G","H","I","J","K","L","LL",
               "M","N","Ñ","O","P","Q","R","RR","S","T","U","V","W","X","Y","Z"]
@@ -15,7 +32,17 @@ def main():
         print("[1] Capturar dataset")
         print("[2] Construir dataset")
         print("[3] Entrenar modelo")
-        print("[4] Predicción en tiempo real\n")
+        print("[4] Predicción en tiempo real")
+        print("[5] Búsqueda de hiperparámetros (validación cruzada)")
+        print("[6] Comparar modelos (accuracy, tiempos y tamaño)")
+        print("[7] Capturar secuencias (letras con movimiento)")
+        print("[8] Entrenar modelo de secuencias")
+        print("[9] Predicción de secuencias en tiempo real")
+        print("[10] Extraer landmarks de una carpeta de imágenes/vídeos")
+        print("[11] Curva de coreset (accuracy frente a tiempo de entrenamiento)")
+        print("[12] Selección de landmarks (modelo reducido)")
+        print("[13] Entrenamiento incremental (letras o muestras nuevas)")
+        print("[14] Destilar el modelo en un modelo NumPy compacto\n")
 
         opcion = input("Selecciona una opción: ")
 
@@ -26,7 +53,17 @@ def main():
 
         elif opcion == '1':
             # Captura de datos
-            capturar_por_letra_mediapipe(DATA_DIR, letras)
+            filtrar = input("¿Descartar muestras casi duplicadas? (s/n): ").strip().lower() == 's'
+            almacen = None
+            if input("¿Extraer características mientras se captura? (s/n): ").strip().lower() == 's':
+                #Al terminar la captura features_mp.npz ya esta construido (solo originales, se aumenta al entrenar)
+                almacen = AlmacenFeatures(ALMACEN_DIR, "mediapipe", DATA_DIR)
+                almacen.poner_al_dia()
+            try:
+                capturar_por_letra_mediapipe(DATA_DIR, letras, filtrar_duplicados=filtrar, almacen=almacen)
+            finally:
+                if almacen is not None:
+                    almacen.cerrar(FEATURES_FILE_MP)
 
 
         elif opcion == '2':
@@ -40,16 +77,152 @@ def main():
             
         elif opcion == '3':
             try:
-                entrenar_modelo_mediapipe(X, y)
+                fraccion = input("Fracción de coreset (Enter para usar todos los datos): ").strip()
+                entrenar_modelo_mediapipe(X, y, coreset=float(fraccion) if fraccion else None, aumentar=AUMENTAR)
+                registrar_muestras(RUTA_MODELO, DATA_DIR, {"augment_factor": 5}, extension=".npy")
 
             except Exception as e:
                 print(f"Error al entrenar el modelo: {e}")
                 
 
         elif opcion == '4':
+            modelo = "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl"
+            if os.path.exists(RUTA_ALUMNO_MP) and \
+                    input("¿Usar el modelo destilado (NumPy)? (s/n): ").strip().lower() == 's':
+                modelo = RUTA_ALUMNO_MP
+            #El modelo se carga y se calienta en segundo plano mientras se responden las preguntas
+            arranque = Arranque(lambda ruta=modelo: cargar_modelo_mp(ruta))
+            salida_temprana = input("¿Votación con salida temprana? (s/n): ").strip().lower() == 's'
+            en_caliente = input("¿Permitir correcciones con 'c' y recargar el modelo en caliente? (s/n): ").strip().lower() == 's'
+            perfil = pedir_perfil()
+            memoizar = input("¿Reutilizar la predicción mientras la mano está quieta? (s/n): ").strip().lower() == 's'
+            grabar = input("Grabar la sesión en (ruta .ses, Enter = no grabar): ").strip() or None
+            try:
+                prediccion_tiempo_real_mediapipe(modelo, salida_temprana=salida_temprana, en_caliente=en_caliente,
+                                                 data_dir=DATA_DIR, perfil=perfil, memoizar=memoizar, grabar=grabar,
+                                                 arranque=arranque)
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Entrénalo primero.")
+
+
+        elif opcion == '5':
+            try:
+                #Busqueda en paralelo, se puede cancelar con Ctrl+C y reanudar
+                X, y = construir_dataset_mediapipe(DATA_DIR)
+                if buscar_modelo_mediapipe(X, y, aumentar=AUMENTAR):
+                    registrar_muestras(RUTA_MODELO, DATA_DIR, {"augment_factor": 5}, extension=".npy")
+            except Exception as e:
+                print(f"Error en la búsqueda de hiperparámetros: {e}")
+
+
+        elif opcion == '6':
+            try:
+                from comun import zoo_modelos
+
+                #Usamos los landmarks ya guardados por la opcion 2 si existen
+                X, y = construir_dataset_mediapipe(DATA_DIR)
+                exportado = zoo_modelos.run(X, y, RUTA_MODELO, "pipeline_mediapipe/modelos_mediapipe/rf_model_le.pkl",
+                                            formato="joblib", aumentar=AUMENTAR)
+                if exportado is not None:
+                    registrar_muestras(RUTA_MODELO, DATA_DIR, {"augment_factor": 5}, extension=".npy")
+            except Exception as e:
+                print(f"Error al comparar modelos: {e}")
+
+
+        elif opcion == '7':
+            solo_dinamicas = input("¿Capturar solo las letras con movimiento? (s/n): ").strip().lower() == 's'
+            capturar_secuencias_mediapipe(SECUENCIAS_DIR, LETRAS_DINAMICAS if solo_dinamicas else letras)
+
+
+        elif opcion == '8':
+            try:
+                X_seq, y_seq = construir_dataset_secuencias(SECUENCIAS_DIR)
+                print(f"Dataset de secuencias con {len(X_seq)} ventanas y {len(set(y_seq))} clases.")
+                entrenar_modelo_mediapipe(X_seq, y_seq, save_model="pipeline_mediapipe/modelos_mediapipe/rf_secuencias.pkl")
+            except Exception as e:
+                print(f"Error al entrenar el modelo de secuencias: {e}")
+
+
+        elif opcion == '9':
+            try:
+                prediccion_secuencias_mediapipe()
+            except FileNotFoundError:
+                print("No se encontró el modelo de secuencias. Entrénalo primero.")
+
+
+        elif opcion == '10':
+            origen = input("Carpeta de origen (una subcarpeta por letra): ").strip()
+            if not os.path.isdir(origen):
+                print("La carpeta no existe.")
+                continue
+            ingestar_carpeta(origen, DATA_DIR)
+
+
+        elif opcion == '11':
+            try:
+                from comun.coreset import curva_coreset
+
+                X, y = construir_dataset_mediapipe(DATA_DIR)
+                curva_coreset(X, y, aumentar=AUMENTAR)
+            except Exception as e:
+                print(f"Error al calcular la curva de coreset: {e}")
+
+
+        elif opcion == '12':
+            try:
+                from comun import seleccion_features
+                from .src.extraccion_caracteristicas_mp import GRUPOS_LANDMARKS
+
+                #Se eligen los landmarks imprescindibles y se guarda el modelo reducido
+                X, y = construir_dataset_mediapipe(DATA_DIR)
+                tolerancia = input("Pérdida de accuracy admitida (Enter para 0.01): ").strip()
+                seleccion_features.run(X, y, GRUPOS_LANDMARKS, "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl",
+                                       "pipeline_mediapipe/modelos_mediapipe/rf_model_le.pkl", formato="joblib",
+                                       tolerancia=float(tolerancia) if tolerancia else 0.01, aumentar=AUMENTAR)
+            except Exception as e:
+                print(f"Error en la selección de landmarks: {e}")
+
+
+        elif opcion == '13':
             try:
-                prediccion_tiempo_real_mediapipe()
+                #Solo se entrena con las muestras capturadas despues del ultimo entrenamiento
+                entrenar_incremental_mediapipe(DATA_DIR)
             except FileNotFoundError:
                 print("No se encontró el modelo entrenado. Entrénalo primero.")
+            except Exception as e:
+                print(f"Error en el entrenamiento incremental: {e}")
+
+
+        elif opcion == '14':
+            try:
+                import joblib
+                from comun import destilacion
+                from comun.seleccion_features import cargar_seleccion
+
+                ruta_modelo = "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl"
+                profesor = joblib.load(ruta_modelo)
+                codificador = joblib.load(ruta_modelo.replace(".pkl", "_le.pkl"))
+
+                #El alumno aprende con los mismos landmarks que usa el modelo
+                X, y = construir_dataset_mediapipe(DATA_DIR)
+                seleccion = cargar_seleccion(ruta_modelo, profesor)
+                if seleccion is not None:
+                    X = X[:, seleccion["indices"]]
+
+                capas = input("Neuronas de la capa oculta (Enter para 64, 0 para un modelo lineal): ").strip()
+                ocultas = () if capas == '0' else (int(capas) if capas else 64,)
+                #Las copias sinteticas se generan solo a partir del entrenamiento del alumno (las
+                #transformaciones de la mano necesitan los 21 landmarks; con seleccion se usa ruido y mezclas)
+                aumentar = None
+                if seleccion is None:
+                    aumentar = lambda X_amp, factor: aumentar_landmarks(X_amp, np.zeros(len(X_amp)), factor=factor)[0]
+                destilacion.run(profesor, codificador, X, y, RUTA_ALUMNO_MP, ruta_profesor=ruta_modelo, ocultas=ocultas,
+                                aumentar=aumentar)
+
+            except FileNotFoundError:
+                print("No se encontró el modelo entrenado. Entrénalo primero.")
+            except Exception as e:
+                print(f"Error en la destilación: {e}")
+
         else:
             print("Opción no válida.")
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def aumentar_landmarks(X, y, factor=5, rotacion=15, escala=(0.9, 1.1), traslacion=0.05,
+                       prob_espejo=0.5, ruido=0.005, aspecto=4/3, random_state=111):
+    """
+    Data augmentation directamente sobre los landmarks de MediaPipe, en una sola pasada
+    vectorizada de NumPy (sin volver a pasar imagenes por MediaPipe).
+
+    Transformaciones aplicadas a cada copia:
+    ---------------------------
+    1. Espejo izquierda/derecha respecto a la muneca (probabilidad `prob_espejo`).
+    2. Rotacion en el plano de la imagen alrededor de la muneca (+-`rotacion` grados).
+    3. Escala alrededor de la muneca (x, y, z).
+    4. Traslacion de toda la mano en x e y (+-`traslacion`, coordenadas normalizadas).
+    5. Ruido gaussiano pequenyo en cada articulacion (desviacion `ruido`).
+
+    Args:
+    --------
+        - X (np.array): Landmarks (N, 63) o (N, 21, 3).
+        - y (np.array): Etiquetas (N,).
+        - factor (int, opcional): Copias sinteticas por muestra original. Por defecto, 5.
+        - rotacion (float, opcional): Angulo maximo de rotacion en grados. Por defecto, 15.
+        - escala (tuple, opcional): Rango del factor de escala. Por defecto, (0.9, 1.1).
+        - traslacion (float, opcional): Desplazamiento maximo. Por defecto, 0.05.
+        - prob_espejo (float, opcional): Probabilidad de reflejar la mano. Por defecto, 0.5.
+        - ruido (float, opcional): Desviacion del ruido por articulacion. Por defecto, 0.005.
+        - aspecto (float, opcional): Ancho/alto de la imagen original. x e y estan normalizados por
+          el ancho y el alto, asi que se rota en unidades iguales para no deformar la mano. Por defecto, 4/3.
+        - random_state (int, opcional): Semilla del generador. Por defecto, 111.
+
+    Retorna:
+    --------
+        - X_aum (np.array): Muestras originales seguidas de las sinteticas, con la forma de X.
+        - y_aum (np.array): Etiquetas correspondientes.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    if factor <= 0 or len(X) == 0:
+        return X, y
+
+    rng = np.random.default_rng(random_state)
+    puntos = np.repeat(X.reshape(-1, 21, 3), factor, axis=0)
+    M = len(puntos)
+
+    #Coordenadas relativas a la muneca, con x en las mismas unidades que y
+    muneca = puntos[:, :1, :].copy()
+    rel = puntos - muneca
+    rel[..., 0] *= aspecto
+
+    #1. Espejo: se invierte x respecto a la muneca
+    espejo = rng.random(M) < prob_espejo
+    rel[espejo, :, 0] *= -1
+
+    #2. Rotacion en el plano x-y
+    angulos = np.deg2rad(rng.uniform(-rotacion, rotacion, M))
+    cos, sen = np.cos(angulos)[:, None], np.sin(angulos)[:, None]
+    x, yy = rel[..., 0].copy(), rel[..., 1].copy()
+    rel[..., 0] = cos * x - sen * yy
+    rel[..., 1] = sen * x + cos * yy
+
+    #3. Escala
+    rel *= rng.uniform(escala[0], escala[1], M)[:, None, None]
+
+    #Volvemos a coordenadas normalizadas de la imagen
+    rel[..., 0] /= aspecto
+    puntos = rel + muneca
+
+    #4. Traslacion de la mano completa y 5. ruido por articulacion
+    puntos[..., :2] += rng.uniform(-traslacion, traslacion, (M, 1, 2))
+    puntos += rng.normal(0.0, ruido, puntos.shape)
+
+    X_aum = np.concatenate([X, puntos.reshape((M,) + X.shape[1:])])
+    y_aum = np.concatenate([y, np.repeat(y, factor)])
+    return X_aum, y_aum
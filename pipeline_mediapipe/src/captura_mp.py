@@ -7,9 +7,12 @@ import sys
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-from .extraccion_caracteristicas_mp import extraer_landmarks
+from .extraccion_caracteristicas_mp import normalizar_landmarks
+from comun.contexto_frame import ContextoFrame
+from comun.duplicados import IndiceLandmarks
 
-def capturar_por_letra_mediapipe(data_dir, letras, tamanyo_dataset=200, delay_ms=30):
+def capturar_por_letra_mediapipe(data_dir, letras, tamanyo_dataset=200, delay_ms=30, filtrar_duplicados=False,
+                                  almacen=None):
     """
     Captura de manera secuencial los landmarks de la mano para un conjunto de letras o gestos definidos, 
     utilizando Mediapipe. 
@@ -24,6 +27,10 @@ def capturar_por_letra_mediapipe(data_dir, letras, tamanyo_dataset=200, delay_ms
         - letras (list[str]): Lista de letras o gestos que se desean capturar.
         - tamanyo_dataset (int, opcional): Numero de muestras a capturar por letra. Por defecto, 200.
         - delay_ms (int, opcional): Retardo entre capturas consecutivas en milisegundos. Por defecto, 30.
+        - filtrar_duplicados (bool, opcional): Si es True, se descartan las muestras casi iguales
+          a las ultimas guardadas. Por defecto, False.
+        - almacen (AlmacenFeatures, opcional): Si se indica, las muestras se van anyadiendo a la matriz
+          de entrenamiento en segundo plano mientras sigue la captura. Por defecto, None.
     
     Proceso:
     --------
@@ -38,7 +45,8 @@ def capturar_por_letra_mediapipe(data_dir, letras, tamanyo_dataset=200, delay_ms
           si el usuario decide volver al menu principal.
     """
     for letra in letras:
-        result = capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset, delay_ms)
+        result = capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset, delay_ms, filtrar_duplicados,
+                                             almacen=almacen)
         if result == "w":  # Usuario quiere volver al menu
             print("Volviendo al menú principal...")
             break
@@ -47,7 +55,8 @@ def capturar_por_letra_mediapipe(data_dir, letras, tamanyo_dataset=200, delay_ms
 
 
 
-def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=30):
+def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=30,
+                                filtrar_duplicados=False, tolerancia=0.15, almacen=None):
     """
     Captura landmarks de la mano mediante Mediapipe y guarda las coordenadas
     de cada muestra como archivos .npy en el directorio correspondiente a la letra o gesto indicado.
@@ -62,6 +71,12 @@ def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=3
         - letra (str): Letra o gesto que se desea capturar.
         - tamanyo_dataset (int, opcional): Numero de muestras (frames) a capturar. Por defecto, 200.
         - delay_ms (int, opcional): Tiempo de espera entre capturas consecutivas en milisegundos. Por defecto, 30.
+        - filtrar_duplicados (bool, opcional): Si es True, se descarta la muestra si sus landmarks
+          normalizados estan a menos de `tolerancia` de alguna muestra guardada recientemente.
+        - tolerancia (float, opcional): Distancia euclidea entre landmarks normalizados por debajo
+          de la cual dos muestras se consideran casi iguales. Por defecto, 0.15.
+        - almacen (AlmacenFeatures, opcional): Almacen al que se envia cada muestra guardada para
+          aumentarla y anyadirla en segundo plano. Por defecto, None.
 
     Controles de teclado:
     --------
@@ -74,10 +89,11 @@ def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=3
     1. Inicializa la camara y crea el directorio correspondiente a la letra.
     2. Espera a que el usuario presione 'n' para comenzar la captura.
     3. Durante la captura:
-        a. Procesa los frames para detectar la mano.
-        b. Dibuja los landmarks detectados sobre el frame.
-        c. Extrae las coordenadas con `extraer_landmarks()`.
-        d. Guarda las coordenadas en formato .npy dentro del directorio de la letra.
+        a. Procesa los frames para detectar la mano (una deteccion por frame con `ContextoFrame`).
+        b. Dibuja los landmarks detectados sobre una copia del frame.
+        c. Extrae las coordenadas de esa misma deteccion.
+        d. Guarda las coordenadas en formato .npy dentro del directorio de la letra
+           (salvo que sean casi iguales a una muestra reciente y se filtren duplicados).
         e. Muestra en pantalla el numero de muestras capturadas.
     4. Permite interrumpir la captura con las teclas 'q' o 'w'.
     5. Libera la camara y cierra todas las ventanas de OpenCV al finalizar.
@@ -123,31 +139,48 @@ def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=3
 
     # Captura de frames y extraccion de landmarks
     contador = 0
+    indice = IndiceLandmarks(tolerancia) if filtrar_duplicados else None
+    rechazadas = 0
+    lienzo = None
     with mp_hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
         while contador < tamanyo_dataset:
             ret, frame = capture.read()
             if not ret:
                 break
 
-            # Dibujar landmarks y extraer coordenadas
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(frame_rgb)
+            # Dibujar landmarks y extraer coordenadas. La deteccion se hace una sola vez sobre el
+            # frame limpio; los landmarks se dibujan en un lienzo aparte que no se usa para extraer
+            ctx = ContextoFrame(frame)
+            results = ctx.resultados_mp(hands)
+            lienzo = ctx.lienzo(lienzo)
 
             if results.multi_hand_landmarks:
                 for hand_landmarks in results.multi_hand_landmarks:
-                    mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+                    mp_drawing.draw_landmarks(lienzo, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
                 #Extraer coordenadas de landmarks de la mano
-                coords = extraer_landmarks(frame, hands)
+                coords = ctx.landmarks(hands)
                 if coords is not None:
-                    #Guardar en el directorio
-                    np.save(os.path.join(directorio, f"{contador}.npy"), coords)
-                    contador += 1
+                    normalizadas = normalizar_landmarks(coords) if indice is not None else None
+                    if indice is not None and indice.es_duplicado(normalizadas):
+                        rechazadas += 1
+                    else:
+                        #Guardar en el directorio
+                        ruta_muestra = os.path.join(directorio, f"{contador}.npy")
+                        np.save(ruta_muestra, coords)
+                        if almacen is not None:
+                            almacen.enviar(ruta_muestra, letra)
+                        contador += 1
+                        if indice is not None:
+                            indice.anyadir(normalizadas)
 
             #Mostrar contador de frames en pantalla
-            cv2.putText(frame, f"{contador}/{tamanyo_dataset}", (10, 30),
+            cv2.putText(lienzo, f"{contador}/{tamanyo_dataset}", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            cv2.imshow("Captura", frame)
+            if indice is not None:
+                cv2.putText(lienzo, f"Guardadas: {contador}  Rechazadas: {rechazadas}", (10, 60),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            cv2.imshow("Captura", lienzo)
 
             #Teclas de control
             key = cv2.waitKey(delay_ms) & 0xFF
@@ -161,3 +194,5 @@ def capturar_estatico_mediapipe(data_dir, letra, tamanyo_dataset=200, delay_ms=3
     capture.release()
     cv2.destroyAllWindows()
     print(f"Captura de la letra '{letra}' completada.")
+    if indice is not None:
+        print(f"Muestras guardadas: {contador}, descartadas por casi duplicadas: {rechazadas}")
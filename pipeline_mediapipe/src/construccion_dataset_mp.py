@@ -1,54 +1,64 @@
 import os
 import numpy as np
+from .aumentacion_mp import aumentar_landmarks
+from comun.recursos import etapa
+from comun.cache_dataset import actualizar_cache
 
-def construir_dataset_mediapipe(data_dir="data"):
+FEATURES_FILE_MP = "pipeline_mediapipe/features_mp.npz"
+
+
+
+def _cargar_npy(data_dir, rutas):
+    #Landmarks de los .npy indicados (rutas relativas "letra/fichero.npy")
+    X = [np.load(os.path.join(data_dir, ruta)) for ruta in rutas]
+    y = [ruta.split("/")[0] for ruta in rutas]
+    return np.array(X), np.array(y), np.array(rutas)
+
+
+
+def _aumentar_con_origen(X, y, origen, augment_factor):
+    #Las copias sinteticas van detras de las originales, en el mismo orden que np.repeat
+    X_aum, y_aum = aumentar_landmarks(X, y, factor=augment_factor)
+    return X_aum, y_aum, np.concatenate([origen, np.repeat(origen, augment_factor)])
+
+
+
+@etapa("construir_dataset_mediapipe")
+def construir_dataset_mediapipe(data_dir="data", augment=False, augment_factor=5, con_origen=False):
     """
     Construye el dataset a partir de los archivos .npy generados durante la captura,
     cargando los landmarks de cada gesto y asociandolos con su etiqueta correspondiente.
 
     Esta funcion recorre las carpetas dentro del directorio raiz especificado, asumiendo que
-    cada subcarpeta representa una letra o gesto distinto. De cada subcarpeta se cargan todos
-    los archivos .npy y se almacenan en dos arrays paralelos: uno con las caracteristicas (X)
-    y otro con las etiquetas (y).
+    cada subcarpeta representa una letra o gesto distinto. Los landmarks originales se guardan en
+    FEATURES_FILE_MP junto con el estado de cada .npy (tamanyo y fecha) y la carpeta de origen, asi
+    que la siguiente vez solo se leen los ficheros nuevos o modificados y una cache de otra carpeta
+    no se reutiliza.
 
     Args:
     --------
         - data_dir (str, opcional): Directorio raiz que contiene las carpetas de cada letra o gesto.
           Por defecto es "data".
+        - augment (bool, opcional): Si es True, anyade copias sinteticas con `aumentar_landmarks`
+          (rotacion, escala, traslacion, espejo y ruido sobre los landmarks). Por defecto, False.
+        - augment_factor (int, opcional): Copias sinteticas por muestra original. Por defecto, 5.
+        - con_origen (bool, opcional): Devolver tambien el .npy del que sale cada fila. Por defecto, False.
 
     Proceso:
     --------
-    1. Inicializa dos listas vacias, X e y.
-    2. Recorre todas las subcarpetas dentro de `data_dir`.
-    3. Por cada letra:
-        a. Verifica que sea un directorio valido.
-        b. Carga los archivos .npy correspondientes a esa letra.
-        c. Agrega las muestras al array X y las etiquetas al array y.
-    4. Convierte las listas a arrays de NumPy para su uso posterior en entrenamiento.
+    1. Compara los .npy de `data_dir` con los registrados en FEATURES_FILE_MP.
+    2. Carga solo los nuevos o modificados, quita los borrados y guarda la cache actualizada.
+    3. Si augment=True, genera las muestras sinteticas en una sola pasada vectorizada. Las copias
+       no se guardan en la cache: se generan al cargar, asi `augment` siempre se respeta.
 
     Retorna:
     --------
         - X (np.array): Array que contiene los landmarks de todas las muestras capturadas.
         - y (np.array): Array que contiene las etiquetas correspondientes a cada muestra.
+        - origen (np.array): Solo con `con_origen`, ruta relativa del .npy de cada fila.
     """
-
-    #Construccion de arrays
-    X, y = [], []
-
-    #Recorrer cada letra de la lista
-    for letra in os.listdir(data_dir):
-        letra_dir = os.path.join(data_dir, letra)
-        if not os.path.isdir(letra_dir):
-            continue
-
-        #Si existe el archivo
-        for file in os.listdir(letra_dir):
-            #Y es un archivo Numpy
-            if file.endswith(".npy"):
-                #Anyadimos a cada array correspondiente
-                X.append(np.load(os.path.join(letra_dir, file)))
-                y.append(letra)
-
-    X = np.array(X)
-    y = np.array(y)
-    return X, y
+    X, y, origen = actualizar_cache(FEATURES_FILE_MP, data_dir, {"augment_factor": 0},
+                                    lambda rutas: _cargar_npy(data_dir, rutas), extension=".npy")
+    if augment and len(X):
+        X, y, origen = _aumentar_con_origen(X, y, origen, augment_factor)
+    return (X, y, origen) if con_origen else (X, y)
@@ -1,12 +1,16 @@
 import os
 import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+from comun.recursos import etapa
 
 
-def entrenar_modelo_mediapipe(X, y, save_model="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl"):
+@etapa("entrenar_modelo_mediapipe")
+def entrenar_modelo_mediapipe(X, y, save_model="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl", coreset=None,
+                              aumentar=None):
     """
     Entrena un modelo de Random Forest para clasificacion de gestos de la mano usando los
     landmarks capturados y guarda el modelo junto con el Labelencoder.
@@ -23,12 +27,18 @@ def entrenar_modelo_mediapipe(X, y, save_model="pipeline_mediapipe/modelos_media
         - y (np.array): Array que contiene las etiquetas correspondientes a cada muestra.
         - save_model (str, opcional): Ruta completa donde se guardara el modelo entrenado. 
           Por defecto es "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl".
+        - coreset (float, opcional): Fraccion de muestras de entrenamiento por clase que se conserva
+          (k-center greedy) antes de entrenar. Por defecto, None (se usan todas).
+        - aumentar (callable, opcional): Funcion (X, y) -> (X, y) con data augmentation (p. ej.
+          `aumentar_landmarks`). Solo se aumenta el entrenamiento: el test son muestras reales que el
+          modelo no ha visto ni en copias sinteticas. Por defecto, None.
 
     Proceso:
     --------
     1. Crea el directorio donde se almacenara el modelo si no existe.
     2. Codifica las etiquetas con LabelEncoder.
-    3. Divide los datos en entrenamiento y prueba (80%-20%) con estratificacion.
+    3. Divide los datos en entrenamiento y prueba (80%-20%) con estratificacion y aumenta el entrenamiento.
+       Si se indica `coreset`, el conjunto de entrenamiento se reduce a un subconjunto representativo.
     4. Entrena un RandomForestClassifier con 200 estimadores y clases balanceadas.
     5. Evalua el modelo sobre el conjunto de prueba mostrando accuracy y reporte de clasificacion.
     6. Guarda el modelo y el LabelEncoder en la ruta especificada.
@@ -46,9 +56,18 @@ def entrenar_modelo_mediapipe(X, y, save_model="pipeline_mediapipe/modelos_media
     y_enc = le.fit_transform(y)
     
     X_train, X_test, y_train, y_test = train_test_split(X, y_enc, test_size=0.2, stratify=y, random_state=111)
+    if aumentar is not None:
+        X_train, y_train = aumentar(X_train, y_train)
+
+    #Reducir el entrenamiento a un subconjunto representativo por clase
+    if coreset is not None:
+        from comun.coreset import seleccionar_coreset
+        idx = seleccionar_coreset(X_train, y_train, fraccion=coreset, random_state=111)
+        print(f"Coreset: {len(idx)} de {len(X_train)} muestras de entrenamiento")
+        X_train, y_train = X_train[idx], y_train[idx]
     
     #Crear y entrenar modelo
-    rf = RandomForestClassifier(n_estimators=200, class_weight="balanced", random_state=111)
+    rf = RandomForestClassifier(n_estimators=200, class_weight="balanced", random_state=111, n_jobs=-1)
     rf.fit(X_train, y_train)
     
     #Hacer predicciones sobre test set
@@ -62,3 +81,158 @@ def entrenar_modelo_mediapipe(X, y, save_model="pipeline_mediapipe/modelos_media
     joblib.dump(rf, save_model)
     joblib.dump(le, save_model.replace(".pkl","_le.pkl"))
     print("Modelo y codificador guardados.")
+
+
+
+
+def buscar_modelo_mediapipe(X, y, param_grid=None, n_splits=5, n_jobs=-1,
+                            fichero_resultados="pipeline_mediapipe/modelos_mediapipe/busqueda_rf.jsonl",
+                            save_model="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl", aumentar=None):
+    """
+    Busca los hiperparametros del Random Forest de landmarks con validacion cruzada k-fold
+    en paralelo y guarda la mejor configuracion, reentrenada con todos los datos, en la
+    misma ruta que `entrenar_modelo_mediapipe`.
+
+    Args:
+    --------
+        - X (np.array): Array que contiene los landmarks de todas las muestras.
+        - y (np.array): Array que contiene las etiquetas correspondientes a cada muestra.
+        - param_grid (dict, opcional): Rejilla de parametros. Por defecto, la de `comun.busqueda`.
+        - n_splits (int, opcional): Numero de folds. Por defecto, 5.
+        - n_jobs (int, opcional): Numero de workers en paralelo. Por defecto, -1.
+        - fichero_resultados (str, opcional): Fichero JSONL con los resultados, permite reanudar
+          la busqueda si se cancela con Ctrl+C.
+        - save_model (str, opcional): Ruta donde se guardara el mejor modelo.
+        - aumentar (callable, opcional): Data augmentation de cada fold de entrenamiento y del modelo final.
+
+    Retorna:
+    --------
+        - bool: True si la busqueda ha terminado y el modelo se ha guardado, False si se ha cancelado.
+    """
+    from comun.busqueda import buscar_hiperparametros
+
+    os.makedirs("pipeline_mediapipe/modelos_mediapipe", exist_ok=True)
+    le = LabelEncoder()
+    y_enc = le.fit_transform(y)
+
+    resultados, completada = buscar_hiperparametros(X, y_enc, param_grid=param_grid, n_splits=n_splits,
+                                                    n_jobs=n_jobs, fichero_resultados=fichero_resultados,
+                                                    random_state=111, aumentar=aumentar)
+    if not completada or not resultados:
+        return False
+
+    #Reentrenar la mejor configuracion con todos los datos
+    if aumentar is not None:
+        X, y_enc = aumentar(X, y_enc)
+    rf = RandomForestClassifier(class_weight="balanced", random_state=111, n_jobs=-1, **resultados[0]["params"])
+    rf.fit(X, y_enc)
+
+    joblib.dump(rf, save_model)
+    joblib.dump(le, save_model.replace(".pkl","_le.pkl"))
+    print("Mejor modelo y codificador guardados.")
+    return True
+
+
+
+
+def dataset_con_correcciones_mp(data_dir="pipeline_mediapipe/data_mediapipe", peso_correcciones=5):
+    """
+    Dataset de reentrenamiento: todos los .npy de `data_dir`, incluidas las correcciones (corr_*.npy)
+    que guarda la prediccion en tiempo real. El disco es la unica fuente de las correcciones: cada
+    una entra una sola vez, con peso `peso_correcciones` en sus filas (tambien en sus copias aumentadas).
+
+    Args:
+    --------
+        - data_dir (str, opcional): Directorio con los .npy y las correcciones.
+        - peso_correcciones (float, opcional): Peso de cada correccion frente a una muestra del dataset.
+
+    Retorna:
+    --------
+        - X (np.array), y (np.array), pesos (np.array): Landmarks, etiquetas y peso de cada fila.
+    """
+    from comun.intercambio_modelos import pesos_correcciones
+    from .construccion_dataset_mp import construir_dataset_mediapipe
+
+    X, y, origen = construir_dataset_mediapipe(data_dir, augment=True, con_origen=True)
+    return X, y.astype(str), pesos_correcciones(origen, peso_correcciones)
+
+
+
+
+def reentrenar_con_correcciones_mp(data_dir="pipeline_mediapipe/data_mediapipe", peso_correcciones=5):
+    """
+    Reentrena el Random Forest de landmarks con el dataset de `data_dir`, que ya incluye las
+    correcciones hechas por el usuario durante la prediccion en tiempo real. No guarda nada: el
+    entrenador en segundo plano escribe el resultado de forma atomica para que el bucle lo cambie sin pararse.
+
+    Args:
+    --------
+        - data_dir (str, opcional): Directorio con los .npy y las correcciones.
+        - peso_correcciones (float, opcional): Peso de cada correccion frente a una muestra del dataset.
+
+    Retorna:
+    --------
+        - rf (RandomForestClassifier): Modelo reentrenado.
+        - le (LabelEncoder): Codificador de etiquetas (puede incluir letras nuevas).
+    """
+    X, y, pesos = dataset_con_correcciones_mp(data_dir, peso_correcciones)
+
+    le = LabelEncoder()
+    y_enc = le.fit_transform(y)
+
+    #Dejamos un nucleo libre para que el bucle en tiempo real no pierda frames
+    rf = RandomForestClassifier(n_estimators=200, class_weight="balanced", random_state=111, n_jobs=-2)
+    rf.fit(X, y_enc, sample_weight=pesos)
+    return rf, le
+
+
+
+
+def entrenar_incremental_mediapipe(data_dir="pipeline_mediapipe/data_mediapipe",
+                                   save_model="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl",
+                                   n_estimators=50, fraccion_repaso=0.2):
+    """
+    Entrenamiento incremental: anyade al modelo guardado un bosque entrenado solo con los landmarks
+    que no estaban en su ultimo entrenamiento (letras nuevas o mas muestras) y un repaso de los
+    antiguos, sin reentrenar los arboles existentes ni renumerar las clases del codificador.
+    Las muestras nuevas se buscan por contenido en el registro guardado junto al modelo
+    (`comun.cache_dataset.registrar_muestras`), no por fecha.
+
+    Args:
+    --------
+        - data_dir (str, opcional): Directorio con los .npy de cada letra.
+        - save_model (str, opcional): Ruta del modelo que se amplia.
+        - n_estimators (int, opcional): Arboles del nuevo miembro. Por defecto, 50.
+        - fraccion_repaso (float, opcional): Fraccion de cada clase antigua que se repasa. Por defecto, 0.2.
+
+    Retorna:
+    --------
+        - bool: True si se ha ampliado el modelo, False si no habia muestras nuevas.
+    """
+    from comun.incremental import entrenar_incremental
+    from comun.intercambio_modelos import guardar_modelo_atomico
+    from comun.seleccion_features import cargar_seleccion
+    from comun.cache_dataset import muestras_nuevas, registrar_muestras
+    from .construccion_dataset_mp import construir_dataset_mediapipe
+
+    ruta_le = save_model.replace(".pkl","_le.pkl")
+    modelo = joblib.load(save_model)
+    le = joblib.load(ruta_le)
+    if cargar_seleccion(save_model, modelo) is not None:
+        raise ValueError("El modelo guardado usa una selección de landmarks; entrena primero el modelo completo.")
+
+    nuevas, ajustes = muestras_nuevas(save_model, data_dir, extension=".npy")
+    if not nuevas:
+        print("No hay muestras nuevas desde el último entrenamiento.")
+        return False
+
+    #Nuevas y repaso salen del mismo dataset, con la augmentation con la que se entreno el modelo
+    factor = ajustes["augment_factor"]
+    X, y, origen = construir_dataset_mediapipe(data_dir, augment=factor > 0, augment_factor=factor, con_origen=True)
+    es_nueva = np.isin(origen, nuevas)
+    modelo, le = entrenar_incremental(modelo, le, X[es_nueva], y[es_nueva], X[~es_nueva], y[~es_nueva],
+                                      n_estimators=n_estimators, fraccion_repaso=fraccion_repaso)
+    guardar_modelo_atomico(modelo, le, save_model, ruta_le, formato="joblib")
+    registrar_muestras(save_model, data_dir, ajustes, extension=".npy")
+    print("Modelo y codificador ampliados guardados.")
+    return True
@@ -4,13 +4,43 @@ import mediapipe as mp
 
 mp_hands = mp.solutions.hands
 
-def extraer_landmarks(frame, hands=None):
+#Columnas (x, y, z) de cada uno de los 21 landmarks en el vector de extraer_landmarks()
+GRUPOS_LANDMARKS = {i: [3*i, 3*i + 1, 3*i + 2] for i in range(21)}
+
+def extraer_landmarks(frame, hands=None, puntos=None):
+    #Con `puntos` solo se devuelven las coordenadas de esos landmarks (en orden creciente)
     if hands is None:
         hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1)
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
+    return landmarks_desde_resultados(hands.process(frame_rgb), puntos)
+
+
+def landmarks_desde_resultados(results, puntos=None):
+    #Vector de landmarks a partir de una salida de hands.process() ya calculada
     if not results.multi_hand_landmarks:
         return None
-    lm = results.multi_hand_landmarks[0]
-    coords = np.array([[p.x, p.y, p.z] for p in lm.landmark]).flatten()
+    lm = results.multi_hand_landmarks[0].landmark
+    if puntos is not None:
+        lm = [lm[i] for i in sorted(puntos)]
+    coords = np.array([[p.x, p.y, p.z] for p in lm]).flatten()
     return coords
+
+
+def normalizar_landmarks(coords):
+    """
+    Normaliza landmarks para que no dependan de la posicion ni del tamanyo de la mano en la imagen:
+    se centran en la muneca (landmark 0) y se escalan por la distancia al punto mas alejado.
+
+    Args:
+    --------
+        - coords (np.array): Vector de 63 coordenadas o array (N, 63) con varias muestras.
+
+    Retorna:
+    --------
+        - np.array: Landmarks normalizados con la misma forma que la entrada.
+    """
+    puntos = np.asarray(coords, dtype=np.float64).reshape(-1, 21, 3)
+    puntos = puntos - puntos[:, :1, :]
+    escala = np.linalg.norm(puntos, axis=2).max(axis=1)
+    puntos = puntos / np.maximum(escala, 1e-8)[:, None, None]
+    return puntos.reshape(np.shape(coords))
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from .extraccion_caracteristicas_mp import extraer_landmarks
+
+mp_hands = mp.solutions.hands
+
+EXT_IMAGEN = {".jpg", ".jpeg", ".png", ".bmp"}
+EXT_VIDEO = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+MANIFIESTO = "_ingesta_hecha.jsonl"  #Ficheros de origen ya procesados, para poder reanudar
+
+#MediaPipe Hands de cada proceso worker (uno en modo estatico y otro con seguimiento)
+_HANDS = {}
+
+
+def _obtener_hands(estatico):
+    if estatico not in _HANDS:
+        _HANDS[estatico] = mp_hands.Hands(static_image_mode=estatico, max_num_hands=1)
+    return _HANDS[estatico]
+
+
+
+def _procesar_fichero(ruta, letra, directorio_letra, prefijo, cada_n_frames):
+    #Extrae los landmarks de una imagen o de los frames de un video y los guarda como .npy
+    os.makedirs(directorio_letra, exist_ok=True)
+    extension = os.path.splitext(ruta)[1].lower()
+    frames = detectados = 0
+
+    if extension in EXT_IMAGEN:
+        frame = cv2.imread(ruta)
+        if frame is not None:
+            frames = 1
+            coords = extraer_landmarks(frame, _obtener_hands(True))
+            if coords is not None:
+                np.save(os.path.join(directorio_letra, f"{prefijo}_0.npy"), coords)
+                detectados = 1
+
+    else:
+        hands = _obtener_hands(False)
+        hands.reset()  #Cada video empieza sin el seguimiento del anterior
+        cap = cv2.VideoCapture(ruta)
+        indice = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if indice % cada_n_frames == 0:
+                frames += 1
+                coords = extraer_landmarks(frame, hands)
+                if coords is not None:
+                    np.save(os.path.join(directorio_letra, f"{prefijo}_{indice}.npy"), coords)
+                    detectados += 1
+            indice += 1
+        cap.release()
+
+    return {"ruta": ruta, "letra": letra, "frames": frames, "detectados": detectados}
+
+
+
+def _listar_origen(origen_dir):
+    #Recorre las carpetas etiquetadas (una por letra) buscando imagenes y videos
+    tareas = []
+    for letra in sorted(os.listdir(origen_dir)):
+        carpeta = os.path.join(origen_dir, letra)
+        if not os.path.isdir(carpeta):
+            continue
+        for raiz, _, ficheros in os.walk(carpeta):
+            for fichero in sorted(ficheros):
+                if os.path.splitext(fichero)[1].lower() in EXT_IMAGEN | EXT_VIDEO:
+                    tareas.append((os.path.join(raiz, fichero), letra))
+    return tareas
+
+
+
+def ingestar_carpeta(origen_dir, data_dir="pipeline_mediapipe/data_mediapipe", n_workers=None, cada_n_frames=1):
+    """
+    Extrae en lote los landmarks de un archivo de imagenes y videos etiquetados y los guarda
+    directamente en el directorio del dataset, con el mismo formato que la captura por webcam.
+
+    Args:
+    --------
+        - origen_dir (str): Directorio con una carpeta por letra que contiene imagenes y/o videos.
+        - data_dir (str, opcional): Directorio del dataset donde se guardan los .npy por letra.
+        - n_workers (int, opcional): Procesos en paralelo. Por defecto, uno por nucleo.
+        - cada_n_frames (int, opcional): En los videos, se procesa un frame de cada N. Por defecto, 1.
+
+    Proceso:
+    --------
+    1. Lista los ficheros de origen y descarta los que ya aparecen en el manifiesto de `data_dir`.
+    2. Reparte los ficheros entre procesos worker, cada uno con su propio MediaPipe Hands
+       (modo estatico para imagenes y con seguimiento para videos).
+    3. Cada landmark detectado se guarda como .npy en `data_dir/<letra>/`.
+    4. Cada fichero terminado se anota en el manifiesto (por su ruta relativa a `origen_dir`), asi al
+       relanzar se continua donde se quedo. Un fichero que falla se anota con el error y se sigue con
+       el resto; al relanzar se vuelve a intentar.
+    5. Muestra el throughput y la tasa de deteccion de la mano por clase.
+
+    Retorna:
+    --------
+        - dict: Frames procesados y detectados por letra.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    ruta_manifiesto = os.path.join(data_dir, MANIFIESTO)
+
+    #Misma clave que el prefijo de los .npy: la ruta relativa, no depende de como se escriba origen_dir
+    hechos = set()
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                    if "error" not in registro:
+                        hechos.add(registro.get("relativa") or os.path.relpath(registro["ruta"], origen_dir))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+    tareas = [(ruta, letra) for ruta, letra in _listar_origen(origen_dir)
+              if os.path.relpath(ruta, origen_dir) not in hechos]
+    if hechos:
+        print(f"Reanudando ingesta: {len(hechos)} ficheros ya procesados, {len(tareas)} pendientes.")
+
+    stats = {}
+    errores = 0
+    inicio = time.perf_counter()
+    total_frames = 0
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool, \
+         open(ruta_manifiesto, "a", encoding="utf-8") as manifiesto:
+        futuros = {}
+        for ruta, letra in tareas:
+            #Prefijo estable por fichero de origen: si se repite, sobrescribe en lugar de duplicar
+            relativa = os.path.relpath(ruta, origen_dir)
+            prefijo = "ing_" + hashlib.md5(relativa.encode("utf-8")).hexdigest()[:12]
+            futuro = pool.submit(_procesar_fichero, ruta, letra, os.path.join(data_dir, letra), prefijo, cada_n_frames)
+            futuros[futuro] = (relativa, letra)
+
+        try:
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                relativa, letra = futuros[futuro]
+                try:
+                    r = futuro.result()
+                except Exception as e:
+                    #Un fichero corrupto (o un worker caido) no para la ingesta
+                    errores += 1
+                    manifiesto.write(json.dumps({"relativa": relativa, "letra": letra, "error": repr(e)}) + "\n")
+                    manifiesto.flush()
+                    print(f"Error en {relativa}: {e}")
+                    continue
+                r["relativa"] = relativa
+                manifiesto.write(json.dumps(r) + "\n")
+                manifiesto.flush()
+
+                s = stats.setdefault(r["letra"], {"ficheros": 0, "frames": 0, "detectados": 0})
+                s["ficheros"] += 1
+                s["frames"] += r["frames"]
+                s["detectados"] += r["detectados"]
+                total_frames += r["frames"]
+
+                if i % 50 == 0 or i == len(futuros):
+                    transcurrido = time.perf_counter() - inicio
+                    print(f"[{i}/{len(futuros)}] {total_frames / transcurrido:.1f} frames/s")
+
+        except KeyboardInterrupt:
+            for futuro in futuros:
+                futuro.cancel()
+            print("\nIngesta interrumpida. Vuelve a lanzarla para continuar.")
+
+    if errores:
+        print(f"{errores} ficheros no se pudieron procesar (anotados en {ruta_manifiesto}).")
+    print(f"\n{'Letra':<8}{'Ficheros':>10}{'Frames':>10}{'Con mano':>10}{'Detección':>11}")
+    for letra, s in sorted(stats.items()):
+        tasa = s["detectados"] / s["frames"] * 100 if s["frames"] else 0.0
+        print(f"{letra:<8}{s['ficheros']:>10}{s['frames']:>10}{s['detectados']:>10}{tasa:>10.1f}%")
+
+    return stats
@@ -1,13 +1,64 @@
+import os
+import time
 import joblib
 import mediapipe as mp
 import cv2
 import numpy as np
-from .extraccion_caracteristicas_mp import extraer_landmarks
+from comun.salida_temprana import BosqueSalidaTemprana, envolver_si_es_bosque
+from comun.intercambio_modelos import ModeloIntercambiable, EntrenadorFondo, EditorCorrecciones, guardar_modelo_atomico
+from comun.perfiles import obtener_perfil
+from comun.arranque import Arranque, cargar_en_cache
+from comun.contexto_frame import ContextoFrame
+from comun.sesiones import crear_grabador
+from comun.destilacion import cargar_alumno
+from comun.seleccion_features import cargar_seleccion
+from comun.memoizacion import PrediccionMemoizada, escala_desde_cache
+from comun.cache_dataset import registrar_muestras
+from .construccion_dataset_mp import FEATURES_FILE_MP
 
 mp_hands = mp.solutions.hands
 
+RUTA_ALUMNO_MP = "pipeline_mediapipe/modelos_mediapipe/alumno.npz"  #Modelo destilado (comun.destilacion)
 
-def prediccion_tiempo_real_mediapipe(model_path="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl"):
+
+def guardar_correccion_mp(data_dir, etiqueta, muestras):
+    #Las correcciones se guardan como el resto de muestras (.npy) para futuros entrenamientos
+    directorio = os.path.join(data_dir, etiqueta)
+    os.makedirs(directorio, exist_ok=True)
+    marca = time.strftime("%Y%m%d_%H%M%S") + f"_{time.time_ns() % 10**9:09d}"  #Dos correcciones en el mismo segundo no se pisan
+    for i, coords in enumerate(muestras):
+        np.save(os.path.join(directorio, f"corr_{marca}_{i}.npy"), coords)
+
+
+
+def guardar_reentrenado_mp(modelo, le, model_path, data_dir):
+    #El reentrenamiento usa todo data_dir: se registran sus .npy para el entrenamiento incremental
+    guardar_modelo_atomico(modelo, le, model_path, model_path.replace(".pkl","_le.pkl"), formato="joblib")
+    registrar_muestras(model_path, data_dir, {"augment_factor": 5}, extension=".npy")
+
+
+
+def puntos_del_modelo(model_path, modelo):
+    #Landmarks que usa el modelo y sus columnas en el vector completo (None, None si usa todos)
+    seleccion = cargar_seleccion(model_path, modelo)
+    if seleccion is None:
+        return None, None
+    return seleccion["grupos"], seleccion["indices"]
+
+
+
+def cargar_modelo_mp(model_path):
+    #Random Forest (joblib) o modelo destilado (.npz) con su codificador; en memoria mientras no cambie en disco
+    if model_path.endswith(".npz"):
+        return cargar_en_cache(model_path, lambda: cargar_alumno(model_path))
+    return cargar_en_cache(model_path, lambda: (joblib.load(model_path),
+                                                joblib.load(model_path.replace(".pkl","_le.pkl"))))
+
+
+def prediccion_tiempo_real_mediapipe(model_path="pipeline_mediapipe/modelos_mediapipe/rf_model.pkl",
+                                     fuente=0, mostrar=True, salida_temprana=False, delta=None,
+                                     en_caliente=False, data_dir="pipeline_mediapipe/data_mediapipe", perfil=None,
+                                     memoizar=False, tolerancia_memo=0.05, grabar=None, arranque=None):
     """
     Realiza la prediccion de gestos de la mano en tiempo real utilizando un modelo Random Forest
     previamente entrenado con los landmarks capturados.
@@ -18,51 +69,138 @@ def prediccion_tiempo_real_mediapipe(model_path="pipeline_mediapipe/modelos_medi
 
     Args:
     --------
-        - model_path (str, opcional): Ruta completa del modelo entrenado Random Forest a cargar. 
-          Por defecto es "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl".
+        - model_path (str, opcional): Ruta completa del modelo entrenado Random Forest a cargar, o del
+          modelo destilado (.npz) de `comun.destilacion`. Por defecto es "pipeline_mediapipe/modelos_mediapipe/rf_model.pkl".
+        - fuente (int | str, opcional): Indice de camara, ruta de un video o de una sesion .ses grabada. Por defecto, 0.
+        - mostrar (bool, opcional): Si es False no se abre ninguna ventana (reproduccion de
+          sesiones grabadas). Por defecto, True.
+        - salida_temprana (bool, opcional): Si es True, los arboles se evaluan en orden y se deja de
+          evaluar cuando el voto ganador ya no puede cambiar. Por defecto, False.
+        - delta (float, opcional): Con salida temprana, probabilidad de error admitida para parar
+          antes por confianza. Por defecto, None.
+        - en_caliente (bool, opcional): Si es True, el modelo se recarga solo cuando cambia en disco y
+          se pueden corregir letras con la tecla 'c'; el reentrenamiento se hace en segundo plano sin
+          detener la prediccion. Por defecto, False.
+        - data_dir (str, opcional): Directorio de landmarks donde se guardan las correcciones.
+        - perfil (str, opcional): Perfil de rendimiento de `comun.perfiles` ("baja_latencia", "equilibrado",
+          "preciso"): captura de la camara, complejidad y umbrales de MediaPipe, reduccion de la imagen
+          y ventana de suavizado. Por defecto, None (ajustes por defecto).
+        - memoizar (bool, opcional): Si es True, se reutiliza la ultima prediccion mientras los landmarks
+          no cambien mas de `tolerancia_memo` (mano quieta) y las posturas ya vistas se sirven de una
+          cache LRU. Por defecto, False.
+        - tolerancia_memo (float, opcional): Cambio maximo por coordenada, en desviaciones tipicas del
+          dataset, para reutilizar la prediccion. Por defecto, 0.05.
+        - grabar (str | GrabadorSesion, opcional): Fichero .ses (o grabador ya configurado) donde se graba la
+          sesion en segundo plano: frames, landmarks, predicciones y tiempos de cada etapa. La sesion se
+          puede volver a pasar como `fuente`. Por defecto, None.
+        - arranque (Arranque, opcional): Arranque de `comun.arranque` creado con `cargar_modelo_mp` (el menu
+          lo crea antes de las preguntas para que el modelo se cargue mientras se responden). Sin el, se crea
+          uno aqui. Por defecto, None.
 
     Proceso:
     --------
-    1. Carga el modelo Random Forest y el labelencoder.
-    2. Inicializa la camara para captura de video.
+    1. Carga el modelo Random Forest y el labelencoder, abre la camara y crea el detector de MediaPipe
+       en paralelo, con inferencias de prueba antes del primer frame (`comun.arranque`).
+    2. Muestra el tiempo hasta la primera prediccion.
     3. Crea un buffer de predicciones para suavizar la salida.
     4. Por cada frame capturado:
-        a. Extrae los landmarks de la mano usando MediaPipe y la funcion `extraer_landmarks`.
+        a. Extrae los landmarks de la mano usando MediaPipe a traves de `ContextoFrame`
+           (solo los puntos que usa el modelo si se ha guardado una seleccion de caracteristicas).
         b. Si se detecta la mano, realiza la prediccion y actualiza el buffer.
-        c. Calcula la prediccion mas frecuente en el buffer y la muestra sobre el frame.
+        c. Calcula la prediccion mas frecuente en el buffer y la muestra sobre una copia del frame.
         d. Si no se detecta la mano, muestra el mensaje "Gesto no detectado".
     5. Muestra la ventana de prediccion en tiempo real hasta que el usuario presione 'q'.
+       Con `en_caliente`, al pulsar 'c', escribir la letra correcta y Enter se graban muestras
+       que reentrenan el modelo en segundo plano; la nueva version se usa en cuanto esta lista.
     6. Libera la camara y cierra todas las ventanas al finalizar.
 
     Retorna:
     --------
-        - None: La funcion no devuelve valores; solo muestra la prediccion visual en pantalla.
+        - historial (list[dict]): Por cada frame, la latencia en segundos (lectura + procesado, sin
+          visualizacion) y la letra suavizada (None si no se detecta la mano).
     """
 
-    #Cargar modelo y codificador
-    rf = joblib.load(model_path)
-    le = joblib.load(model_path.replace(".pkl","_le.pkl"))
+    #Modelo, camara y detector de MediaPipe en paralelo
+    if arranque is None:
+        arranque = Arranque(lambda: cargar_modelo_mp(model_path), informe=False)
+    ajustes = obtener_perfil(perfil)
+    cap = arranque.abrir(fuente, ajustes, con_hands=True)
+    rf, le = arranque.modelo
+    if model_path.endswith(".npz") and en_caliente:
+        #Modelo destilado: solo NumPy. Las correcciones reentrenan el Random Forest, asi que no se recarga
+        print("Con el modelo destilado no se recarga en caliente; las correcciones se desactivan.")
+        en_caliente = False
+    if salida_temprana:
+        rf = envolver_si_es_bosque(rf, delta)
+
+    modelos, entrenador, editor = None, None, None
+    if en_caliente:
+        from .entrenamiento_mp import reentrenar_con_correcciones_mp
+
+        ruta_le = model_path.replace(".pkl","_le.pkl")
+        envolver = (lambda m: envolver_si_es_bosque(m, delta)) if salida_temprana else None
+        modelos = ModeloIntercambiable(model_path, ruta_le, inicial=(rf, le), envolver=envolver)
+        entrenador = EntrenadorFondo(
+            lambda: reentrenar_con_correcciones_mp(data_dir),
+            lambda m, codificador: guardar_reentrenado_mp(m, codificador, model_path, data_dir),
+        )
+        editor = EditorCorrecciones()
     
-    #Abrir camara y configuracion inicial
-    cap = cv2.VideoCapture(0)
+    #Configuracion inicial
     buffer_preds = []
-    buffer_size = 5
+    buffer_size = ajustes["buffer_size"] if ajustes is not None else 5
+    escala = ajustes["escala"] if ajustes is not None else 1.0
+    historial = []
+    lienzo = None
+    puntos, columnas = puntos_del_modelo(model_path, rf)
+    grabador = crear_grabador(grabar, {"pipeline": "mediapipe", "fuente": str(fuente), "perfil": perfil, "puntos": puntos})
+    memo = None
+    if memoizar:
+        memo = PrediccionMemoizada(rf, le, tolerancia_memo, escala=escala_desde_cache(FEATURES_FILE_MP, columnas=columnas))
     
-    #Crear mp hands para poder detectar la mano
-    with mp_hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
+    #Detector de manos ya creado y calentado por el arranque
+    with arranque.hands as hands:
         while True:
             #Captura de cada frame
+            inicio = time.perf_counter()
             ret, frame = cap.read()
             if not ret:
                 break
+            tiempos = {"lectura": time.perf_counter() - inicio}
+            letra, pred = None, None
+            arranque.marcar("primer_frame")
 
-            #Extraccion de landmarks
-            landmarks = extraer_landmarks(frame, hands)
+            #Ultima version del modelo; si ha cambiado, los indices del buffer ya no valen
+            if modelos is not None:
+                nuevo, le = modelos.actual()
+                if nuevo is not rf:
+                    rf = nuevo
+                    buffer_preds = []
+                    puntos, columnas = puntos_del_modelo(model_path, rf)
+                    if memo is not None:
+                        memo.cambiar_modelo(rf, le, escala_desde_cache(FEATURES_FILE_MP, columnas=columnas))
+
+            #Extraccion de landmarks (con correcciones activas se extraen todos, el reentrenamiento los usa)
+            ctx = ContextoFrame(frame)
+            landmarks = ctx.landmarks(hands, None if editor is not None else puntos, escala)
+            tiempos["extraccion"] = time.perf_counter() - inicio - tiempos["lectura"]
             
             #Si se han detectado landmarks
             if landmarks is not None:
                 #Predice el gesto
-                pred = rf.predict([landmarks])[0]
+                entrada = landmarks[columnas] if editor is not None and columnas is not None else landmarks
+                pred = memo.predecir(entrada)[0] if memo is not None else rf.predict([entrada])[0]
+                tiempos["prediccion"] = time.perf_counter() - inicio - tiempos["lectura"] - tiempos["extraccion"]
+                arranque.marcar("primera_prediccion")
+
+                #Muestras de la correccion en curso
+                if editor is not None:
+                    completa = editor.anyadir_muestra(landmarks)
+                    if completa is not None:
+                        etiqueta, muestras, _ = completa
+                        guardar_correccion_mp(data_dir, etiqueta, muestras)
+                        entrenador.anyadir(len(muestras))
+
                 #Lo anyade al buffer
                 buffer_preds.append(pred)
                 #Eliminar la prediccion mas antigua para anyadir la mas actual
@@ -73,20 +211,44 @@ def prediccion_tiempo_real_mediapipe(model_path="pipeline_mediapipe/modelos_medi
                 final_pred = np.bincount(buffer_preds).argmax()
                 #Obtenemos la letra (conversion de numero a letra)
                 letra = le.inverse_transform([final_pred])[0]
-                #Se anyade a la pantalla
-                cv2.putText(frame, f"Gesto: {letra}", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,255,0),2)
-            
-            #Si no se han detectado landmarks
-            else:
-                cv2.putText(frame, "Gesto no detectado", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,0,255),2)
-            
 
-            #Abrir la pantalla
-            cv2.imshow("Predicción en tiempo real", frame)
+            historial.append({"latencia": time.perf_counter() - inicio, "etiqueta": letra})
+            if grabador is not None:
+                grabador.grabar(frame, landmarks, pred, letra, tiempos)
 
-            #Salir si se pulsa la letra 'q'
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            if mostrar:
+                #Se anyade a la pantalla en un lienzo aparte (el frame del contexto es de solo lectura)
+                lienzo = ctx.lienzo(lienzo)
+                if letra is not None:
+                    cv2.putText(lienzo, f"Gesto: {letra}", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,255,0),2)
+                #Si no se han detectado landmarks
+                else:
+                    cv2.putText(lienzo, "Gesto no detectado", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,0,255),2)
+                if editor is not None:
+                    editor.dibujar(lienzo)
+                #Abrir la pantalla
+                cv2.imshow("Predicción en tiempo real", lienzo)
+
+                #Salir si se pulsa la letra 'q' (las teclas de la correccion las gestiona el editor)
+                key = cv2.waitKey(1) & 0xFF
+                if editor is not None and editor.procesar_tecla(key):
+                    continue
+                if key == ord('q'):
+                    break
                 
     cap.release()
-    cv2.destroyAllWindows()
+    arranque.cerrar()
+    if mostrar:
+        cv2.destroyAllWindows()
+    if grabador is not None:
+        grabador.cerrar()
+    if modelos is not None:
+        modelos.parar()
+        if entrenador.entrenando:
+            print("Esperando a que termine el reentrenamiento en curso...")
+        entrenador.parar()
+    if isinstance(rf, BosqueSalidaTemprana):
+        rf.resumen()
+    if memo is not None:
+        memo.resumen()
+    return historial
@@ -0,0 +1,361 @@
+import os
+import sys
+import cv2
+import joblib
+import numpy as np
+import mediapipe as mp
+
+from .extraccion_caracteristicas_mp import extraer_landmarks
+
+mp_hands = mp.solutions.hands
+mp_drawing = mp.solutions.drawing_utils
+
+#Letras del abecedario que implican movimiento de la mano
+LETRAS_DINAMICAS = ["J", "Z", "CH", "LL", "RR", "Ñ"]
+
+LONGITUD_VENTANA = 30  #Frames por secuencia
+N_LANDMARKS = 21
+DIM_LANDMARKS = N_LANDMARKS * 3
+
+
+class BufferSecuencia:
+    """
+    Buffer circular con los ultimos landmarks de la mano que mantiene de forma incremental
+    las caracteristicas de movimiento de la ventana.
+
+    Cada frame que entra suma su contribucion y el frame que sale de la ventana resta la
+    suya, por lo que anyadir un frame y obtener las caracteristicas cuesta O(1) respecto
+    a la longitud de la ventana.
+
+    Caracteristicas de la ventana:
+    ------------------------------
+    1. Posicion actual de los 21 landmarks (63).
+    2. Posicion media en la ventana (63).
+    3. Desplazamiento neto entre el primer y el ultimo frame (63).
+    4. Varianza de la velocidad frame a frame (63).
+    5. Longitud de la trayectoria recorrida por cada landmark (21).
+    """
+
+    def __init__(self, longitud=LONGITUD_VENTANA, dim=DIM_LANDMARKS):
+        self.longitud = longitud
+        self.dim = dim
+        self.posiciones = np.zeros((longitud, dim))
+        self.velocidades = np.zeros((longitud, dim))
+        self.rapideces = np.zeros((longitud, dim // 3))
+        self.reiniciar()
+
+
+    def reiniciar(self):
+        #Vacia la ventana (por ejemplo cuando se pierde la mano)
+        self.inicio = 0  #Posicion del frame mas antiguo
+        self.n = 0
+        self.suma_pos = np.zeros(self.dim)
+        self.suma_vel = np.zeros(self.dim)
+        self.suma_vel2 = np.zeros(self.dim)
+        self.suma_rapidez = np.zeros(self.dim // 3)
+        self._anyadidos = 0
+
+
+    @property
+    def lleno(self):
+        return self.n == self.longitud
+
+
+    def anyadir(self, landmarks):
+        #Anyade los landmarks de un frame actualizando las sumas de la ventana
+        landmarks = np.asarray(landmarks, dtype=np.float64).reshape(self.dim)
+
+        if self.lleno:
+            #Sale el frame mas antiguo y la velocidad del siguiente (que pasa a ser el primero)
+            self.suma_pos -= self.posiciones[self.inicio]
+            siguiente = (self.inicio + 1) % self.longitud
+            self._quitar_velocidad(siguiente)
+            destino = self.inicio
+            self.inicio = siguiente
+        else:
+            destino = (self.inicio + self.n) % self.longitud
+            self.n += 1
+
+        #Velocidad respecto al frame anterior (el primero de la ventana no tiene)
+        if self.n > 1:
+            anterior = (destino - 1) % self.longitud
+            vel = landmarks - self.posiciones[anterior]
+            rapidez = np.linalg.norm(vel.reshape(-1, 3), axis=1)
+            self.velocidades[destino] = vel
+            self.rapideces[destino] = rapidez
+            self.suma_vel += vel
+            self.suma_vel2 += vel * vel
+            self.suma_rapidez += rapidez
+
+        self.posiciones[destino] = landmarks
+        self.suma_pos += landmarks
+
+        #Recalculamos las sumas de vez en cuando para que no se acumule error numerico
+        self._anyadidos += 1
+        if self._anyadidos % (self.longitud * 100) == 0:
+            self._recalcular()
+
+
+    def _quitar_velocidad(self, indice):
+        self.suma_vel -= self.velocidades[indice]
+        self.suma_vel2 -= self.velocidades[indice] ** 2
+        self.suma_rapidez -= self.rapideces[indice]
+
+
+    def _recalcular(self):
+        orden = (self.inicio + np.arange(self.n)) % self.longitud
+        vel = self.velocidades[orden[1:]]
+        self.suma_pos = self.posiciones[orden].sum(axis=0)
+        self.suma_vel = vel.sum(axis=0)
+        self.suma_vel2 = (vel ** 2).sum(axis=0)
+        self.suma_rapidez = self.rapideces[orden[1:]].sum(axis=0)
+
+
+    def caracteristicas(self):
+        #Vector de caracteristicas de la ventana actual a partir de las sumas
+        ultimo = self.posiciones[(self.inicio + self.n - 1) % self.longitud]
+        primero = self.posiciones[self.inicio]
+        n_vel = max(self.n - 1, 1)
+        media_vel = self.suma_vel / n_vel
+        var_vel = np.maximum(self.suma_vel2 / n_vel - media_vel ** 2, 0)
+
+        return np.hstack([ultimo, self.suma_pos / max(self.n, 1), ultimo - primero,
+                          var_vel, self.suma_rapidez])
+
+
+
+def caracteristicas_secuencia(secuencia, longitud=LONGITUD_VENTANA, stride=None):
+    """
+    Calcula las caracteristicas de las ventanas de una secuencia de landmarks pasando
+    los frames por un BufferSecuencia, igual que se hace en tiempo real.
+
+    Args:
+    --------
+        - secuencia (np.array): Array (frames, 63) con los landmarks de cada frame.
+        - longitud (int, opcional): Longitud de la ventana. Por defecto, LONGITUD_VENTANA.
+        - stride (int, opcional): Si la secuencia es mas larga que la ventana, se extrae una
+          ventana cada `stride` frames. Por defecto solo se usa la ventana final.
+
+    Retorna:
+    --------
+        - list[np.array]: Vectores de caracteristicas de cada ventana completa.
+    """
+    buffer = BufferSecuencia(longitud)
+    ventanas = []
+    for i, landmarks in enumerate(np.asarray(secuencia).reshape(len(secuencia), -1)):
+        buffer.anyadir(landmarks)
+        if buffer.lleno and stride is not None and (i + 1 - longitud) % stride == 0:
+            ventanas.append(buffer.caracteristicas())
+
+    if stride is None and buffer.lleno:
+        ventanas.append(buffer.caracteristicas())
+    return ventanas
+
+
+
+def capturar_secuencias_mediapipe(data_dir, letras, n_secuencias=30, longitud=LONGITUD_VENTANA,
+                                  delay_ms=30, pausa_ms=1000):
+    """
+    Captura secuencias de landmarks de longitud fija para cada letra y las guarda como
+    archivos .npy de forma (longitud, 63) en el directorio de la letra.
+
+    Args:
+    --------
+        - data_dir (str): Directorio raiz donde se guardaran las secuencias por letra.
+        - letras (list[str]): Letras que se desean capturar.
+        - n_secuencias (int, opcional): Secuencias a capturar por letra. Por defecto, 30.
+        - longitud (int, opcional): Frames por secuencia. Por defecto, LONGITUD_VENTANA.
+        - delay_ms (int, opcional): Espera entre frames en milisegundos. Por defecto, 30.
+        - pausa_ms (int, opcional): Pausa entre secuencias para volver a la postura inicial.
+
+    Controles de teclado:
+    --------
+        - 'n': Inicia la captura de la letra.
+        - 'q': Pasa a la siguiente letra.
+        - 'w': Vuelve al menu principal.
+
+    Proceso:
+    --------
+    1. Espera a que el usuario presione 'n' para empezar con cada letra.
+    2. Graba frames consecutivos con la mano detectada hasta completar la secuencia.
+       Si la mano se pierde a mitad, la secuencia se descarta y se empieza de nuevo.
+    3. Guarda cada secuencia completa y hace una pausa antes de la siguiente.
+
+    Retorna:
+    --------
+        - None
+    """
+    capture = cv2.VideoCapture(0)
+    if not capture.isOpened():
+        print("No se ha podido abrir la cámara.")
+        return
+
+    with mp_hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
+        for letra in letras:
+            directorio = os.path.join(data_dir, letra)
+            os.makedirs(directorio, exist_ok=True)
+
+            print(f"Prepárate para capturar secuencias de la letra '{letra}'. Presiona 'n' para empezar, 'q' para pasar a la siguiente o 'w' para volver al menú.")
+
+            #Esperar a que el usuario pulse 'n'
+            tecla = None
+            while True:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                cv2.putText(frame, f"Letra {letra}: pulsa 'n'", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                cv2.imshow("Captura secuencias", frame)
+                key = cv2.waitKey(30) & 0xFF
+                if key in (ord('n'), ord('q'), ord('w')):
+                    tecla = chr(key)
+                    break
+
+            if tecla == 'q':
+                continue
+            if tecla != 'n':
+                capture.release()
+                cv2.destroyAllWindows()
+                print("Volviendo al menú principal...")
+                return
+
+            guardadas = 0
+            secuencia = []
+            while guardadas < n_secuencias:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+
+                coords = extraer_landmarks(frame, hands)
+                if coords is not None:
+                    secuencia.append(coords)
+                else:
+                    secuencia = [] #Secuencia incompleta, se descarta
+
+                if len(secuencia) == longitud:
+                    np.save(os.path.join(directorio, f"{guardadas}.npy"), np.array(secuencia))
+                    guardadas += 1
+                    secuencia = []
+                    cv2.putText(frame, "Secuencia guardada", (10, 70),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                    cv2.imshow("Captura secuencias", frame)
+                    cv2.waitKey(pausa_ms)
+                    continue
+
+                cv2.putText(frame, f"{guardadas}/{n_secuencias}  frame {len(secuencia)}/{longitud}", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                cv2.imshow("Captura secuencias", frame)
+
+                key = cv2.waitKey(delay_ms) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('w'):
+                    capture.release()
+                    cv2.destroyAllWindows()
+                    sys.exit(0)
+
+            print(f"Captura de secuencias de la letra '{letra}' completada.")
+
+    capture.release()
+    cv2.destroyAllWindows()
+
+
+
+def construir_dataset_secuencias(data_dir, longitud=LONGITUD_VENTANA, stride=5):
+    """
+    Construye el dataset de secuencias a partir de los .npy de `capturar_secuencias_mediapipe`.
+    Las caracteristicas se calculan con el mismo BufferSecuencia que en tiempo real.
+
+    Args:
+    --------
+        - data_dir (str): Directorio raiz con una carpeta de secuencias por letra.
+        - longitud (int, opcional): Longitud de la ventana. Por defecto, LONGITUD_VENTANA.
+        - stride (int, opcional): Paso entre ventanas si la secuencia es mas larga que la ventana.
+
+    Retorna:
+    --------
+        - X (np.array): Caracteristicas de cada ventana.
+        - y (np.array): Etiqueta de cada ventana.
+    """
+    X, y = [], []
+    for letra in os.listdir(data_dir):
+        letra_dir = os.path.join(data_dir, letra)
+        if not os.path.isdir(letra_dir):
+            continue
+
+        for file in os.listdir(letra_dir):
+            if file.endswith(".npy"):
+                secuencia = np.load(os.path.join(letra_dir, file))
+                for feats in caracteristicas_secuencia(secuencia, longitud, stride):
+                    X.append(feats)
+                    y.append(letra)
+
+    X = np.array(X)
+    y = np.array(y)
+    return X, y
+
+
+
+def prediccion_secuencias_mediapipe(model_path="pipeline_mediapipe/modelos_mediapipe/rf_secuencias.pkl",
+                                    longitud=LONGITUD_VENTANA, stride=5):
+    """
+    Prediccion en tiempo real de letras con movimiento sobre una ventana deslizante de landmarks.
+
+    Cada frame actualiza el BufferSecuencia en O(1) y el clasificador de secuencias solo se
+    ejecuta cada `stride` frames cuando la ventana esta completa, sin recalcular la ventana entera.
+
+    Args:
+    --------
+        - model_path (str, opcional): Ruta del modelo de secuencias entrenado.
+        - longitud (int, opcional): Longitud de la ventana, la misma que en el entrenamiento.
+        - stride (int, opcional): Frames entre predicciones consecutivas. Por defecto, 5.
+
+    Retorna:
+    --------
+        - None: Muestra la prediccion en pantalla hasta que se pulse 'q'.
+    """
+    rf = joblib.load(model_path)
+    le = joblib.load(model_path.replace(".pkl","_le.pkl"))
+
+    cap = cv2.VideoCapture(0)
+    buffer = BufferSecuencia(longitud)
+    frames_desde_pred = 0
+    letra = None
+
+    with mp_hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            landmarks = extraer_landmarks(frame, hands)
+
+            if landmarks is not None:
+                buffer.anyadir(landmarks)
+                frames_desde_pred += 1
+
+                #Solo clasificamos con la ventana completa y cada `stride` frames
+                if buffer.lleno and frames_desde_pred >= stride:
+                    pred = rf.predict([buffer.caracteristicas()])[0]
+                    letra = le.inverse_transform([pred])[0]
+                    frames_desde_pred = 0
+
+                if letra is not None:
+                    cv2.putText(frame, f"Gesto: {letra}", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,255,0),2)
+                else:
+                    cv2.putText(frame, f"Llenando ventana {buffer.n}/{longitud}", (10,50),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,255,255),2)
+
+            #Si se pierde la mano la ventana deja de ser continua
+            else:
+                buffer.reiniciar()
+                frames_desde_pred = 0
+                letra = None
+                cv2.putText(frame, "Gesto no detectado", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,0,255),2)
+
+            cv2.imshow("Predicción de secuencias", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    cap.release()
+    cv2.destroyAllWindows()
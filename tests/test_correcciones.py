@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import cv2
+
+from clasico.src import preparar_data_modelo
+from clasico.src.entrenamiento import dataset_con_correcciones
+from clasico.src.prediccion_tiempo_real import guardar_correccion
+from pipeline_mediapipe.src import construccion_dataset_mp
+from pipeline_mediapipe.src.entrenamiento_mp import dataset_con_correcciones_mp
+from pipeline_mediapipe.src.prediccion_mp import guardar_correccion_mp
+
+
+N_POR_LETRA = 4
+N_CORRECCION = 3
+
+
+def _dataset_landmarks(data_dir, rng):
+    for letra in "AB":
+        os.makedirs(os.path.join(data_dir, letra))
+        for i in range(N_POR_LETRA):
+            np.save(os.path.join(data_dir, letra, f"{i}.npy"), rng.random(63))
+
+
+def _dataset_imagenes(data_dir, rng):
+    for letra in "AB":
+        os.makedirs(os.path.join(data_dir, letra))
+        for i in range(N_POR_LETRA):
+            cv2.imwrite(os.path.join(data_dir, letra, f"{i}.jpg"), rng.integers(0, 255, (64, 64), dtype=np.uint8))
+
+
+def test_correcciones_mediapipe_entran_una_vez(tmp_path, monkeypatch):
+    monkeypatch.setattr(construccion_dataset_mp, "FEATURES_FILE_MP", str(tmp_path / "features_mp.npz"))
+    rng = np.random.default_rng(0)
+    data_dir = str(tmp_path / "data")
+    _dataset_landmarks(data_dir, rng)
+    filas_muestra = 1 + 5   #Original y sus copias aumentadas
+
+    X, y, pesos = dataset_con_correcciones_mp(data_dir)
+    assert len(X) == 2 * N_POR_LETRA * filas_muestra
+    assert (pesos == 1).all()
+
+    for lote in range(1, 3):
+        guardar_correccion_mp(data_dir, "A", rng.random((N_CORRECCION, 63)))
+        X, y, pesos = dataset_con_correcciones_mp(data_dir, peso_correcciones=5)
+        #Cada lote de correcciones cuenta una sola vez, tambien en los reentrenamientos siguientes
+        assert len(X) == len(y) == len(pesos) == (2 * N_POR_LETRA + lote * N_CORRECCION) * filas_muestra
+        assert (pesos == 5).sum() == lote * N_CORRECCION * filas_muestra
+
+
+def test_correcciones_clasico_entran_una_vez(tmp_path, monkeypatch):
+    monkeypatch.setattr(preparar_data_modelo, "FEATURES_FILE", str(tmp_path / "features.npz"))
+    rng = np.random.default_rng(0)
+    data_dir = str(tmp_path / "procesadas")
+    _dataset_imagenes(data_dir, rng)
+    filas_muestra = 1 + 2
+
+    X, y, pesos = dataset_con_correcciones(data_dir)
+    assert len(X) == 2 * N_POR_LETRA * filas_muestra
+
+    for lote in range(1, 3):
+        rois = [rng.integers(0, 255, (64, 64), dtype=np.uint8) for _ in range(N_CORRECCION)]
+        guardar_correccion(data_dir, "C", rois)
+        X, y, pesos = dataset_con_correcciones(data_dir, peso_correcciones=5)
+        assert len(X) == (2 * N_POR_LETRA + lote * N_CORRECCION) * filas_muestra
+        assert (pesos == 5).sum() == (y == "C").sum() == lote * N_CORRECCION * filas_muestra
@@ -0,0 +1,38 @@
+import os
+import numpy as np
+import cv2
+
+from clasico.src import entrenamiento, preparar_data_modelo
+
+
+def _imagenes(carpeta, n, rng):
+    os.makedirs(carpeta, exist_ok=True)
+    for i in range(n):
+        cv2.imwrite(os.path.join(carpeta, f"{i}.jpg"), rng.integers(0, 255, (64, 64), dtype=np.uint8))
+
+
+def test_incremental_solo_con_imagenes_nuevas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    for letra in "AB":
+        _imagenes(os.path.join("procesadas", letra), 6, rng)
+    entrenamiento.run("procesadas")
+
+    #Volver a preprocesar reescribe las imagenes (nueva fecha, mismo contenido): no son nuevas
+    for letra in "AB":
+        for fichero in os.listdir(os.path.join("procesadas", letra)):
+            ruta = os.path.join("procesadas", letra, fichero)
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            with open(ruta, "wb") as f:
+                f.write(contenido)
+    assert entrenamiento.entrenar_incremental_rf("procesadas") == (None, None)
+
+    _imagenes(os.path.join("procesadas", "C"), 4, rng)
+    modelo, le = entrenamiento.entrenar_incremental_rf("procesadas")
+    assert modelo is not None and "C" in le.classes_
+
+    #La cache tiene una vez cada imagen (original y 2 aumentadas), sin filas duplicadas
+    X, y = preparar_data_modelo.construir_dataset("procesadas", augment=True, augment_factor=2)
+    assert len(X) == (6 + 6 + 4) * 3
+    assert entrenamiento.entrenar_incremental_rf("procesadas") == (None, None)
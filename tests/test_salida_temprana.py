@@ -0,0 +1,33 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+
+from comun.salida_temprana import BosqueSalidaTemprana, verificar_salida_temprana
+
+
+def _datos(rng):
+    X = rng.random((300, 8))
+    y = (X[:, 0] + X[:, 1] > 1).astype(int) + (X[:, 2] > 0.7).astype(int)
+    return X, y
+
+
+def test_parada_exacta_coincide_con_el_bosque_completo():
+    rng = np.random.default_rng(0)
+    X, y = _datos(rng)
+    for clase in (RandomForestClassifier, ExtraTreesClassifier):
+        rf = clase(n_estimators=64, random_state=0).fit(X[:200], y[:200])
+        resultado = verificar_salida_temprana(rf, X[200:])
+        assert resultado["coincidencia"] == 1.0
+        assert resultado["arboles_medios"] <= 64
+
+
+def test_resumen_verifica_las_entradas_vistas(capsys):
+    rng = np.random.default_rng(1)
+    X, y = _datos(rng)
+    rf = RandomForestClassifier(n_estimators=32, random_state=0).fit(X, y)
+    bosque = BosqueSalidaTemprana(rf, n_verificacion=50)
+    for x in X[:80]:
+        bosque.predict(x.reshape(1, -1))
+
+    assert len(bosque.entradas) == 50
+    bosque.resumen()
+    assert "Etiquetas iguales al bosque completo: 100.00% en 50 predicciones" in capsys.readouterr().out